@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Benchmark the Recognition Hot Path
+
+Times each stage of the per-frame path on generated frames and encodings,
+or on frames read from a video file, so it runs without a camera:
+
+    python benchmark.py --output results.json
+    python benchmark.py --video door.mp4 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from src.access_control import AccessController
+from src.ai_engine import AIEngine
+from src.camera import Camera
+from src.database import Database
+from src.gallery import FaceGallery
+
+DEFAULT_GALLERY_SIZES = [100, 1000, 10000, 100000]
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+def measure(fn, iterations, warmup=5):
+    """Call ``fn(i)`` repeatedly and return per-call durations in seconds"""
+    for i in range(warmup):
+        fn(i)
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples[i] = time.perf_counter() - start
+    return samples
+
+def summarize(samples):
+    """Latency percentiles (ms) and throughput for a set of samples"""
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+    return {
+        'iterations': int(len(samples)),
+        'mean_ms': float(samples.mean() * 1000),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(samples.max() * 1000),
+        'per_second': float(len(samples) / samples.sum()) if samples.sum() else 0.0
+    }
+
+def load_frames(video=None, count=30, width=640, height=480):
+    """Frames from a video file, or synthetic ones if none is given"""
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            raise SystemExit(f"Could not read frames from {video}")
+        return frames
+    
+    rng = np.random.default_rng(0)
+    for _ in range(count):
+        # Smoothed noise gives the detector texture to work on
+        noise = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        frames.append(cv2.GaussianBlur(noise, (9, 9), 0))
+    return frames
+
+def random_encodings(n, rng, dim=128):
+    """Random encodings with roughly the scale of dlib's"""
+    return rng.normal(0, 0.09, (n, dim)).astype(np.float32)
+
+def bench_detection(config, frames, iterations):
+    camera = Camera(config.get('camera', {}), open_source=False)
+    try:
+        return summarize(measure(lambda i: camera.detect_faces(frames[i % len(frames)]), iterations))
+    finally:
+        camera.release()
+
+def bench_encoding(config, frames, iterations):
+    try:
+        from src.face_recognition import FaceRecognitionEngine
+    except ImportError as e:
+        print(f"  skipped: {e}")
+        return None
+    
+    engine = FaceRecognitionEngine(config.get('recognition', {}))
+    engine.gallery.load(np.arange(1000), random_encodings(1000, np.random.default_rng(1)))
+    h, w = frames[0].shape[:2]
+    box = {'x': w // 2 - 75, 'y': h // 2 - 75, 'w': 150, 'h': 150}
+    return summarize(measure(lambda i: engine.recognize_face(frames[i % len(frames)], box),
+                             iterations))
+
+def bench_gallery(sizes, iterations, top_k=3):
+    rng = np.random.default_rng(2)
+    results = {}
+    for size in sizes:
+        gallery = FaceGallery()
+        gallery.load(np.arange(size), random_encodings(size, rng))
+        probes = random_encodings(64, rng)
+        # Fewer iterations on big galleries keeps the run short
+        n = max(20, min(iterations, int(iterations * 1000 / size)))
+        results[str(size)] = summarize(
+            measure(lambda i: gallery.match(probes[i % len(probes)], top_k=top_k), n))
+    return results
+
+def bench_access(config, iterations):
+    controller = AccessController(config.get('security', {}))
+    user = {'id': 1, 'name': 'Bench', 'role': 'employee', 'active': True}
+    timestamp = datetime(2024, 1, 3, 10, 0)
+    return summarize(measure(lambda i: controller.check_access(user, 0.9, timestamp), iterations))
+
+def bench_risk(config, iterations):
+    engine = AIEngine(config.get('ai', {}))
+    user = {'id': 1, 'name': 'Bench', 'role': 'employee', 'active': True}
+    base = datetime(2024, 1, 3, 10, 0).timestamp()
+    for day in range(30):
+        engine.record_access(1, datetime.fromtimestamp(base - day * 86400), True)
+    context = {'confidence': 0.9, 'timestamp': datetime(2024, 1, 3, 10, 0)}
+    return summarize(measure(lambda i: engine.assess_risk(user, current_context=context), iterations))
+
+def bench_log_access(config, iterations):
+    results = {}
+    entry = {'user_id': 1, 'success': True, 'method': 'face_recognition',
+             'confidence': 0.9, 'risk_score': 0.0, 'reason': 'Access approved'}
+    for mode, async_writes in [('sync', False), ('async', True)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_config = dict(config.get('database', {}), async_writes=async_writes)
+            database = Database(os.path.join(tmp, 'bench.db'), db_config)
+            try:
+                results[mode] = summarize(measure(
+                    lambda i: database.log_access(dict(entry, timestamp=datetime.now())),
+                    iterations))
+            finally:
+                database.close()
+    return results
+
+def bench_cli_startup(config, runs=5):
+    """Wall time of ``main.py --log``, which should only open the database"""
+    import yaml
+    with tempfile.TemporaryDirectory() as tmp:
+        cli_config = dict(config, database=dict(config.get('database', {}),
+                                                path=os.path.join(tmp, 'bench.db')))
+        config_path = os.path.join(tmp, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(cli_config, f)
+        command = [sys.executable, MAIN, '--config', config_path, '--log']
+        return summarize(measure(
+            lambda i: subprocess.run(command, cwd=tmp, capture_output=True, check=True),
+            runs, warmup=1))
+
+def run_benchmarks(config, frames, iterations, gallery_sizes):
+    """Run every stage and return a results document"""
+    stages = [
+        ('detect_faces', lambda: bench_detection(config, frames, iterations)),
+        ('recognize_face', lambda: bench_encoding(config, frames, max(10, iterations // 10))),
+        ('gallery_match', lambda: bench_gallery(gallery_sizes, iterations)),
+        ('check_access', lambda: bench_access(config, iterations * 10)),
+        ('assess_risk', lambda: bench_risk(config, iterations * 10)),
+        ('log_access', lambda: bench_log_access(config, iterations)),
+        ('cli_startup', lambda: bench_cli_startup(config))
+    ]
+    results = {}
+    for name, run in stages:
+        print(f"Running {name}...")
+        result = run()
+        if result is not None:
+            results[name] = result
+    
+    return {
+        'created': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'frame_shape': list(frames[0].shape)
+        },
+        'results': results
+    }
+
+def _flatten(results, prefix=''):
+    """Map 'stage' / 'stage.variant' names to their summaries"""
+    flat = {}
+    for name, value in results.items():
+        if 'p50_ms' in value:
+            flat[prefix + name] = value
+        else:
+            flat.update(_flatten(value, f"{prefix}{name}."))
+    return flat
+
+def compare(baseline, current, tolerance=0.2):
+    """List stages whose p50 grew by more than ``tolerance`` (a fraction)"""
+    old = _flatten(baseline['results'])
+    regressions = []
+    for name, stats in sorted(_flatten(current['results']).items()):
+        if name not in old or not old[name]['p50_ms']:
+            continue
+        ratio = stats['p50_ms'] / old[name]['p50_ms']
+        print(f"  {name:<28} p50 {old[name]['p50_ms']:9.3f} -> {stats['p50_ms']:9.3f} ms ({ratio:5.2f}x)")
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+def print_results(results):
+    print(f"\n{'stage':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name, stats in _flatten(results['results']).items():
+        print(f"{name:<28} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} "
+              f"{stats['p99_ms']:9.3f} {stats['per_second']:10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the NeuroDoor recognition hot path')
+    parser.add_argument('--config', default='config.yaml', help='Configuration file')
+    parser.add_argument('--video', help='Video file to take frames from (default: synthetic)')
+    parser.add_argument('--frames', type=int, default=30, help='Number of distinct frames')
+    parser.add_argument('--iterations', type=int, default=200, help='Iterations per stage')
+    parser.add_argument('--gallery-sizes', type=int, nargs='+', default=DEFAULT_GALLERY_SIZES,
+                        help='Gallery sizes to match against')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed p50 slowdown before a stage counts as a regression')
+    args = parser.parse_args()
+    
+    config = {}
+    if os.path.exists(args.config):
+        import yaml
+        with open(args.config) as f:
+            config = yaml.safe_load(f) or {}
+    
+    frames = load_frames(args.video, args.frames,
+                         config.get('camera', {}).get('width', 640),
+                         config.get('camera', {}).get('height', 480))
+    results = run_benchmarks(config, frames, args.iterations, args.gallery_sizes)
+    print_results(results)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
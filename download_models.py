@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 """Download Face Recognition Models"""
 import os
+import urllib.request
+
+YUNET_URL = ('https://github.com/opencv/opencv_zoo/raw/main/models/'
+             'face_detection_yunet/face_detection_yunet_2023mar.onnx')
+YUNET_PATH = 'data/models/face_detection_yunet_2023mar.onnx'
 
 def download_models():
     print("Downloading face recognition models...")
@@ -9,6 +14,14 @@ def download_models():
     os.makedirs('data/models', exist_ok=True)
     
     print("Note: face_recognition library includes pre-trained models")
+    
+    # Optional YuNet detector (camera.detection.backend: yunet)
+    if not os.path.exists(YUNET_PATH):
+        try:
+            urllib.request.urlretrieve(YUNET_URL, YUNET_PATH)
+            print(f"Downloaded YuNet face detector to {YUNET_PATH}")
+        except Exception as e:
+            print(f"Could not download YuNet model: {e}")
     print("Additional models can be downloaded as needed")
     print("Models ready!")
 
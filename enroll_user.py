@@ -2,6 +2,7 @@
 """User Enrollment Utility"""
 import sys
 import cv2
+import numpy as np
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -21,13 +22,14 @@ def enroll_user():
     # Initialize components
     db = Database()
     camera = Camera({'index': 0})
-    face_engine = FaceRecognitionEngine({'threshold': 0.6})
+    face_engine = FaceRecognitionEngine({'threshold': 0.6}, db)
     
     print("\nCapturing face images...")
     print("Please look at the camera and press SPACE to capture (ESC to cancel)")
     
     captured = 0
     target = 5
+    samples = []
     
     while captured < target:
         frame = camera.capture_frame()
@@ -39,7 +41,9 @@ def enroll_user():
             
             if key == 32:  # SPACE
                 faces = camera.detect_faces(frame)
-                if faces:
+                result = face_engine.recognize_face(frame, faces[0]) if faces else {}
+                if result.get('face_encoding') is not None:
+                    samples.append(result['face_encoding'])
                     print(f"Captured {captured + 1}/{target}")
                     captured += 1
                 else:
@@ -54,6 +58,10 @@ def enroll_user():
     camera.release()
     cv2.destroyAllWindows()
     
+    user_id = db.add_user(name, role)
+    face_engine.save_encoding(user_id, np.mean(samples, axis=0))
+    db.close()
+    
     print("\nEnrollment complete!")
     print(f"User '{name}' enrolled as {role}")
 
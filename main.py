@@ -7,59 +7,184 @@ Main Application Entry Point
 import argparse
 import sys
 import signal
+import threading
 import time
 import logging
+from functools import cached_property
 from pathlib import Path
 from datetime import datetime, timedelta
 import yaml
 
-from src.camera import Camera
-from src.face_recognition import FaceRecognitionEngine
-from src.access_control import AccessController
-from src.hardware import DoorLock
-from src.ai_engine import AIEngine
-from src.alerts import AlertManager
+# Only light modules here; camera, recognition (dlib), GPIO and Flask are
+# imported when the component that needs them is first used
+from src.clock import SystemClock, SimulatedClock
+from src.metrics import metrics, load_snapshot, format_stats
 from src.database import Database
-from src.web_dashboard import create_app
+from src.events import EventBus
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/neurodoor.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+def setup_logging(log_file='logs/neurodoor.log'):
+    """Log to stdout and to ``log_file``"""
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+
 class NeuroDoor:
     """Main NeuroDoor system controller"""
     
-    def __init__(self, config_path='config.yaml'):
+    # Built, and their modules imported, on first use so admin commands
+    # only open the database
+    COMPONENTS = ('camera', 'motion_detector', 'tracker', 'quality_gate', 'scheduler',
+                  'face_engine', 'access_controller', 'door_lock', 'ai_engine', 'alert_manager',
+                  'preview')
+    
+    def __init__(self, config_path='config.yaml', replay=None):
         """Initialize NeuroDoor system"""
         self.running = False
+        self.pipeline = None
         self.config = self.load_config(config_path)
+        self.replay = replay
+        self.dry_run = replay is not None
+        self.clock = SystemClock()
+        self.trace = None
+        self.events = EventBus()
+        metrics.configure(self.config.get('metrics', {}))
         
         logger.info("Initializing NeuroDoor-Pi5 system...")
         
         try:
-            # Initialize components
-            self.database = Database(self.config['database']['path'])
-            self.camera = Camera(self.config['camera'])
-            self.face_engine = FaceRecognitionEngine(self.config['recognition'])
-            self.access_controller = AccessController(self.config['security'])
-            self.door_lock = DoorLock(self.config['hardware']['lock_pin'])
-            self.ai_engine = AIEngine(self.config['ai'])
-            self.alert_manager = AlertManager(self.config['alerts'])
-            
-            logger.info("System initialization complete")
-            
+            self.database = Database(self.config['database']['path'], self.config['database'])
+            if replay:
+                self._setup_replay(replay)
+            self._register_gauges()
         except Exception as e:
             logger.error(f"Failed to initialize system: {e}")
             raise
     
+    def _setup_replay(self, replay):
+        """Simulated clock and decision trace for a dry run"""
+        from src.replay import DecisionTrace, recording_start
+        
+        replay_config = self.config.get('replay', {})
+        start = replay.get('start_time') or replay_config.get('start_time')
+        if isinstance(start, str):
+            start = datetime.fromisoformat(start)
+        source = Path(replay['source'])
+        if start is None:
+            # Default to when the recording was made
+            start = recording_start(source, replay_config.get('image_fps', 10.0))
+        
+        self.clock = SimulatedClock(start)
+        self.trace = DecisionTrace(replay.get('trace'))
+        logger.info(f"Dry run: replaying {source} from {self.clock.now().isoformat()}")
+    
+    def initialize(self):
+        """Build every component now rather than on first use"""
+        for name in self.COMPONENTS:
+            getattr(self, name)
+        logger.info("System initialization complete")
+    
+    def _built(self, name):
+        """Whether a lazily built component exists yet"""
+        return name in self.__dict__
+    
+    @cached_property
+    def camera(self):
+        if self.replay:
+            from src.replay import ReplayCamera
+            return ReplayCamera(self.config['camera'], self.replay['source'],
+                                realtime=self.replay.get('realtime', True), clock=self.clock,
+                                fps=self.config.get('replay', {}).get('image_fps', 10.0))
+        from src.camera import Camera
+        return Camera(self.config['camera'])
+    
+    @cached_property
+    def motion_detector(self):
+        from src.motion import MotionDetector
+        return MotionDetector(self.config.get('motion', {}))
+    
+    @cached_property
+    def tracker(self):
+        from src.tracker import FaceTracker
+        return FaceTracker(self.config.get('tracking', {}))
+    
+    @cached_property
+    def quality_gate(self):
+        from src.quality import FaceQualityGate
+        return FaceQualityGate(self.config.get('quality', {}))
+    
+    @cached_property
+    def scheduler(self):
+        from src.scheduler import FrameScheduler
+        scheduler_config = self.config.get('scheduler', {})
+        if self.replay and not self.replay.get('realtime', True):
+            scheduler_config = dict(scheduler_config, enabled=False)
+        return FrameScheduler(scheduler_config)
+    
+    @cached_property
+    def face_engine(self):
+        from src.face_recognition import FaceRecognitionEngine
+        return FaceRecognitionEngine(self.config['recognition'], self.database)
+    
+    @cached_property
+    def access_controller(self):
+        from src.access_control import AccessController
+        return AccessController(self.config['security'],
+                                match_threshold=self.config['recognition'].get('threshold', 0.6))
+    
+    @cached_property
+    def door_lock(self):
+        from src.hardware import DoorLock
+        return DoorLock(self.config['hardware']['lock_pin'], simulate=self.dry_run)
+    
+    @cached_property
+    def ai_engine(self):
+        from src.ai_engine import AIEngine
+        return AIEngine(self.config['ai'], self.database)
+    
+    @cached_property
+    def preview(self):
+        from src.preview import PreviewStream
+        return PreviewStream(self.config.get('preview', {}))
+    
+    @cached_property
+    def status_snapshot(self):
+        from src.status import StatusSnapshot
+        return StatusSnapshot(self.database, self.events, self.config.get('dashboard', {}))
+    
+    @cached_property
+    def retention(self):
+        from src.retention import AccessLogRetention
+        return AccessLogRetention(self.database.db_path, self.config.get('retention', {}),
+                                  self.config['database'])
+    
+    @cached_property
+    def alert_manager(self):
+        from src.alerts import AlertManager
+        return AlertManager(self.config['alerts'], dry_run=self.dry_run)
+    
+    def _register_gauges(self):
+        """Expose queue depths, drops and frame rate as metrics gauges"""
+        # Reading a gauge must not build a component; unbuilt ones raise
+        # KeyError and are left out of the snapshot
+        built = self.__dict__
+        metrics.gauge('camera_frames_dropped', lambda: built['camera'].get_stats()['frames_dropped'])
+        metrics.gauge('db_write_queue_depth', lambda: self.database.get_write_stats()['queue_depth'])
+        metrics.gauge('db_rows_dropped', lambda: self.database.get_write_stats()['dropped'])
+        metrics.gauge('alert_queue_depth', lambda: built['alert_manager'].get_stats()['queue_depth'])
+        metrics.gauge('frame_queue_depth', lambda: self.pipeline.frames.qsize() if self.pipeline else 0)
+        metrics.gauge('encode_queue_depth', lambda: self.pipeline.jobs.qsize() if self.pipeline else 0)
+        metrics.gauge('frame_rate', lambda: built['scheduler'].fps)
+    
     def load_config(self, config_path):
         """Load configuration from YAML file"""
         try:
@@ -81,6 +206,7 @@ class NeuroDoor:
     
     def start(self):
         """Start the access control system"""
+        self.initialize()
         self.running = True
         logger.info("Starting NeuroDoor access control system...")
         
@@ -89,153 +215,326 @@ class NeuroDoor:
         signal.signal(signal.SIGTERM, self.signal_handler)
         
         consecutive_errors = 0
-        max_consecutive_errors = 5
+        
+        dashboard = self.config.get('dashboard', {})
+        if dashboard.get('embedded', False):
+            self._start_dashboard(dashboard.get('port', 5000))
         
         try:
+            if self.config.get('pipeline', {}).get('enabled', False):
+                from src.pipeline import RecognitionPipeline
+                self.pipeline = RecognitionPipeline(self, self.config['pipeline'])
+                self.pipeline.run()
+                return
+            
             while self.running:
+                self.scheduler.begin()
                 try:
                     # Capture frame from camera
-                    frame = self.camera.capture_frame()
+                    with metrics.time('capture'):
+                        frame = self.camera.capture_frame()
                     
                     if frame is None:
-                        consecutive_errors += 1
-                        logger.warning(f"Failed to capture frame ({consecutive_errors}/{max_consecutive_errors})")
-                        
-                        if consecutive_errors >= max_consecutive_errors:
-                            self.alert_manager.send_alert({
-                                'type': 'system_error',
-                                'severity': 'critical',
-                                'message': 'Camera failure - unable to capture frames',
-                                'timestamp': datetime.now()
-                            })
-                            consecutive_errors = 0
-                        
-                        time.sleep(1)
+                        if self.dry_run and not self.camera.is_active():
+                            break
+                        consecutive_errors = self.handle_capture_failure(consecutive_errors + 1)
+                        self.scheduler.wait_after_error()
                         continue
                     
-                    # Detect faces in frame
-                    faces = self.camera.detect_faces(frame)
-                    
+                    faces = self.process_frame(frame)
                     if faces:
-                        for face in faces:
-                            # Perform facial recognition
-                            result = self.face_engine.recognize_face(frame, face)
-                            
-                            if result['user_id']:
-                                user = self.database.get_user(result['user_id'])
-                                
-                                # Check access permissions
-                                access_decision = self.access_controller.check_access(
-                                    user=user,
-                                    confidence=result['confidence'],
-                                    timestamp=datetime.now()
-                                )
-                                
-                                # AI risk assessment
-                                risk_score = self.ai_engine.assess_risk(
-                                    user=user,
-                                    access_history=self.database.get_user_access_history(user['id']),
-                                    current_context={'confidence': result['confidence']}
-                                )
-                                
-                                # Log access attempt
-                                log_entry = {
-                                    'user_id': user['id'],
-                                    'timestamp': datetime.now(),
-                                    'success': access_decision['granted'],
-                                    'method': 'face',
-                                    'confidence': result['confidence'],
-                                    'risk_score': risk_score,
-                                    'anomaly_detected': risk_score > 0.7,
-                                    'reason': access_decision.get('reason', '')
-                                }
-                                
-                                self.database.log_access(log_entry)
-                                
-                                # Handle access decision
-                                if access_decision['granted']:
-                                    logger.info(f"Access GRANTED for {user['name']} (confidence: {result['confidence']:.2f})")
-                                    
-                                    # Unlock door
-                                    self.door_lock.unlock(duration=self.config['security']['unlock_duration'])
-                                    
-                                    # Send notification
-                                    self.alert_manager.send_alert({
-                                        'type': 'access_granted',
-                                        'severity': 'info',
-                                        'message': f"Access granted to {user['name']}",
-                                        'user': user['name'],
-                                        'confidence': result['confidence'],
-                                        'timestamp': datetime.now()
-                                    })
-                                    
-                                else:
-                                    logger.warning(f"Access DENIED for {user['name']} - {access_decision['reason']}")
-                                    
-                                    self.alert_manager.send_alert({
-                                        'type': 'access_denied',
-                                        'severity': 'warning',
-                                        'message': f"Access denied to {user['name']}: {access_decision['reason']}",
-                                        'user': user['name'],
-                                        'reason': access_decision['reason'],
-                                        'timestamp': datetime.now()
-                                    })
-                                
-                                # Check for anomalies
-                                if risk_score > 0.7:
-                                    self.alert_manager.send_alert({
-                                        'type': 'suspicious_activity',
-                                        'severity': 'critical',
-                                        'message': f"High risk score ({risk_score:.2f}) detected for {user['name']}",
-                                        'user': user['name'],
-                                        'risk_score': risk_score,
-                                        'timestamp': datetime.now()
-                                    })
-                            
-                            else:
-                                # Unknown face
-                                logger.warning("Unknown face detected")
-                                
-                                # Log unknown access attempt
-                                self.database.log_access({
-                                    'user_id': None,
-                                    'timestamp': datetime.now(),
-                                    'success': False,
-                                    'method': 'face',
-                                    'confidence': result['confidence'],
-                                    'reason': 'Unknown face'
-                                })
-                                
-                                self.alert_manager.send_alert({
-                                    'type': 'unknown_face',
-                                    'severity': 'warning',
-                                    'message': 'Unknown face detected at door',
-                                    'timestamp': datetime.now()
-                                })
-                        
                         consecutive_errors = 0
                     
-                    # Small delay to reduce CPU usage
-                    time.sleep(0.1)
+                    # Run fast while someone is at the door, slow when idle
+                    self.scheduler.report(self.is_scene_active(faces))
+                    self.scheduler.wait()
                 
                 except Exception as e:
                     logger.error(f"Error in main loop: {e}", exc_info=True)
                     consecutive_errors += 1
-                    time.sleep(1)
+                    self.scheduler.wait_after_error()
         
         finally:
             self.cleanup()
     
+    def _start_dashboard(self, port):
+        """Serve the web dashboard (and the live preview) from this process"""
+        from src.web_dashboard import create_app
+        app = create_app(self)
+        thread = threading.Thread(target=app.run, name='dashboard', daemon=True,
+                                  kwargs={'host': '0.0.0.0', 'port': port,
+                                          'threaded': True, 'use_reloader': False})
+        thread.start()
+        logger.info(f"Web dashboard running on port {port}")
+    
+    def handle_capture_failure(self, consecutive_errors, max_consecutive_errors=5):
+        """Warn about a failed capture; returns the updated error count"""
+        logger.warning(f"Failed to capture frame ({consecutive_errors}/{max_consecutive_errors})")
+        
+        if consecutive_errors >= max_consecutive_errors:
+            self.alert_manager.send_alert({
+                'type': 'system_error',
+                'severity': 'critical',
+                'message': 'Camera failure - unable to capture frames',
+                'timestamp': self.clock.now()
+            })
+            consecutive_errors = 0
+        
+        return consecutive_errors
+    
+    def detect(self, frame, now=None):
+        """Detect faces, skipping static scenes"""
+        # Only run face detection when something is moving or a face is
+        # already being followed
+        with metrics.time('detect'):
+            if self.motion_detector.detect(frame, now) or self.tracker.has_tracks():
+                return self.camera.detect_faces(frame)
+            return []
+    
+    def is_scene_active(self, faces):
+        """Whether the last frame had motion, faces or live tracks"""
+        return bool(faces) or self.motion_detector.active or self.tracker.has_tracks()
+    
+    def process_frame(self, frame):
+        """Run detection, tracking and recognition on one frame; returns the detected faces"""
+        self.housekeeping()
+        
+        now = self.clock.monotonic()
+        faces = self.detect(frame, now)
+        metrics.inc('frames_processed')
+        metrics.observe_faces(len(faces))
+        tracked = self.tracker.update(faces, now)
+        due = self.select_for_recognition(frame, tracked, now)
+        
+        # Encode every due face in one batch
+        if due:
+            results = self.face_engine.recognize_faces(frame, [face for _, face in due])
+            for (track, _), result in zip(due, results):
+                self.handle_recognition(track, result, now)
+        
+        # Nothing is copied or encoded unless someone is watching
+        if self.preview.viewers:
+            self.preview.offer(frame, tracked)
+        
+        return faces
+    
+    def housekeeping(self):
+        """Periodic gallery refresh, profile persistence and log retention"""
+        # Pick up newly enrolled or disabled users
+        self.face_engine.maybe_refresh()
+        if not self.dry_run:
+            self.ai_engine.maybe_save()
+            metrics.maybe_export()
+            # Compacts in its own thread, a batch at a time
+            self.retention.maybe_run()
+    
+    def select_for_recognition(self, frame, tracked, now):
+        """Pick the (track, face) pairs that need encoding on this frame"""
+        wall_now = self.clock.now().timestamp()
+        due = []
+        for track, face in tracked:
+            # Known tracks are only re-encoded periodically
+            if track.pending or not self.tracker.needs_recognition(track, now):
+                continue
+            
+            # Locked-out users are refused without encoding them again
+            if self.access_controller.is_locked_out(wall_now, user_id=track.user_id):
+                continue
+            
+            # Blurry, badly lit or tiny faces wait for a better frame
+            if not self.quality_gate.check(frame, face):
+                continue
+            
+            due.append((track, face))
+        return due
+    
+    def handle_recognition(self, track, result, now):
+        """Act on a recognition result for a tracked face"""
+        track.last_attempt = now
+        track.attempts += 1
+        
+        user = self.database.get_user(result['user_id']) if result['user_id'] else None
+        
+        if user:
+            first_identification = track.user_id != user['id']
+            track.user_id = user['id']
+            track.name = user['name']
+            track.confidence = result['confidence']
+            track.last_verified = now
+            
+            # A re-verification that confirms the cached identity needs no
+            # new decision, log entry or alert, unless it can overturn a
+            # low-confidence denial
+            if first_identification or track.needs_decision(result['confidence'],
+                                                           self.access_controller.threshold):
+                track.decision = self.decide_access(user, result, track.track_id)
+                track.reported = True
+        
+        elif track.user_id is None:
+            # Give a new face a few attempts before calling it unknown; only
+            # a reported unknown visit counts as a failed attempt, so a
+            # slow first match is not locked out
+            if not track.reported and track.attempts >= self.tracker.unknown_attempts:
+                wall_now = self.clock.now().timestamp()
+                unknown_id = self.access_controller.identify_unknown(
+                    result.get('face_encoding'), wall_now)
+                # A locked-out stranger is not logged or alerted on again
+                if not self.access_controller.is_locked_out(wall_now, unknown_id=unknown_id):
+                    self.access_controller.record_unknown_face(unknown_id, wall_now)
+                    self.report_unknown_face(result, track.track_id)
+                track.name = 'Unknown'
+                track.reported = True
+    
+    def decide_access(self, user, result, track_id=None):
+        """Check access for a recognized user, then log, unlock and alert"""
+        now = self.clock.now()
+        
+        # Check access permissions
+        with metrics.time('access_check'):
+            access_decision = self.access_controller.check_access(
+                user=user,
+                confidence=result['confidence'],
+                timestamp=now
+            )
+        
+        # AI risk assessment from the in-memory behavior profile
+        with metrics.time('risk'):
+            risk_score = self.ai_engine.assess_risk(
+                user=user,
+                current_context={'confidence': result['confidence'], 'timestamp': now}
+            )
+        
+        # Log access attempt
+        log_entry = {
+            'user_id': user['id'],
+            'timestamp': now,
+            'success': access_decision['granted'],
+            'method': 'face',
+            'confidence': result['confidence'],
+            'risk_score': risk_score,
+            'anomaly_detected': risk_score > 0.7,
+            'reason': access_decision.get('reason', '')
+        }
+        
+        self.log_decision(log_entry, track_id=track_id, user_name=user['name'])
+        self.ai_engine.record_access(user['id'], now, access_decision['granted'])
+        
+        # Handle access decision
+        if access_decision['granted']:
+            logger.info(f"Access GRANTED for {user['name']} (confidence: {result['confidence']:.2f})")
+            
+            # Unlock door
+            self.door_lock.unlock(duration=self.config['security']['unlock_duration'])
+            
+            # Send notification
+            self.alert_manager.send_alert({
+                'type': 'access_granted',
+                'severity': 'info',
+                'message': f"Access granted to {user['name']}",
+                'user': user['name'],
+                'confidence': result['confidence'],
+                'timestamp': now
+            })
+            
+        else:
+            logger.warning(f"Access DENIED for {user['name']} - {access_decision['reason']}")
+            
+            self.alert_manager.send_alert({
+                'type': 'access_denied',
+                'severity': 'warning',
+                'message': f"Access denied to {user['name']}: {access_decision['reason']}",
+                'user': user['name'],
+                'reason': access_decision['reason'],
+                'timestamp': now
+            })
+        
+        # Check for anomalies
+        if risk_score > 0.7:
+            self.alert_manager.send_alert({
+                'type': 'suspicious_activity',
+                'severity': 'critical',
+                'message': f"High risk score ({risk_score:.2f}) detected for {user['name']}",
+                'user': user['name'],
+                'risk_score': risk_score,
+                'timestamp': now
+            })
+        
+        access_decision['risk_score'] = risk_score
+        return access_decision
+    
+    def report_unknown_face(self, result, track_id=None):
+        """Log and alert on a face that matched no enrolled user"""
+        logger.warning("Unknown face detected")
+        now = self.clock.now()
+        
+        # Log unknown access attempt
+        self.log_decision({
+            'user_id': None,
+            'timestamp': now,
+            'success': False,
+            'method': 'face',
+            'confidence': result['confidence'],
+            'reason': 'Unknown face'
+        }, track_id=track_id)
+        
+        self.alert_manager.send_alert({
+            'type': 'unknown_face',
+            'severity': 'warning',
+            'message': 'Unknown face detected at door',
+            'timestamp': now
+        })
+    
+    def log_decision(self, log_entry, **details):
+        """Write an access log entry (trace only in a dry run) and publish an ``access`` event"""
+        if self.dry_run:
+            self.trace.record(dict(log_entry, frame=self.camera.frame_seq, **details))
+        else:
+            self.database.log_access(log_entry)
+        
+        # A followed snapshot publishes the new row from its own poll
+        if self._built('status_snapshot') and self.status_snapshot.following:
+            return
+        
+        timestamp = log_entry.get('timestamp')
+        self.events.publish('access', {
+            'user_id': log_entry.get('user_id'),
+            'user_name': details.get('user_name'),
+            # Same text form SQLite stores, so pushed and queried rows match
+            'timestamp': str(timestamp) if timestamp is not None else None,
+            'success': log_entry.get('success'),
+            'method': log_entry.get('method'),
+            'confidence': log_entry.get('confidence'),
+            'reason': log_entry.get('reason', '')
+        })
+    
     def stop(self):
         """Stop the system"""
         logger.info("Stopping NeuroDoor system...")
         self.running = False
+        if self._built('scheduler'):
+            self.scheduler.wake()
     
     def cleanup(self):
         """Cleanup resources"""
         logger.info("Cleaning up resources...")
         try:
-            self.camera.release()
+            # Only release what was actually built
+            if self._built('camera'):
+                self.camera.release()
+            if self._built('door_lock'):
+                self.door_lock.release()
+            if self.dry_run:
+                self.trace.close()
+            else:
+                if self._built('ai_engine'):
+                    self.ai_engine.save_profiles()
+                metrics.maybe_export(force=True)
+            if self._built('alert_manager'):
+                self.alert_manager.close()
+            if self._built('status_snapshot'):
+                self.status_snapshot.stop()
+            if self._built('retention'):
+                self.retention.stop()
             self.database.close()
             logger.info("Cleanup complete")
         except Exception as e:
@@ -243,13 +542,21 @@ class NeuroDoor:
     
     def get_status(self):
         """Get current system status"""
+        built = self._built
         try:
             return {
                 'status': 'operational' if self.running else 'stopped',
-                'camera': 'active' if self.camera.is_active() else 'inactive',
-                'door_lock': 'locked' if self.door_lock.is_locked() else 'unlocked',
-                'total_users': self.database.get_user_count(),
-                'recent_access': self.database.get_recent_access(limit=5),
+                'camera': 'active' if built('camera') and self.camera.is_active() else 'inactive',
+                'door_lock': ('locked' if self.door_lock.is_locked() else 'unlocked')
+                             if built('door_lock') else 'unknown',
+                'door_lock_state': self.door_lock.get_state() if built('door_lock') else None,
+                'lockouts': self.access_controller.get_lockout_state() if built('access_controller') else None,
+                'pipeline': self.pipeline.get_stats() if self.pipeline else None,
+                'face_quality': self.quality_gate.get_stats() if built('quality_gate') else None,
+                'scheduler': self.scheduler.get_stats() if built('scheduler') else None,
+                'events': self.events.get_stats(),
+                'preview': self.preview.get_stats() if built('preview') else None,
+                **self.status_snapshot.get()[1],
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -259,15 +566,34 @@ class NeuroDoor:
                 'timestamp': datetime.now().isoformat()
             }
     
+    def get_dashboard_status(self):
+        """Compact status for the dashboard, served from the status snapshot"""
+        built = self._built
+        version, fields = self.status_snapshot.get()
+        return {
+            'status': 'operational' if self.running else 'stopped',
+            'camera': 'active' if built('camera') and self.camera.is_active() else 'inactive',
+            'door_lock': ('locked' if self.door_lock.is_locked() else 'unlocked')
+                         if built('door_lock') else 'unknown',
+            'version': version,
+            **fields
+        }
+    
+    def get_metrics(self):
+        """Live metrics, or the snapshot exported by a running instance (None if there is none)"""
+        if self.running:
+            return metrics.snapshot()
+        return load_snapshot(metrics.export_path) if metrics.export_path else None
+    
     def unlock_door(self, duration=5, user='manual'):
         """Manually unlock door"""
         logger.info(f"Manual unlock requested by {user}")
         self.door_lock.unlock(duration=duration)
         
         # Log manual unlock
-        self.database.log_access({
+        self.log_decision({
             'user_id': None,
-            'timestamp': datetime.now(),
+            'timestamp': self.clock.now(),
             'success': True,
             'method': 'manual',
             'reason': f'Manual unlock by {user}'
@@ -287,12 +613,24 @@ def main():
     
     parser.add_argument('--config', default='config.yaml', help='Configuration file')
     parser.add_argument('--status', action='store_true', help='Display system status')
+    parser.add_argument('--stats', action='store_true', help='Display runtime metrics')
     parser.add_argument('--log', action='store_true', help='View access log')
     parser.add_argument('--days', type=int, default=7, help='Days of log history')
     parser.add_argument('--report', action='store_true', help='Generate report')
     parser.add_argument('--start-date', help='Report start date (YYYY-MM-DD)')
-    parser.add_argument('--end-date', help='Report end date (YYYY-MM-DD)')
-    parser.add_argument('--test', action='store_true', help='Test recognition')
+    parser.add_argument('--end-date', help='Report end date (YYYY-MM-DD, inclusive)')
+    parser.add_argument('--format', choices=['text', 'csv', 'json'], default='text',
+                        help='Report format: text summary, CSV rows or JSON summary and rows')
+    parser.add_argument('--output', help='Write the CSV/JSON report here (- for stdout)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Archive and remove access log rows past the retention age now')
+    parser.add_argument('--test', action='store_true',
+                        help='Test recognition: dry run over a recording given with --replay')
+    parser.add_argument('--replay', help='Video file or image directory to replay')
+    parser.add_argument('--fast', action='store_true',
+                        help='Replay as fast as possible instead of at the recorded rate')
+    parser.add_argument('--trace', help='Write the replay decision trace (JSON lines) here')
+    parser.add_argument('--start-time', help='Wall-clock time the recording starts (ISO format)')
     parser.add_argument('--unlock', action='store_true', help='Unlock door')
     parser.add_argument('--lock', action='store_true', help='Lock door')
     parser.add_argument('--emergency-unlock', action='store_true', help='Emergency unlock')
@@ -302,57 +640,138 @@ def main():
     
     args = parser.parse_args()
     
+    setup_logging()
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    if args.report and args.format != 'text' and not args.output:
+        parser.error(f'--format {args.format} needs --output FILE')
+    
+    replay = None
+    if args.test:
+        if not args.replay:
+            parser.error('--test needs a recording: --replay VIDEO_OR_IMAGE_DIR')
+        replay = {
+            'source': args.replay,
+            'realtime': not args.fast,
+            'trace': args.trace,
+            'start_time': args.start_time
+        }
+    
     try:
-        neurodoor = NeuroDoor(args.config)
+        neurodoor = NeuroDoor(args.config, replay=replay)
     except Exception as e:
         logger.error(f"Failed to initialize: {e}")
         sys.exit(1)
     
-    if args.status:
-        status = neurodoor.get_status()
-        print("\n=== NeuroDoor-Pi5 Status ===")
-        print(f"System: {status['status']}")
-        print(f"Camera: {status.get('camera', 'unknown')}")
-        print(f"Door Lock: {status.get('door_lock', 'unknown')}")
-        print(f"Total Users: {status.get('total_users', 0)}")
-        print(f"Timestamp: {status['timestamp']}")
-        print("=" * 30 + "\n")
-    
-    elif args.log:
-        start_date = datetime.now() - timedelta(days=args.days)
-        logs = neurodoor.database.get_access_log(start_date=start_date, limit=50)
-        print(f"\n=== Access Log (Last {args.days} days) ===\n")
-        for log in logs:
-            status = "✓" if log['success'] else "✗"
-            user = log.get('user_name', 'Unknown')
-            print(f"{status} {log['timestamp']} - {user} ({log['method']}) - {log.get('reason', '')}")
-        print()
-    
-    elif args.unlock:
-        neurodoor.unlock_door(user='CLI')
-        print("Door unlocked")
-    
-    elif args.lock:
-        neurodoor.lock_door(user='CLI')
-        print("Door locked")
-    
-    elif args.emergency_unlock:
-        neurodoor.unlock_door(duration=0, user='EMERGENCY')
-        print("Emergency unlock activated - door will remain unlocked")
-    
-    elif args.web:
-        app = create_app(neurodoor)
-        logger.info(f"Starting web dashboard on port {args.port}")
-        app.run(host='0.0.0.0', port=args.port, debug=args.debug)
-    
-    else:
-        logger.info("=" * 60)
-        logger.info("NeuroDoor-Pi5 - AI-Assisted Smart Door Access Control")
-        logger.info("=" * 60)
-        neurodoor.start()
+    try:
+        if args.status:
+            status = neurodoor.get_status()
+            print("\n=== NeuroDoor-Pi5 Status ===")
+            print(f"System: {status['status']}")
+            print(f"Camera: {status.get('camera', 'unknown')}")
+            print(f"Door Lock: {status.get('door_lock', 'unknown')}")
+            print(f"Total Users: {status.get('total_users', 0)}")
+            print(f"Timestamp: {status['timestamp']}")
+            print("=" * 30 + "\n")
+        
+        elif args.stats:
+            snapshot = neurodoor.get_metrics()
+            if snapshot is None:
+                print("No exported metrics snapshot found")
+            else:
+                age = time.time() - snapshot['timestamp']
+                print("\n=== NeuroDoor-Pi5 Metrics ===")
+                print(f"Snapshot: {datetime.fromtimestamp(snapshot['timestamp']).isoformat()} "
+                      f"({age:.0f}s ago)\n")
+                print(format_stats(snapshot))
+                print("=" * 30 + "\n")
+        
+        elif args.log:
+            start_date = datetime.now() - timedelta(days=args.days)
+            logs = neurodoor.database.get_access_log(start_date=start_date, limit=50)
+            print(f"\n=== Access Log (Last {args.days} days) ===\n")
+            for log in logs:
+                status = "✓" if log['success'] else "✗"
+                user = log.get('user_name', 'Unknown')
+                print(f"{status} {log['timestamp']} - {user} ({log['method']}) - {log.get('reason', '')}")
+            print()
+        
+        elif args.report:
+            from src.reports import ReportGenerator, parse_date_range, format_report
+            try:
+                start, end = parse_date_range(args.start_date, args.end_date)
+            except ValueError as e:
+                logger.error(f"Invalid report dates: {e}")
+                sys.exit(1)
+            # Include entries still queued by an async writer
+            neurodoor.database.flush()
+            generator = ReportGenerator(neurodoor.database)
+            if args.format == 'text':
+                print("\n=== NeuroDoor-Pi5 Access Report ===\n")
+                print(format_report(generator.summary(start, end)))
+                print()
+            else:
+                write = generator.write_csv if args.format == 'csv' else generator.write_json
+                if args.output == '-':
+                    count = write(sys.stdout, start, end)
+                else:
+                    with open(args.output, 'w', newline='') as f:
+                        count = write(f, start, end)
+                    print(f"Report written to {args.output} ({count} rows)")
+        
+        elif args.compact:
+            neurodoor.database.flush()
+            retention = neurodoor.retention
+            result = retention.run()
+            print(f"Compacted {result['rows']} access log rows older than {result['cutoff'][:10]} "
+                  f"in {result['batches']} batches")
+            if result['rows'] and retention.archive:
+                print(f"Archived to {retention.archive_dir}")
+        
+        elif args.unlock:
+            neurodoor.unlock_door(user='CLI')
+            print("Door unlocked")
+        
+        elif args.lock:
+            neurodoor.lock_door(user='CLI')
+            print("Door locked")
+        
+        elif args.emergency_unlock:
+            neurodoor.unlock_door(duration=0, user='EMERGENCY')
+            print("Emergency unlock activated - door will remain unlocked")
+        
+        elif args.test:
+            started = time.monotonic()
+            neurodoor.start()
+            elapsed = time.monotonic() - started
+            camera = neurodoor.camera.get_stats()
+            summary = neurodoor.trace.summary()
+            print("\n=== Replay Summary ===")
+            print(f"Frames: {camera['frames_captured']} ({camera['frames_dropped']} skipped)")
+            print(f"Elapsed: {elapsed:.1f}s ({camera['frames_captured'] / max(elapsed, 1e-9):.1f} fps)")
+            print(f"Decisions: {summary['decisions']} (granted {summary.get('granted', 0)}, "
+                  f"denied {summary.get('denied', 0)}, unknown {summary.get('unknown', 0)})")
+            if args.trace:
+                print(f"Trace: {args.trace}")
+            print("=" * 22 + "\n")
+        
+        elif args.web:
+            from src.web_dashboard import create_app
+            # The vision loop runs in another process; follow its writes
+            app = create_app(neurodoor, follow_database=True)
+            logger.info(f"Starting web dashboard on port {args.port}")
+            app.run(host='0.0.0.0', port=args.port, debug=args.debug, threaded=True)
+        
+        else:
+            logger.info("=" * 60)
+            logger.info("NeuroDoor-Pi5 - AI-Assisted Smart Door Access Control")
+            logger.info("=" * 60)
+            neurodoor.start()
+    
+    finally:
+        # Make sure queued access log entries reach disk
+        neurodoor.database.close()
 
 
 if __name__ == '__main__':
@@ -1,20 +1,159 @@
 """Access Control Logic"""
+import itertools
 import logging
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime, time
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+class LockoutTracker:
+    """Sliding-window failed-attempt counter with timed lockouts"""
+    
+    def __init__(self, max_failures=3, window=300, lockout_duration=300):
+        self.max_failures = max_failures
+        self.window = window
+        self.lockout_duration = lockout_duration
+        self._failures = OrderedDict()
+        self._locked_until = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _expire(self, now):
+        """Drop keys whose newest failure fell out of the window (lock held)"""
+        while self._failures:
+            key, times = next(iter(self._failures.items()))
+            if times and now - times[-1] < self.window:
+                break
+            self._failures.popitem(last=False)
+        
+        while self._locked_until and next(iter(self._locked_until.values())) <= now:
+            self._locked_until.popitem(last=False)
+    
+    def record_failure(self, key, now):
+        """Record a failure; returns True if the key is now locked out"""
+        with self._lock:
+            self._expire(now)
+            times = self._failures.pop(key, None) or deque()
+            times.append(now)
+            while times and now - times[0] >= self.window:
+                times.popleft()
+            self._failures[key] = times
+            
+            if len(times) < self.max_failures:
+                return False
+            self._locked_until.pop(key, None)
+            self._locked_until[key] = now + self.lockout_duration
+            times.clear()
+        logger.warning(f"Lockout for {key[0]} {key[1]} until +{self.lockout_duration}s")
+        return True
+    
+    def record_success(self, key):
+        """Clear failures after a successful attempt"""
+        with self._lock:
+            self._failures.pop(key, None)
+    
+    def is_locked(self, key, now):
+        """Whether the key is currently locked out"""
+        with self._lock:
+            until = self._locked_until.get(key)
+            if until is None:
+                return False
+            if until <= now:
+                del self._locked_until[key]
+                return False
+            return True
+    
+    def snapshot(self, now):
+        """Current failure counts and active lockouts"""
+        with self._lock:
+            self._expire(now)
+            return {
+                'failures': {f"{k[0]}:{k[1]}": len(t) for k, t in self._failures.items() if t},
+                'lockouts': {f"{k[0]}:{k[1]}": round(until - now, 1)
+                             for k, until in self._locked_until.items()}
+            }
+
+class UnknownFaces:
+    """Recent unrecognized encodings, so a returning stranger keeps one id"""
+    
+    def __init__(self, threshold=0.6, max_faces=100, ttl=300):
+        self.threshold = threshold
+        self.max_faces = max_faces
+        self.ttl = ttl
+        self._faces = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def identify(self, encoding, now):
+        """Id of the closest recent unknown face, or a new id"""
+        with self._lock:
+            # Entries are kept in last-seen order
+            while self._faces and now - next(iter(self._faces.values()))[1] >= self.ttl:
+                self._faces.popitem(last=False)
+            if encoding is None:
+                return next(self._ids)
+            
+            encoding = np.asarray(encoding, dtype=np.float32)
+            unknown_id = None
+            if self._faces:
+                ids = list(self._faces)
+                known = np.stack([face for face, _ in self._faces.values()])
+                distances = np.linalg.norm(known - encoding, axis=1)
+                best = int(np.argmin(distances))
+                if distances[best] <= self.threshold:
+                    unknown_id = ids[best]
+                    encoding = self._faces.pop(unknown_id)[0]
+            if unknown_id is None:
+                unknown_id = next(self._ids)
+                if len(self._faces) >= self.max_faces:
+                    self._faces.popitem(last=False)
+            self._faces[unknown_id] = (encoding, now)
+            return unknown_id
+
 class AccessController:
     """Manages access control decisions"""
     
-    def __init__(self, config):
+    def __init__(self, config, match_threshold=0.6):
         self.config = config
-        self.threshold = config.get('face_recognition_threshold', 0.6)
+        # 0.5 is the weakest match; the default refuses the weakest tenth
+        self.match_threshold = match_threshold
+        self.threshold = config.get('face_confidence_threshold')
+        if self.threshold is None:
+            self.threshold = self._legacy_threshold(config, match_threshold)
         self.two_factor_required = config.get('two_factor_required', False)
         self.enforce_time_rules = config.get('enforce_time_rules', True)
+        lockout_duration = config.get('lockout_duration', 300)
+        window = config.get('failed_attempt_window', lockout_duration)
+        self.lockouts = LockoutTracker(
+            max_failures=config.get('max_failed_attempts', 3),
+            window=window,
+            lockout_duration=lockout_duration
+        )
+        self.unknown_faces = UnknownFaces(threshold=match_threshold,
+                                          ttl=window + lockout_duration)
+    
+    @staticmethod
+    def _legacy_threshold(config, match_threshold):
+        """Translate the old face_recognition_threshold, which compared 1 - distance"""
+        legacy = config.get('face_recognition_threshold')
+        if legacy is None:
+            return 0.55
+        # Keep the largest distance it accepted (1 - legacy), on the new scale
+        threshold = 1.0 - 0.5 * (1.0 - legacy) / match_threshold
+        logger.warning(f"security.face_recognition_threshold is deprecated; using "
+                       f"face_confidence_threshold: {threshold:.2f} in its place")
+        return threshold
     
     def check_access(self, user, confidence, timestamp):
         """Check if access should be granted"""
+        now = timestamp.timestamp()
+        user_key = ('user', user.get('id'))
+        
+        # Refuse locked-out users before anything else
+        if self.is_locked_out(now, user_id=user.get('id')):
+            return {'granted': False, 'reason': 'Locked out after failed attempts'}
         
         # Check if user is active
         if not user.get('active', True):
@@ -22,6 +161,7 @@ class AccessController:
         
         # Check recognition confidence
         if confidence < self.threshold:
+            self.lockouts.record_failure(user_key, now)
             return {'granted': False, 'reason': 'Low recognition confidence'}
         
         # Check time-based rules
@@ -33,8 +173,28 @@ class AccessController:
         if not self._check_role_rules(user):
             return {'granted': False, 'reason': 'Insufficient permissions'}
         
+        self.lockouts.record_success(user_key)
         return {'granted': True, 'reason': 'Access approved'}
     
+    def is_locked_out(self, now, user_id=None, unknown_id=None):
+        """Whether a user or an unknown face is locked out (``now`` in epoch seconds)"""
+        if user_id is not None and self.lockouts.is_locked(('user', user_id), now):
+            return True
+        return unknown_id is not None and self.lockouts.is_locked(('unknown', unknown_id), now)
+    
+    def identify_unknown(self, encoding, now):
+        """Lockout id for an unrecognized face; the same stranger gets the same id"""
+        return self.unknown_faces.identify(encoding, now)
+    
+    def record_unknown_face(self, unknown_id, now):
+        """Count an unrecognized face against its unknown id"""
+        return self.lockouts.record_failure(('unknown', unknown_id), now)
+    
+    def get_lockout_state(self, now=None):
+        """Snapshot of failure counters and active lockouts"""
+        now = datetime.now().timestamp() if now is None else now
+        return self.lockouts.snapshot(now)
+    
     def _check_time_rules(self, user, timestamp):
         """Check time-based access rules"""
         current_time = timestamp.time()
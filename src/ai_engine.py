@@ -1,27 +1,122 @@
 """AI Engine for Adaptive Security"""
 import logging
-import numpy as np
+import time
+from collections import deque
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+class BehaviorProfile:
+    """Incrementally maintained access pattern for one user"""
+    
+    def __init__(self, hour_counts=None, dow_counts=None, recent=None, attempts=0, ring_size=10):
+        self.hour_counts = list(hour_counts) if hour_counts else [0] * 24
+        self.dow_counts = list(dow_counts) if dow_counts else [0] * 7
+        self.recent = deque(recent or [], maxlen=ring_size)
+        self.attempts = attempts
+        self.successes = sum(self.hour_counts)
+    
+    def record(self, timestamp, success):
+        """Add one access attempt in O(1)"""
+        self.attempts += 1
+        self.recent.append(timestamp.timestamp())
+        if success:
+            self.hour_counts[timestamp.hour] += 1
+            self.dow_counts[timestamp.weekday()] += 1
+            self.successes += 1
+    
+    def is_normal_hour(self, hour):
+        """Whether the user usually gets in at this hour"""
+        if not self.successes:
+            return 8 <= hour < 18
+        return self.hour_counts[hour] > 0
+    
+    def recent_attempts(self, timestamp, window=60):
+        """Number of attempts in the ``window`` seconds before ``timestamp``"""
+        now = timestamp.timestamp()
+        return sum(1 for t in self.recent if 0 <= now - t < window)
+
 class AIEngine:
     """AI-powered adaptive security engine"""
     
-    def __init__(self, config):
+    def __init__(self, config, database=None):
         self.config = config
         self.learning_enabled = config.get('learning_enabled', True)
+        self.ring_size = config.get('recent_attempts_size', 10)
+        self.save_interval = config.get('profile_save_interval', 60)
+        self.database = database
+        self.profiles = {}
+        self._dirty = set()
+        self._last_save = time.monotonic()
+        self.load_profiles()
+    
+    def load_profiles(self):
+        """Load persisted behavior profiles, building them from the log once"""
+        if self.database is None:
+            return
+        
+        rows = self.database.get_behavior_profiles()
+        if not rows:
+            rows = self.database.build_behavior_profiles()
+            self._dirty.update(row['user_id'] for row in rows)
+        
+        for row in rows:
+            self.profiles[row['user_id']] = BehaviorProfile(
+                row['hour_counts'], row['dow_counts'], row['recent'],
+                row['attempts'], self.ring_size)
+        logger.info(f"Behavior profiles loaded: {len(self.profiles)} users")
+    
+    def save_profiles(self):
+        """Persist profiles changed since the last save"""
+        if self.database is None or not self._dirty:
+            return
+        
+        rows = [{
+            'user_id': user_id,
+            'hour_counts': profile.hour_counts,
+            'dow_counts': profile.dow_counts,
+            'recent': list(profile.recent),
+            'attempts': profile.attempts
+        } for user_id, profile in ((u, self.profiles[u]) for u in self._dirty)]
+        self.database.save_behavior_profiles(rows)
+        self._dirty.clear()
+        self._last_save = time.monotonic()
+    
+    def maybe_save(self):
+        """Save profiles if the save interval has elapsed"""
+        if time.monotonic() - self._last_save >= self.save_interval:
+            try:
+                self.save_profiles()
+            except Exception as e:
+                logger.error(f"Failed to save behavior profiles: {e}")
     
-    def assess_risk(self, user, access_history, current_context):
+    def get_profile(self, user_id):
+        """Get or create a user's profile"""
+        profile = self.profiles.get(user_id)
+        if profile is None:
+            profile = self.profiles[user_id] = BehaviorProfile(ring_size=self.ring_size)
+        return profile
+    
+    def record_access(self, user_id, timestamp, success):
+        """Update a user's profile with a logged attempt"""
+        if not self.learning_enabled or user_id is None:
+            return
+        self.get_profile(user_id).record(timestamp, success)
+        self._dirty.add(user_id)
+    
+    def assess_risk(self, user, access_history=None, current_context=None):
         """Calculate risk score for access attempt"""
+        current_context = current_context or {}
+        timestamp = current_context.get('timestamp') or datetime.now()
         risk_score = 0.0
         
+        profile = self.profiles.get(user['id'])
+        if profile is None and access_history:
+            profile = self._profile_from_history(user['id'], access_history)
+        
         # Analyze time patterns
-        if access_history:
-            normal_hours = self._get_normal_hours(access_history)
-            current_hour = datetime.now().hour
-            
-            if current_hour not in normal_hours:
+        if profile and profile.attempts:
+            if not profile.is_normal_hour(timestamp.hour):
                 risk_score += 0.3
         
         # Check confidence level
@@ -30,18 +125,21 @@ class AIEngine:
             risk_score += 0.2
         
         # Detect rapid successive attempts
-        recent_attempts = [a for a in access_history if 
-                          (datetime.now() - datetime.fromisoformat(a['timestamp'])).seconds < 60]
-        if len(recent_attempts) > 3:
+        if profile and profile.recent_attempts(timestamp) > 3:
             risk_score += 0.4
         
         return min(risk_score, 1.0)
     
-    def _get_normal_hours(self, access_history):
-        """Determine normal access hours from history"""
-        hours = [datetime.fromisoformat(a['timestamp']).hour 
-                for a in access_history if a.get('success')]
-        return set(hours) if hours else set(range(8, 18))
+    def _profile_from_history(self, user_id, access_history):
+        """Seed a profile from raw log rows for a user not seen before"""
+        profile = self.get_profile(user_id)
+        for a in reversed(access_history):
+            timestamp = a['timestamp']
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            profile.record(timestamp, a.get('success'))
+        self._dirty.add(user_id)
+        return profile
     
     def detect_anomaly(self, user, current_access):
         """Detect anomalous access patterns"""
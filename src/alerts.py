@@ -1,30 +1,210 @@
 """Alert Management System"""
 import logging
+import queue
 import smtplib
+import threading
+import time
+from collections import deque
 from email.mime.text import MIMEText
 
+from src.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+class SMTPMailer:
+    """Keeps one SMTP session open and reconnects with backoff"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.server = config.get('smtp_server', 'localhost')
+        self.port = config.get('smtp_port', 587)
+        self.use_tls = config.get('use_tls', self.port == 587)
+        self.username = config.get('username')
+        self.password = config.get('password')
+        self.timeout = config.get('timeout', 10)
+        self.min_backoff = config.get('retry_backoff', 1.0)
+        self.max_backoff = config.get('max_retry_backoff', 300.0)
+        self.sent = 0
+        self.failures = 0
+        self.connections = 0
+        self._smtp = None
+        self._backoff = self.min_backoff
+        self._retry_at = 0.0
+    
+    def available(self):
+        """Whether a send may be attempted now"""
+        return time.monotonic() >= self._retry_at
+    
+    def _connect(self):
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            self._smtp = smtp
+            self.connections += 1
+        return self._smtp
+    
+    def send(self, msg):
+        """Send a message, reusing the session; returns False on failure"""
+        if not self.available():
+            return False
+        
+        # A stale session fails on first use; retry once on a fresh one
+        for attempt in range(2):
+            try:
+                self._connect().send_message(msg)
+                self.sent += 1
+                self._backoff = self.min_backoff
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                self.close()
+                error = e
+        
+        self.failures += 1
+        self._retry_at = time.monotonic() + self._backoff
+        logger.error(f"Failed to send email, retrying in {self._backoff:.0f}s: {error}")
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+        return False
+    
+    def close(self):
+        """Close the SMTP session"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
 class AlertManager:
     """Manages alert notifications"""
     
-    def __init__(self, config):
+    def __init__(self, config, dry_run=False):
         self.config = config
+        self.dry_run = dry_run
         self.email_config = config.get('email', {})
         self.sms_config = config.get('sms', {})
+        self.dedup_window = config.get('dedup_window', 60)
+        self.digest_interval = config.get('digest_interval', 3600)
+        self.digest_severities = set(config.get('digest_severities', ['info']))
+        self.mailer = SMTPMailer(self.email_config) if self.email_config.get('enabled') else None
+        self.dropped = 0
+        self.suppressed = 0
+        self._last_sent = {}
+        self._coalesced = {}
+        self._dedup_lock = threading.Lock()
+        self._digest = []
+        self._digest_due = time.monotonic() + self.digest_interval
+        self._pending = deque(maxlen=config.get('retry_queue_size', 100))
+        self._queue = queue.Queue(maxsize=config.get('queue_size', 1000))
+        self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+        self._thread.start()
     
     def send_alert(self, alert):
         """Send alert through configured channels"""
-        severity = alert.get('severity', 'info')
-        
+        with metrics.time('alert'):
+            self._submit(alert)
+    
+    def _submit(self, alert):
         logger.info(f"Alert: {alert['type']} - {alert['message']}")
         
-        if severity in ['critical', 'warning']:
+        # Log all alerts
+        self._log_alert(alert)
+        if self.dry_run:
+            return
+        
+        # Coalesce repeats of the same event
+        key = (alert['type'], alert.get('user'))
+        now = time.monotonic()
+        with self._dedup_lock:
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.dedup_window:
+                repeats = self._coalesced.get(key, (0, None))[0]
+                self._coalesced[key] = (repeats + 1, alert)
+                self.suppressed += 1
+                return
+            self._last_sent[key] = now
+            repeats, _ = self._coalesced.pop(key, (0, None))
+        
+        if repeats:
+            alert = dict(alert, repeats=repeats)
+        
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+    
+    def _flush_coalesced(self, force=False):
+        """Send repeats whose dedup window has ended, with the last of them"""
+        now = time.monotonic()
+        due = []
+        with self._dedup_lock:
+            for key, (repeats, alert) in list(self._coalesced.items()):
+                if force or now - self._last_sent[key] >= self.dedup_window:
+                    del self._coalesced[key]
+                    # The summary opens a new window for further repeats
+                    self._last_sent[key] = now
+                    due.append(dict(alert, repeats=repeats))
+        for alert in due:
+            self._dispatch(alert)
+    
+    def _run(self):
+        while True:
+            timeout = 1.0
+            if self.digest_interval:
+                timeout = max(0.0, min(timeout, self._digest_due - time.monotonic()))
+            try:
+                alert = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                alert = False
+            
+            if alert is None:
+                break
+            if alert:
+                self._dispatch(alert)
+            
+            if self._coalesced:
+                self._flush_coalesced()
+            self._retry_pending()
+            if self.digest_interval and time.monotonic() >= self._digest_due:
+                self._flush_digest()
+        
+        self._flush_coalesced(force=True)
+        self._flush_digest()
+        self._retry_pending()
+        if self.mailer:
+            self.mailer.close()
+    
+    def _dispatch(self, alert):
+        """Route one alert to its channels"""
+        severity = alert.get('severity', 'info')
+        
+        if severity in self.digest_severities:
+            if self.mailer and self.digest_interval:
+                self._digest.append(alert)
+        elif severity in ['critical', 'warning']:
             if self.email_config.get('enabled'):
                 self._send_email(alert)
+    
+    def _retry_pending(self):
+        while self._pending and self.mailer.available():
+            msg = self._pending.popleft()
+            if not self.mailer.send(msg):
+                self._pending.appendleft(msg)
+                break
+    
+    def _flush_digest(self):
+        """Send queued low-severity alerts as one email"""
+        self._digest_due = time.monotonic() + self.digest_interval
+        if not self._digest:
+            return
         
-        # Log all alerts
-        self._log_alert(alert)
+        lines = [f"{a.get('timestamp', '')} {a['type']}: {a['message']}" for a in self._digest]
+        msg = self._build_message(
+            f"NeuroDoor Digest: {len(self._digest)} events", '\n'.join(lines))
+        self._digest = []
+        self._deliver(msg)
     
     def _send_email(self, alert):
         """Send email alert"""
@@ -32,16 +212,49 @@ class AlertManager:
             return
         
         try:
-            msg = MIMEText(f"{alert['type']}: {alert['message']}")
-            msg['Subject'] = f"NeuroDoor Alert: {alert['severity'].upper()}"
-            msg['From'] = self.email_config.get('from')
-            msg['To'] = ', '.join(self.email_config.get('recipients', []))
-            
-            # Send via SMTP (implementation depends on config)
-            logger.info("Email alert sent")
+            body = f"{alert['type']}: {alert['message']}"
+            if alert.get('repeats'):
+                body += f"\n({alert['repeats']} similar alerts suppressed)"
+            msg = self._build_message(f"NeuroDoor Alert: {alert['severity'].upper()}", body)
+            self._deliver(msg)
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
     
+    def _build_message(self, subject, body):
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self.email_config.get('from')
+        msg['To'] = ', '.join(self.email_config.get('recipients', []))
+        return msg
+    
+    def _deliver(self, msg):
+        # Keep ordering: nothing jumps ahead of messages awaiting retry
+        if self._pending or not self.mailer.send(msg):
+            self._pending.append(msg)
+        else:
+            logger.info("Email alert sent")
+    
+    def get_stats(self):
+        """Dispatcher counters"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'dropped': self.dropped,
+            'suppressed': self.suppressed,
+            'pending_retry': len(self._pending),
+            'emails_sent': self.mailer.sent if self.mailer else 0,
+            'email_failures': self.mailer.failures if self.mailer else 0
+        }
+    
+    def close(self, timeout=10.0):
+        """Flush queued alerts and stop the dispatcher"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+    
     def _log_alert(self, alert):
         """Log alert to file"""
         logger.info(f"[ALERT] {alert}")
@@ -1,56 +1,257 @@
 """Camera Interface Module"""
 import cv2
 import logging
+import threading
+import time
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+class HaarDetector:
+    """OpenCV Haar cascade face detector"""
+    
+    def __init__(self, config):
+        self.scale_factor = config.get('scale_factor', 1.3)
+        self.min_neighbors = config.get('min_neighbors', 5)
+        self.cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+    
+    def detect(self, image, min_size, max_size):
+        """Return (x, y, w, h) boxes in ``image`` coordinates"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        kwargs = {}
+        if min_size:
+            kwargs['minSize'] = (min_size, min_size)
+        if max_size:
+            kwargs['maxSize'] = (max_size, max_size)
+        return self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors, **kwargs)
+
+class YuNetDetector:
+    """OpenCV DNN (YuNet) face detector, run on the CPU"""
+    
+    def __init__(self, config):
+        self.model = config.get('yunet_model', 'data/models/face_detection_yunet_2023mar.onnx')
+        self.score_threshold = config.get('score_threshold', 0.8)
+        self.detector = cv2.FaceDetectorYN.create(self.model, '', (320, 320),
+                                                  self.score_threshold, 0.3, 50)
+        self._input_size = None
+    
+    def detect(self, image, min_size, max_size):
+        """Return (x, y, w, h) boxes in ``image`` coordinates"""
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        size = (image.shape[1], image.shape[0])
+        if size != self._input_size:
+            self.detector.setInputSize(size)
+            self._input_size = size
+        
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return []
+        boxes = []
+        for face in faces:
+            x, y, w, h = (int(v) for v in face[:4])
+            if (min_size and w < min_size) or (max_size and w > max_size):
+                continue
+            boxes.append((max(0, x), max(0, y), w, h))
+        return boxes
+
+def face_size_limits(config):
+    """Expected face width range in pixels, explicit or from the approach distances"""
+    focal = config.get('focal_length_px', 550)
+    face_width = config.get('face_width_m', 0.16)
+    min_size = config.get('min_face_size')
+    max_size = config.get('max_face_size')
+    if min_size is None and config.get('max_distance'):
+        min_size = int(focal * face_width / config['max_distance'])
+    if max_size is None and config.get('min_distance'):
+        max_size = int(focal * face_width / config['min_distance'])
+    return min_size, max_size
+
+class FrameGrabber:
+    """Reads frames on a background thread and keeps only the newest one"""
+    
+    def __init__(self, cap):
+        self.cap = cap
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self._slot = None
+        self._consumed_seq = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+    
+    def start(self):
+        """Start the capture thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='frame-grabber', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the capture thread"""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+    
+    def _run(self):
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.05)
+                continue
+            
+            with self._cond:
+                self.frames_captured += 1
+                if self._slot is not None and self._slot[0] > self._consumed_seq:
+                    self.frames_dropped += 1
+                self._slot = (self.frames_captured, frame, time.monotonic())
+                self._cond.notify_all()
+    
+    def read(self, timeout=1.0):
+        """Newest unread ``(seq, frame, captured_at)``, waiting up to ``timeout``, or None"""
+        with self._cond:
+            fresh = self._cond.wait_for(
+                lambda: not self._running or
+                (self._slot is not None and self._slot[0] > self._consumed_seq),
+                timeout)
+            if not fresh or self._slot is None or self._slot[0] <= self._consumed_seq:
+                return None
+            self._consumed_seq = self._slot[0]
+            return self._slot
+    
+    def get_stats(self):
+        """Capture counters"""
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+            'last_seq': self._consumed_seq
+        }
+
 class Camera:
     """Camera interface for face capture"""
     
-    def __init__(self, config):
+    def __init__(self, config, open_source=True):
         self.config = config
         self.camera_index = config.get('index', 0)
+        self.width = config.get('width', 640)
+        self.height = config.get('height', 480)
+        self.threaded = config.get('threaded', True)
+        self.frame_timeout = config.get('frame_timeout', 1.0)
         self.cap = None
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        self._initialize()
+        self.grabber = None
+        self.frame_seq = 0
+        self.frame_time = None
+        self._setup_detection(config.get('detection', {}))
+        # Without a source only face detection is usable
+        if open_source:
+            self._initialize()
+    
+    def _setup_detection(self, config):
+        """Configure detector backend, downscaling, size limits and ROI"""
+        self.detection_scale = config.get('scale', 1.0)
+        self.roi = config.get('roi')
+        self.min_face_size, self.max_face_size = face_size_limits(config)
+        
+        backend = config.get('backend', 'haar')
+        self.detector = None
+        if backend == 'yunet':
+            try:
+                self.detector = YuNetDetector(config)
+                logger.info("Using YuNet face detector")
+            except (AttributeError, cv2.error) as e:
+                logger.warning(f"YuNet detector unavailable ({e}), falling back to Haar")
+        if self.detector is None:
+            self.detector = HaarDetector(config)
     
     def _initialize(self):
         """Initialize camera"""
         try:
             self.cap = cv2.VideoCapture(self.camera_index)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            # Keep the driver queue short so frames are never stale
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            
+            if self.threaded and self.cap.isOpened():
+                self.grabber = FrameGrabber(self.cap)
+                self.grabber.start()
             logger.info(f"Camera initialized: index {self.camera_index}")
         except Exception as e:
             logger.error(f"Failed to initialize camera: {e}")
             self.cap = None
     
-    def capture_frame(self):
-        """Capture a single frame"""
+    def capture_frame(self, out=None):
+        """Capture a frame, into ``out`` when given; threaded mode waits for a new one"""
         if self.cap is None or not self.cap.isOpened():
             return None
         
-        ret, frame = self.cap.read()
-        return frame if ret else None
+        if self.grabber:
+            latest = self.grabber.read(self.frame_timeout)
+            if latest is None:
+                return None
+            self.frame_seq, frame, self.frame_time = latest
+            if out is not None and out.shape == frame.shape:
+                np.copyto(out, frame)
+                return out
+            return frame
+        
+        # OpenCV decodes straight into ``out`` when the shape matches
+        ret, frame = self.cap.read(out) if out is not None else self.cap.read()
+        if not ret:
+            return None
+        self.frame_seq += 1
+        self.frame_time = time.monotonic()
+        return frame
     
     def detect_faces(self, frame):
-        """Detect faces in frame"""
+        """Detect faces in the downscaled ROI; boxes are in full-frame coordinates"""
         if frame is None:
             return []
         
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-        return [{'x': x, 'y': y, 'w': w, 'h': h} for (x, y, w, h) in faces]
+        # Restrict to the approach zone (a view, not a copy)
+        ox, oy = 0, 0
+        image = frame
+        if self.roi:
+            ox, oy, rw, rh = self.roi
+            image = frame[oy:oy + rh, ox:ox + rw]
+            if image.size == 0:
+                return []
+        
+        scale = self.detection_scale
+        if scale != 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        min_size = int(self.min_face_size * scale) if self.min_face_size else None
+        max_size = int(self.max_face_size * scale) if self.max_face_size else None
+        faces = self.detector.detect(image, min_size, max_size)
+        
+        return [{'x': ox + int(round(x / scale)), 'y': oy + int(round(y / scale)),
+                 'w': int(round(w / scale)), 'h': int(round(h / scale))}
+                for (x, y, w, h) in faces]
     
     def is_active(self):
         """Check if camera is active"""
         return self.cap is not None and self.cap.isOpened()
     
+    def get_stats(self):
+        """Capture statistics"""
+        if self.grabber:
+            return self.grabber.get_stats()
+        return {'frames_captured': self.frame_seq, 'frames_dropped': 0,
+                'read_failures': 0, 'last_seq': self.frame_seq}
+    
     def release(self):
         """Release camera"""
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
         if self.cap:
             self.cap.release()
             logger.info("Camera released")
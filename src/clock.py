@@ -0,0 +1,35 @@
+"""Wall and Monotonic Clocks"""
+import time
+from datetime import datetime, timedelta
+
+class SystemClock:
+    """Real time from the operating system"""
+    
+    def now(self):
+        """Wall-clock time used for rules, risk and logging"""
+        return datetime.now()
+    
+    def monotonic(self):
+        """Seconds for intervals (tracking, motion hold, retries)"""
+        return time.monotonic()
+
+class SimulatedClock:
+    """Clock driven by recorded frame timestamps, offset from the recording's start"""
+    
+    def __init__(self, start=None):
+        self.start = start or datetime.now()
+        self.offset = 0.0
+    
+    def set(self, seconds):
+        """Move to ``seconds`` into the recording (never backwards)"""
+        self.offset = max(self.offset, seconds)
+    
+    def advance(self, seconds):
+        """Move forward by ``seconds``"""
+        self.offset += seconds
+    
+    def now(self):
+        return self.start + timedelta(seconds=self.offset)
+    
+    def monotonic(self):
+        return self.offset
@@ -2,56 +2,410 @@
 import sqlite3
 import logging
 import json
+import queue
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+from src.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+def _migration_base_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            face_encoding BLOB,
+            pin_hash TEXT,
+            active BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_access DATETIME
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS access_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            success BOOLEAN,
+            method TEXT,
+            confidence REAL,
+            photo_path TEXT,
+            risk_score REAL,
+            anomaly_detected BOOLEAN DEFAULT 0,
+            reason TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+def _migration_encoding_rev(cursor):
+    # Every change to a user's encoding or active flag bumps a global
+    # revision so the recognizer can reload only what changed
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(users)")]
+    if 'encoding_rev' not in columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN encoding_rev INTEGER DEFAULT 0")
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_encoding_rev ON users(encoding_rev)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_encoding_rev_insert
+        AFTER INSERT ON users
+        BEGIN
+            UPDATE users SET encoding_rev = (SELECT COALESCE(MAX(encoding_rev), 0) + 1 FROM users)
+            WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_encoding_rev_update
+        AFTER UPDATE OF face_encoding, active ON users
+        BEGIN
+            UPDATE users SET encoding_rev = (SELECT COALESCE(MAX(encoding_rev), 0) + 1 FROM users)
+            WHERE id = NEW.id;
+        END
+    """)
+
+def _migration_access_log_indexes(cursor):
+    # Per-user history is filtered on user_id and sorted by time; the log
+    # views range-scan and sort on timestamp alone
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_access_log_user_time
+        ON access_log(user_id, timestamp)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_access_log_timestamp
+        ON access_log(timestamp)
+    """)
+
+def _migration_behavior_profiles(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            user_id INTEGER PRIMARY KEY,
+            hour_counts TEXT NOT NULL,
+            dow_counts TEXT NOT NULL,
+            recent TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+# Rollup table suffix and the bucket expression applied to a timestamp
+ROLLUPS = [('hourly', "strftime('%Y-%m-%d %H:00:00', {ts})"), ('daily', "date({ts})")]
+
+def _migration_access_rollups(cursor):
+    # Per period, user (0 = unknown face), outcome and method. Rows are
+    # kept current by an insert trigger, so the sync path and the batched
+    # writer both update them in the same transaction as the log row, and
+    # they keep counting after old log rows are archived and deleted
+    upserts = []
+    for table, bucket in ROLLUPS:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS access_rollup_{table} (
+                period TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                success INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                anomalies INTEGER NOT NULL DEFAULT 0,
+                confidence_sum REAL NOT NULL DEFAULT 0,
+                confidence_n INTEGER NOT NULL DEFAULT 0,
+                risk_sum REAL NOT NULL DEFAULT 0,
+                risk_n INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, user_id, success, method)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute(f"""
+            INSERT INTO access_rollup_{table}
+            SELECT {bucket.format(ts="COALESCE(timestamp, CURRENT_TIMESTAMP)")},
+                   COALESCE(user_id, 0), CASE WHEN success THEN 1 ELSE 0 END, COALESCE(method, ''),
+                   COUNT(*), SUM(CASE WHEN anomaly_detected THEN 1 ELSE 0 END),
+                   COALESCE(SUM(confidence), 0), COUNT(confidence),
+                   COALESCE(SUM(risk_score), 0), COUNT(risk_score)
+            FROM access_log
+            GROUP BY 1, 2, 3, 4
+        """)
+        upserts.append(f"""
+            INSERT INTO access_rollup_{table} VALUES (
+                {bucket.format(ts="COALESCE(NEW.timestamp, CURRENT_TIMESTAMP)")},
+                COALESCE(NEW.user_id, 0), CASE WHEN NEW.success THEN 1 ELSE 0 END,
+                COALESCE(NEW.method, ''), 1, CASE WHEN NEW.anomaly_detected THEN 1 ELSE 0 END,
+                COALESCE(NEW.confidence, 0), NEW.confidence IS NOT NULL,
+                COALESCE(NEW.risk_score, 0), NEW.risk_score IS NOT NULL)
+            ON CONFLICT (period, user_id, success, method) DO UPDATE SET
+                attempts = attempts + 1,
+                anomalies = anomalies + excluded.anomalies,
+                confidence_sum = confidence_sum + excluded.confidence_sum,
+                confidence_n = confidence_n + excluded.confidence_n,
+                risk_sum = risk_sum + excluded.risk_sum,
+                risk_n = risk_n + excluded.risk_n;
+        """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS access_log_rollup AFTER INSERT ON access_log
+        BEGIN
+            {''.join(upserts)}
+        END
+    """)
+
+def _migration_encoding_rev_counter(cursor):
+    # MAX(encoding_rev) + 1 goes backwards when the newest user is deleted,
+    # reusing revisions a refresh has already passed; take them from a
+    # counter row that only ever increases
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS encoding_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            rev INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO encoding_revision
+        SELECT 1, COALESCE(MAX(encoding_rev), 0) FROM users
+    """)
+    for event, trigger in [('INSERT', 'insert'), ('UPDATE OF face_encoding, active', 'update')]:
+        cursor.execute(f"DROP TRIGGER IF EXISTS users_encoding_rev_{trigger}")
+        cursor.execute(f"""
+            CREATE TRIGGER users_encoding_rev_{trigger}
+            AFTER {event} ON users
+            BEGIN
+                UPDATE encoding_revision SET rev = rev + 1;
+                UPDATE users SET encoding_rev = (SELECT rev FROM encoding_revision)
+                WHERE id = NEW.id;
+            END
+        """)
+
+def _migration_encoding_tombstones(cursor):
+    # A deleted user has no row left to carry a revision; a tombstone does,
+    # so incremental reloads drop them from the gallery
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS encoding_tombstones (
+            user_id INTEGER PRIMARY KEY,
+            encoding_rev INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_encoding_tombstones_rev
+        ON encoding_tombstones(encoding_rev)
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_encoding_rev_delete
+        AFTER DELETE ON users
+        BEGIN
+            UPDATE encoding_revision SET rev = rev + 1;
+            INSERT OR REPLACE INTO encoding_tombstones
+            SELECT OLD.id, rev FROM encoding_revision;
+        END
+    """)
+
+# Ordered (version, description, function). Append new migrations here and
+# never edit released ones; PRAGMA user_version records the last applied.
+MIGRATIONS = [
+    (1, 'base schema', _migration_base_schema),
+    (2, 'face encoding revisions', _migration_encoding_rev),
+    (3, 'access log indexes', _migration_access_log_indexes),
+    (4, 'behavior profiles', _migration_behavior_profiles),
+    (5, 'access rollups', _migration_access_rollups),
+    (6, 'encoding revision counter', _migration_encoding_rev_counter),
+    (7, 'encoding tombstones', _migration_encoding_tombstones),
+]
+
+def migrate(conn):
+    """Apply pending schema migrations in order, each in its own transaction"""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, description, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"Applying database migration {version}: {description}")
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            apply(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+    return current
+
+def configure_connection(conn, config):
+    """Apply per-connection performance pragmas"""
+    conn.execute(f"PRAGMA busy_timeout = {int(config.get('busy_timeout', 5000))}")
+    conn.execute(f"PRAGMA synchronous = {config.get('synchronous', 'NORMAL').upper()}")
+    conn.execute(f"PRAGMA cache_size = {-int(config.get('cache_size_kb', 8192))}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+# Report dimensions: GROUP BY expression and the key columns it selects
+ACCESS_LOG_GROUPS = {
+    'day': ("date(a.timestamp)", "date(a.timestamp) AS day"),
+    'user': ("a.user_id", "a.user_id, u.name AS user_name"),
+    'method': ("a.method", "a.method"),
+    'outcome': ("a.success, a.reason", "a.success, a.reason"),
+}
+
+# Rollup dimensions; user 0 and method '' read back as NULL
+ROLLUP_GROUPS = {
+    'day': ("date(r.period)", "date(r.period) AS day"),
+    'user': ("r.user_id", "NULLIF(r.user_id, 0) AS user_id, u.name AS user_name"),
+    'method': ("r.method", "NULLIF(r.method, '') AS method"),
+    'outcome': ("r.success", "r.success"),
+}
+
+def _access_log_range(start_date, end_date):
+    """WHERE clause and params for a half-open [start_date, end_date) range"""
+    where = "WHERE 1=1"
+    params = []
+    if start_date:
+        where += " AND a.timestamp >= ?"
+        params.append(start_date)
+    if end_date:
+        where += " AND a.timestamp < ?"
+        params.append(end_date)
+    return where, params
+
+ACCESS_LOG_INSERT = """
+    INSERT INTO access_log 
+    (user_id, timestamp, success, method, confidence, risk_score, anomaly_detected, reason)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+class AccessLogWriter:
+    """Background writer that batches access log inserts and drops entries when full"""
+    
+    def __init__(self, db_path, queue_size=1000, batch_size=50, flush_interval=1.0, config=None):
+        self.db_path = db_path
+        self.config = config or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_batch_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+        self._thread.start()
+    
+    def submit(self, row):
+        """Queue a row for writing; returns False if it was dropped"""
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"Access log queue full, {self.dropped} entries dropped")
+            return False
+    
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed"""
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def close(self, timeout=5.0):
+        """Flush remaining entries and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.error("Access log writer did not drain before shutdown")
+            return
+        self._thread.join(timeout)
+    
+    def get_stats(self):
+        """Queue and write counters"""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'last_batch_ms': self.last_batch_ms
+        }
+    
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        configure_connection(conn, self.config)
+        batch = []
+        markers = []
+        stopping = False
+        
+        while not stopping:
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not markers and not stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+            
+            if batch:
+                self._write(conn, batch)
+                batch = []
+            for marker in markers:
+                marker.set()
+            markers = []
+        
+        conn.close()
+    
+    def _write(self, conn, batch):
+        start = time.perf_counter()
+        try:
+            with conn:
+                conn.executemany(ACCESS_LOG_INSERT, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.dropped += len(batch)
+            logger.error(f"Failed to write {len(batch)} access log entries: {e}")
+        elapsed = time.perf_counter() - start
+        self.last_batch_ms = elapsed * 1000
+        metrics.observe('db_write', elapsed)
+
 class Database:
     """Handles database operations"""
     
-    def __init__(self, db_path='data/neurodoor.db'):
+    def __init__(self, db_path='data/neurodoor.db', config=None):
+        config = config or {}
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        
+        # WAL lets the dashboard read while the vision loop writes, and with
+        # synchronous=NORMAL commits no longer fsync on every transaction
+        journal_mode = config.get('journal_mode', 'wal').upper()
+        self.conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        configure_connection(self.conn, config)
         self._create_tables()
+        
+        self.log_writer = None
+        if config.get('async_writes', False) and db_path != ':memory:':
+            self.log_writer = AccessLogWriter(
+                db_path,
+                queue_size=config.get('write_queue_size', 1000),
+                batch_size=config.get('write_batch_size', 50),
+                flush_interval=config.get('write_flush_interval', 1.0),
+                config=config
+            )
         logger.info(f"Database initialized: {db_path}")
     
     def _create_tables(self):
-        """Create database tables"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                role TEXT NOT NULL,
-                face_encoding BLOB,
-                pin_hash TEXT,
-                active BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_access DATETIME
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS access_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                success BOOLEAN,
-                method TEXT,
-                confidence REAL,
-                photo_path TEXT,
-                risk_score REAL,
-                anomaly_detected BOOLEAN DEFAULT 0,
-                reason TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-        
-        self.conn.commit()
+        """Bring the schema up to date"""
+        migrate(self.conn)
     
     def get_user(self, user_id):
         """Get user by ID"""
@@ -60,6 +414,53 @@ class Database:
         result = cursor.fetchone()
         return dict(result) if result else None
     
+    def add_user(self, name, role, active=True):
+        """Create a user and return its ID"""
+        cursor = self.conn.cursor()
+        cursor.execute("INSERT INTO users (name, role, active) VALUES (?, ?, ?)",
+                       (name, role, active))
+        self.conn.commit()
+        return cursor.lastrowid
+    
+    def set_user_active(self, user_id, active):
+        """Enable or disable a user"""
+        self.conn.execute("UPDATE users SET active = ? WHERE id = ?", (active, user_id))
+        self.conn.commit()
+    
+    def save_face_encoding(self, user_id, blob):
+        """Store a serialized face encoding for a user"""
+        self.conn.execute("UPDATE users SET face_encoding = ? WHERE id = ?", (blob, user_id))
+        self.conn.commit()
+    
+    def get_face_encodings(self, since_rev=None):
+        """Column-oriented encodings; with ``since_rev`` only users changed or deleted since"""
+        cursor = self.conn.cursor()
+        # Plain tuples: no sqlite3.Row per user
+        cursor.row_factory = None
+        # Read the watermark first; anything changed meanwhile is simply
+        # picked up again on the next refresh
+        max_rev = cursor.execute("SELECT rev FROM encoding_revision").fetchone()[0]
+        
+        if since_rev is None:
+            cursor.execute("""
+                SELECT id, active, face_encoding FROM users
+                WHERE active = 1 AND face_encoding IS NOT NULL
+            """)
+        else:
+            cursor.execute("""
+                SELECT id, active, face_encoding FROM users
+                WHERE encoding_rev > ?
+                UNION ALL
+                SELECT user_id, 0, NULL FROM encoding_tombstones
+                WHERE encoding_rev > ?
+            """, (since_rev, since_rev))
+        user_ids, active, blobs = [], [], []
+        for user_id, is_active, blob in cursor:
+            user_ids.append(user_id)
+            active.append(is_active)
+            blobs.append(blob)
+        return user_ids, active, blobs, max_rev
+    
     def get_user_count(self):
         """Get total user count"""
         cursor = self.conn.cursor()
@@ -68,12 +469,7 @@ class Database:
     
     def log_access(self, log_entry):
         """Log access attempt"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO access_log 
-            (user_id, timestamp, success, method, confidence, risk_score, anomaly_detected, reason)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        row = (
             log_entry.get('user_id'),
             log_entry.get('timestamp', datetime.now()),
             log_entry.get('success'),
@@ -82,8 +478,28 @@ class Database:
             log_entry.get('risk_score'),
             log_entry.get('anomaly_detected', False),
             log_entry.get('reason', '')
-        ))
-        self.conn.commit()
+        )
+        
+        if self.log_writer:
+            self.log_writer.submit(row)
+            return
+        
+        with metrics.time('db_write'):
+            cursor = self.conn.cursor()
+            cursor.execute(ACCESS_LOG_INSERT, row)
+            self.conn.commit()
+    
+    def flush(self):
+        """Wait for queued access log entries to be written"""
+        if self.log_writer:
+            return self.log_writer.flush()
+        return True
+    
+    def get_write_stats(self):
+        """Access log writer statistics"""
+        if self.log_writer:
+            return self.log_writer.get_stats()
+        return {'queue_depth': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'last_batch_ms': 0.0}
     
     def get_recent_access(self, limit=10):
         """Get recent access log"""
@@ -96,6 +512,24 @@ class Database:
         """, (limit,))
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_last_access_id(self):
+        """Highest access log row id (0 if empty)"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) AS id FROM access_log")
+        return cursor.fetchone()['id']
+    
+    def get_access_since(self, last_id, limit=100):
+        """Access log rows with id above ``last_id``, oldest first"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT a.*, u.name as user_name
+            FROM access_log a
+            LEFT JOIN users u ON a.user_id = u.id
+            WHERE a.id > ?
+            ORDER BY a.id LIMIT ?
+        """, (last_id, limit))
+        return [dict(row) for row in cursor.fetchall()]
+    
     def get_user_access_history(self, user_id, days=30):
         """Get user access history"""
         cursor = self.conn.cursor()
@@ -131,8 +565,155 @@ class Database:
         cursor.execute(query, params)
         return [dict(row) for row in cursor.fetchall()]
     
+    def iter_access_log(self, start_date=None, end_date=None, batch_size=1000):
+        """Yield access log rows oldest first, ``batch_size`` at a time; ``end_date`` is exclusive"""
+        where, params = _access_log_range(start_date, end_date)
+        query = f"""
+            SELECT a.id, a.timestamp, a.user_id, u.name AS user_name, a.success,
+                   a.method, a.confidence, a.risk_score, a.anomaly_detected, a.reason
+            FROM access_log a
+            LEFT JOIN users u ON a.user_id = u.id
+            {where} {{after}}
+            ORDER BY a.timestamp, a.id LIMIT ?
+        """
+        last = None
+        while True:
+            if last is None:
+                cursor = self.conn.execute(query.format(after=""), params + [batch_size])
+            else:
+                cursor = self.conn.execute(query.format(after="AND (a.timestamp, a.id) > (?, ?)"),
+                                           params + list(last) + [batch_size])
+            rows = cursor.fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch_size:
+                return
+            last = (rows[-1]['timestamp'], rows[-1]['id'])
+    
+    def aggregate_access_log(self, group_by=None, start_date=None, end_date=None):
+        """Attempt, grant, denial and anomaly counts grouped in SQL by one of ``ACCESS_LOG_GROUPS``"""
+        where, params = _access_log_range(start_date, end_date)
+        keys, group = "", ""
+        if group_by:
+            expression, columns = ACCESS_LOG_GROUPS[group_by]
+            keys = columns + ","
+            group = f"GROUP BY {expression} ORDER BY {expression}"
+        cursor = self.conn.execute(f"""
+            SELECT {keys}
+                   COUNT(*) AS attempts,
+                   COALESCE(SUM(CASE WHEN a.success THEN 1 ELSE 0 END), 0) AS granted,
+                   COALESCE(SUM(CASE WHEN a.success THEN 0 ELSE 1 END), 0) AS denied,
+                   COALESCE(SUM(CASE WHEN a.anomaly_detected THEN 1 ELSE 0 END), 0) AS anomalies,
+                   AVG(a.confidence) AS avg_confidence,
+                   AVG(a.risk_score) AS avg_risk,
+                   MIN(a.timestamp) AS first_seen,
+                   MAX(a.timestamp) AS last_seen
+            FROM access_log a
+            LEFT JOIN users u ON a.user_id = u.id
+            {where} {group}
+        """, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def aggregate_access_rollups(self, group_by=None, start_date=None, end_date=None):
+        """Like ``aggregate_access_log`` but read from the rollup tables, so archived rows count"""
+        bounds = [d for d in (start_date, end_date) if d]
+        if all(d.hour == d.minute == d.second == d.microsecond == 0 for d in bounds):
+            table, fmt = 'daily', '%Y-%m-%d'
+        else:
+            table, fmt = 'hourly', '%Y-%m-%d %H:00:00'
+        where = "WHERE 1=1"
+        params = []
+        if start_date:
+            where += " AND r.period >= ?"
+            params.append(start_date.strftime(fmt))
+        if end_date:
+            where += " AND r.period < ?"
+            params.append(end_date.strftime(fmt))
+        keys, group = "", ""
+        if group_by:
+            expression, columns = ROLLUP_GROUPS[group_by]
+            keys = columns + ","
+            group = f"GROUP BY {expression} ORDER BY {expression}"
+        cursor = self.conn.execute(f"""
+            SELECT {keys}
+                   COALESCE(SUM(r.attempts), 0) AS attempts,
+                   COALESCE(SUM(CASE WHEN r.success THEN r.attempts ELSE 0 END), 0) AS granted,
+                   COALESCE(SUM(CASE WHEN r.success THEN 0 ELSE r.attempts END), 0) AS denied,
+                   COALESCE(SUM(r.anomalies), 0) AS anomalies,
+                   SUM(r.confidence_sum) / NULLIF(SUM(r.confidence_n), 0) AS avg_confidence,
+                   SUM(r.risk_sum) / NULLIF(SUM(r.risk_n), 0) AS avg_risk
+            FROM access_rollup_{table} r
+            LEFT JOIN users u ON r.user_id = u.id
+            {where} {group}
+        """, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def get_behavior_profiles(self):
+        """Load all persisted behavior profiles"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT user_id, hour_counts, dow_counts, recent, attempts FROM user_profiles")
+        return [{
+            'user_id': row['user_id'],
+            'hour_counts': json.loads(row['hour_counts']),
+            'dow_counts': json.loads(row['dow_counts']),
+            'recent': json.loads(row['recent']),
+            'attempts': row['attempts']
+        } for row in cursor.fetchall()]
+    
+    def save_behavior_profiles(self, profiles):
+        """Upsert behavior profiles in one transaction"""
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO user_profiles (user_id, hour_counts, dow_counts, recent, attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    hour_counts = excluded.hour_counts,
+                    dow_counts = excluded.dow_counts,
+                    recent = excluded.recent,
+                    attempts = excluded.attempts,
+                    updated_at = excluded.updated_at
+            """, [(p['user_id'], json.dumps(p['hour_counts']), json.dumps(p['dow_counts']),
+                   json.dumps(p['recent']), p['attempts']) for p in profiles])
+    
+    def build_behavior_profiles(self):
+        """Aggregate initial behavior profiles from the hourly rollup"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT user_id,
+                   CAST(strftime('%H', period) AS INTEGER) AS hour,
+                   CAST(strftime('%w', period) AS INTEGER) AS dow,
+                   SUM(CASE WHEN success THEN attempts ELSE 0 END) AS successes,
+                   SUM(attempts) AS attempts
+            FROM access_rollup_hourly
+            WHERE user_id != 0
+            GROUP BY user_id, hour, dow
+        """)
+        
+        profiles = {}
+        for row in cursor.fetchall():
+            profile = profiles.setdefault(row['user_id'], {
+                'user_id': row['user_id'],
+                'hour_counts': [0] * 24,
+                'dow_counts': [0] * 7,
+                'recent': [],
+                'attempts': 0
+            })
+            profile['hour_counts'][row['hour']] += row['successes']
+            # SQLite counts weekdays from Sunday, Python from Monday
+            profile['dow_counts'][(row['dow'] + 6) % 7] += row['successes']
+            profile['attempts'] += row['attempts']
+        return list(profiles.values())
+    
     def close(self):
         """Close database connection"""
+        if self.log_writer:
+            self.log_writer.close()
+            self.log_writer = None
         if self.conn:
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
             self.conn.close()
+            self.conn = None
             logger.info("Database closed")
@@ -0,0 +1,86 @@
+"""In-process Event Bus"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class EventBus:
+    """Fans events out to listeners and bounded streaming subscribers"""
+    
+    def __init__(self, history=100, queue_size=100):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._history = deque(maxlen=history)
+        self._listeners = []
+        self._subscribers = set()
+        self._lock = threading.Lock()
+    
+    def listen(self, callback):
+        """Call ``callback(event)`` for every published event"""
+        self._listeners.append(callback)
+    
+    def publish(self, event_type, data):
+        """Publish an event and return it"""
+        with self._lock:
+            self.published += 1
+            event = {
+                'id': self.published,
+                'type': event_type,
+                'time': time.time(),
+                'data': data
+            }
+            event['message'] = (f"id: {event['id']}\nevent: {event_type}\n"
+                                f"data: {json.dumps(data, default=str)}\n\n")
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Event listener failed: {e}")
+        
+        for q in subscribers:
+            self._offer(q, event)
+        return event
+    
+    def _offer(self, q, event):
+        try:
+            q.put_nowait(event)
+        except queue.Full:
+            try:
+                q.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+    
+    def subscribe(self, last_id=None):
+        """Return a queue receiving new events (and missed ones after ``last_id``)"""
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if last_id is not None:
+                for event in self._history:
+                    if event['id'] > last_id:
+                        self._offer(q, event)
+            self._subscribers.add(q)
+        return q
+    
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+    
+    def get_stats(self):
+        return {
+            'published': self.published,
+            'subscribers': len(self._subscribers),
+            'dropped': self.dropped
+        }
@@ -2,54 +2,139 @@
 import face_recognition
 import numpy as np
 import logging
+import time
 from pathlib import Path
 
+from src.gallery import FaceGallery, distance_to_confidence, encode_blob, decode_blobs
+from src.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 class FaceRecognitionEngine:
     """Face recognition using face_recognition library"""
     
-    def __init__(self, config):
+    def __init__(self, config, database=None):
         self.config = config
         self.threshold = config.get('threshold', 0.6)
-        self.encodings_db = {}
+        self.top_k = config.get('top_k', 3)
+        self.refresh_interval = config.get('refresh_interval', 10)
+        self.database = database
+        self.gallery = FaceGallery()
+        self.encoding_watermark = 0
+        self._last_refresh = time.monotonic()
         self.load_encodings()
     
     def load_encodings(self):
-        """Load face encodings from database"""
-        # In real implementation, load from database
-        logger.info("Face encodings loaded")
+        """Load all active face encodings from database"""
+        if self.database is None:
+            logger.info("No database configured, face gallery is empty")
+            return
+        
+        user_ids, _, blobs, max_rev = self.database.get_face_encodings()
+        encodings, valid = decode_blobs(blobs, self.gallery.dim)
+        if not valid.all():
+            logger.warning(f"Skipped {int((~valid).sum())} unreadable face encodings")
+        
+        self.gallery.load([uid for uid, ok in zip(user_ids, valid) if ok], encodings)
+        self.encoding_watermark = max_rev
+        self._last_refresh = time.monotonic()
+        logger.info(f"Face encodings loaded: {len(self.gallery)} users")
+    
+    def refresh_encodings(self):
+        """Reload only users changed since the last load or refresh"""
+        if self.database is None:
+            return 0
+        
+        user_ids, active, blobs, max_rev = self.database.get_face_encodings(
+            since_rev=self.encoding_watermark)
+        self._last_refresh = time.monotonic()
+        if not user_ids:
+            self.encoding_watermark = max_rev
+            return 0
+        
+        keep = [bool(a) for a in active]
+        encodings, valid = decode_blobs([b if k else None for b, k in zip(blobs, keep)],
+                                        self.gallery.dim)
+        self.gallery.update(user_ids,
+                            [uid for uid, ok in zip(user_ids, valid) if ok],
+                            encodings)
+        self.encoding_watermark = max_rev
+        logger.info(f"Face gallery refreshed: {len(user_ids)} users changed")
+        return len(user_ids)
+    
+    def maybe_refresh(self):
+        """Refresh the gallery if the refresh interval has elapsed"""
+        if self.refresh_interval and time.monotonic() - self._last_refresh >= self.refresh_interval:
+            try:
+                return self.refresh_encodings()
+            except Exception as e:
+                logger.error(f"Encoding refresh failed: {e}")
+        return 0
     
     def recognize_face(self, frame, face_location):
         """Recognize face in frame"""
+        return self.recognize_faces(frame, [face_location])[0]
+    
+    def recognize_faces(self, frame, face_locations):
+        """Encode several faces in one call and match them in one operation; one result each"""
+        if not face_locations:
+            return []
+        
         try:
-            face_box = [face_location['y'], face_location['x'] + face_location['w'],
-                       face_location['y'] + face_location['h'], face_location['x']]
+            frame = np.ascontiguousarray(frame)
+            face_boxes = [[f['y'], f['x'] + f['w'], f['y'] + f['h'], f['x']]
+                          for f in face_locations]
             
-            face_encoding = face_recognition.face_encodings(frame, [face_box])
+            with metrics.time('encode'):
+                face_encodings = face_recognition.face_encodings(frame, face_boxes)
             
-            if not face_encoding:
-                return {'user_id': None, 'confidence': 0.0}
+            if len(face_encodings) != len(face_boxes):
+                return [{'user_id': None, 'confidence': 0.0} for _ in face_boxes]
             
-            # Compare with database (simulated for now)
-            # In real implementation, compare with stored encodings
-            
-            return {
-                'user_id': 1,  # Simulated
-                'confidence': 0.85,  # Simulated
-                'face_encoding': face_encoding[0]
-            }
+            return self.match_encodings(face_encodings)
         
         except Exception as e:
             logger.error(f"Recognition error: {e}")
-            return {'user_id': None, 'confidence': 0.0}
+            return [{'user_id': None, 'confidence': 0.0} for _ in face_locations]
+    
+    def match_encoding(self, face_encoding):
+        """Match an encoding against the whole gallery"""
+        return self.match_encodings([face_encoding])[0]
+    
+    def match_encodings(self, face_encodings):
+        """Match several encodings against the gallery in one operation"""
+        with metrics.time('match'):
+            candidates = self.gallery.match_batch(np.asarray(face_encodings), top_k=self.top_k)
+        results = []
+        for face_encoding, matches in zip(face_encodings, candidates):
+            result = {
+                'user_id': None,
+                'confidence': 0.0,
+                'face_encoding': face_encoding,
+                'candidates': matches
+            }
+            
+            if matches:
+                user_id, distance = matches[0]
+                result['confidence'] = distance_to_confidence(distance, self.threshold)
+                if distance <= self.threshold:
+                    result['user_id'] = user_id
+            
+            results.append(result)
+        return results
+    
+    def save_encoding(self, user_id, face_encoding):
+        """Store an encoding for a user and add it to the gallery"""
+        if self.database is not None:
+            self.database.save_face_encoding(user_id, encode_blob(face_encoding))
+        self.gallery.update([user_id], [user_id], face_encoding)
     
     def enroll_face(self, frame, user_id):
         """Enroll new face"""
         try:
             face_encodings = face_recognition.face_encodings(frame)
             if face_encodings:
-                self.encodings_db[user_id] = face_encodings[0]
+                self.save_encoding(user_id, face_encodings[0])
                 return True
         except Exception as e:
             logger.error(f"Enrollment error: {e}")
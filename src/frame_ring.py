@@ -0,0 +1,87 @@
+"""Shared-Memory Frame Ring"""
+import logging
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+class SharedFrameRing:
+    """Reference-counted pool of frame slots in shared memory"""
+    
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=slots * frame_bytes)
+        self.frames = np.ndarray((slots,) + self.shape, self.dtype, buffer=self.shm.buf)
+        self._refcounts = [0] * slots
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+        self.exhausted = 0
+    
+    @property
+    def spec(self):
+        """Picklable description used by workers to attach"""
+        return (self.shm.name, self.slots, self.shape, self.dtype.str)
+    
+    def acquire(self):
+        """Take a free slot with one reference, or None if all are in use"""
+        with self._lock:
+            if not self._free:
+                self.exhausted += 1
+                return None
+            slot = self._free.pop()
+            self._refcounts[slot] = 1
+            return slot
+    
+    def retain(self, slot):
+        """Add a reference to a slot"""
+        with self._lock:
+            self._refcounts[slot] += 1
+    
+    def release(self, slot):
+        """Drop a reference; the slot is reusable once none remain"""
+        with self._lock:
+            self._refcounts[slot] -= 1
+            if self._refcounts[slot] == 0:
+                self._free.append(slot)
+            elif self._refcounts[slot] < 0:
+                self._refcounts[slot] = 0
+                logger.error(f"Frame slot {slot} released too many times")
+    
+    def view(self, slot):
+        """Writable NumPy view of a slot (no copy)"""
+        return self.frames[slot]
+    
+    def in_use(self):
+        """Number of slots currently held"""
+        return self.slots - len(self._free)
+    
+    def close(self):
+        """Free the shared memory block"""
+        self.frames = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+_attached = {}
+
+def attach_view(spec, slot):
+    """Return a view of ``slot`` from a ring created in another process"""
+    name, slots, shape, dtype = spec
+    attached = _attached.get(name)
+    if attached is None:
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching also registers the block, but pool
+            # workers share the owner's resource tracker so this is harmless
+            shm = shared_memory.SharedMemory(name=name)
+        frames = np.ndarray((slots,) + tuple(shape), np.dtype(dtype), buffer=shm.buf)
+        # Keep the mapping open for the life of the worker
+        attached = _attached[name] = (shm, frames)
+    return attached[1][slot]
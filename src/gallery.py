@@ -0,0 +1,160 @@
+"""In-memory Face Gallery Matcher"""
+import logging
+import struct
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODING_DIM = 128
+
+# Stored encoding blob: magic, format version, dimension, then raw float32 (LE)
+BLOB_MAGIC = b'NDFE'
+BLOB_VERSION = 1
+BLOB_HEADER = struct.Struct('<4sHH')
+
+
+def distance_to_confidence(distance, threshold):
+    """Map a match distance to a 0-1 confidence; 0.5 at the match threshold"""
+    return min(1.0, max(0.0, 1.0 - 0.5 * distance / threshold))
+
+
+def encode_blob(encoding):
+    """Serialize an encoding to a versioned float32 blob"""
+    encoding = np.asarray(encoding, dtype='<f4').reshape(-1)
+    return BLOB_HEADER.pack(BLOB_MAGIC, BLOB_VERSION, encoding.shape[0]) + encoding.tobytes()
+
+
+def decode_blobs(blobs, dim=ENCODING_DIM):
+    """Decode many blobs into an (n, dim) float32 matrix and a validity mask"""
+    row_size = BLOB_HEADER.size + 4 * dim
+    lengths = np.fromiter((len(b) if b is not None else 0 for b in blobs),
+                          dtype=np.int64, count=len(blobs))
+    valid = lengths == row_size
+    good = [b for b, ok in zip(blobs, valid) if ok] if not valid.all() else blobs
+    
+    if not good:
+        return np.empty((0, dim), dtype=np.float32), valid
+    
+    raw = np.frombuffer(b''.join(good), dtype=np.uint8).reshape(len(good), row_size)
+    header = np.frombuffer(BLOB_HEADER.pack(BLOB_MAGIC, BLOB_VERSION, dim), dtype=np.uint8)
+    header_ok = (raw[:, :BLOB_HEADER.size] == header).all(axis=1)
+    if not header_ok.all():
+        valid[np.flatnonzero(valid)[~header_ok]] = False
+        raw = raw[header_ok]
+    
+    encodings = raw[:, BLOB_HEADER.size:].copy().view('<f4').astype(np.float32, copy=False)
+    return encodings, valid
+
+
+class FaceGallery:
+    """Enrolled face encodings in one float32 matrix, matched with a single product"""
+    
+    def __init__(self, dim=ENCODING_DIM):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._set_arrays(np.empty((0, dim), dtype=np.float32),
+                         np.empty(0, dtype=np.int64))
+    
+    def _set_arrays(self, encodings, user_ids):
+        """Swap in a new gallery snapshot"""
+        encodings = np.ascontiguousarray(encodings, dtype=np.float32)
+        norms = np.einsum('ij,ij->i', encodings, encodings)
+        self._snapshot = (encodings, np.ascontiguousarray(user_ids, dtype=np.int64), norms)
+    
+    def __len__(self):
+        return self._snapshot[0].shape[0]
+    
+    @property
+    def encodings(self):
+        return self._snapshot[0]
+    
+    @property
+    def user_ids(self):
+        return self._snapshot[1]
+    
+    def load(self, user_ids, encodings):
+        """Replace the whole gallery"""
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        user_ids = np.asarray(user_ids, dtype=np.int64).reshape(-1)
+        if encodings.shape[0] != user_ids.shape[0]:
+            raise ValueError("user_ids and encodings must have the same length")
+        with self._lock:
+            self._set_arrays(encodings, user_ids)
+        logger.info(f"Face gallery loaded: {len(user_ids)} encodings")
+    
+    def add(self, user_id, encoding):
+        """Add one encoding for a user"""
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(1, self.dim)
+        with self._lock:
+            encodings, user_ids, _ = self._snapshot
+            self._set_arrays(np.vstack([encodings, encoding]),
+                             np.append(user_ids, user_id))
+    
+    def update(self, remove_ids, user_ids, encodings):
+        """Drop ``remove_ids`` and append new rows in a single swap"""
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        user_ids = np.asarray(user_ids, dtype=np.int64).reshape(-1)
+        with self._lock:
+            current, ids, _ = self._snapshot
+            keep = ~np.isin(ids, np.asarray(remove_ids, dtype=np.int64))
+            self._set_arrays(np.vstack([current[keep], encodings]),
+                             np.concatenate([ids[keep], user_ids]))
+    
+    def remove(self, user_ids):
+        """Remove all encodings belonging to the given user id(s)"""
+        with self._lock:
+            encodings, ids, _ = self._snapshot
+            keep = ~np.isin(ids, np.atleast_1d(np.asarray(user_ids, dtype=np.int64)))
+            if not keep.all():
+                self._set_arrays(encodings[keep], ids[keep])
+    
+    def distances(self, probe):
+        """Euclidean distance from a probe to every gallery row"""
+        return self._distances(self._snapshot, np.asarray(probe).reshape(1, -1))[0]
+    
+    def _distances(self, snapshot, probes):
+        """(m, n) distances from m probes to all n rows in one matrix product"""
+        encodings, _, norms = snapshot
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.dim)
+        sq = norms[None, :] - 2.0 * (probes @ encodings.T) + np.einsum('ij,ij->i', probes, probes)[:, None]
+        return np.sqrt(np.maximum(sq, 0.0))
+    
+    def match(self, probe, top_k=1, threshold=None):
+        """Return up to ``top_k`` (user_id, distance) pairs, closest first, one per user"""
+        return self.match_batch(np.asarray(probe).reshape(1, -1), top_k, threshold)[0]
+    
+    def match_batch(self, probes, top_k=1, threshold=None):
+        """Match several probes at once; returns one ``match`` result per probe"""
+        snapshot = self._snapshot
+        encodings, user_ids, _ = snapshot
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.dim)
+        if encodings.shape[0] == 0 or probes.shape[0] == 0:
+            return [[] for _ in range(probes.shape[0])]
+        
+        dist = self._distances(snapshot, probes)
+        n = dist.shape[1]
+        if top_k < n:
+            idx = np.argpartition(dist, top_k - 1, axis=1)[:, :top_k]
+        else:
+            idx = np.broadcast_to(np.arange(n), dist.shape)
+        top = np.take_along_axis(dist, idx, axis=1)
+        order = np.argsort(top, axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        
+        results = []
+        for row_idx, row_dist in zip(idx, top):
+            matches = []
+            seen = set()
+            for i, d in zip(row_idx, row_dist):
+                d = float(d)
+                if threshold is not None and d > threshold:
+                    break
+                uid = int(user_ids[i])
+                if uid in seen:
+                    continue
+                seen.add(uid)
+                matches.append((uid, d))
+            results.append(matches)
+        return results
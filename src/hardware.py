@@ -1,5 +1,6 @@
 """Hardware Control Module"""
 import logging
+import threading
 import time
 
 logger = logging.getLogger(__name__)
@@ -14,10 +15,13 @@ except ImportError:
 class DoorLock:
     """Door lock controller"""
     
-    def __init__(self, pin=17):
+    def __init__(self, pin=17, simulate=False):
         self.pin = pin
-        self.simulation_mode = not HAS_GPIO
+        self.simulation_mode = simulate or not HAS_GPIO
         self.locked = True
+        self.relock_at = None
+        self._timer = None
+        self._lock = threading.RLock()
         
         if not self.simulation_mode:
             GPIO.setmode(GPIO.BCM)
@@ -28,33 +32,82 @@ class DoorLock:
             logger.info("Door lock in simulation mode")
     
     def unlock(self, duration=5):
-        """Unlock door for specified duration"""
-        logger.info(f"Unlocking door for {duration}s")
-        
-        if not self.simulation_mode:
-            GPIO.output(self.pin, GPIO.HIGH)
-        
-        self.locked = False
-        
-        if duration > 0:
-            time.sleep(duration)
-            self.lock()
+        """Unlock door for specified duration without blocking (0 holds it open)"""
+        with self._lock:
+            held_open = not self.locked and self.relock_at is None
+            
+            if duration > 0:
+                deadline = time.monotonic() + duration
+                if held_open or (self.relock_at is not None and deadline <= self.relock_at):
+                    return
+                logger.info(f"Unlocking door for {duration}s")
+                self._schedule_relock(deadline, duration)
+            else:
+                logger.info("Unlocking door until manually locked")
+                self._cancel_relock()
+            
+            if self.locked and not self.simulation_mode:
+                GPIO.output(self.pin, GPIO.HIGH)
+            
+            self.locked = False
+    
+    def _schedule_relock(self, deadline, delay):
+        """(Re)arm the relock timer"""
+        self._cancel_relock()
+        self.relock_at = deadline
+        # Not a daemon: a short-lived CLI process still relocks before exit
+        self._timer = threading.Timer(delay, self._relock, args=(deadline,))
+        self._timer.start()
+    
+    def _cancel_relock(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.relock_at = None
+    
+    def _relock(self, deadline):
+        with self._lock:
+            # Ignore timers superseded by a later unlock or a manual lock
+            if self.relock_at == deadline:
+                self._timer = None
+                self.lock()
     
     def lock(self):
         """Lock door"""
-        logger.info("Locking door")
-        
-        if not self.simulation_mode:
-            GPIO.output(self.pin, GPIO.LOW)
-        
-        self.locked = True
+        with self._lock:
+            logger.info("Locking door")
+            self._cancel_relock()
+            
+            if not self.simulation_mode:
+                GPIO.output(self.pin, GPIO.LOW)
+            
+            self.locked = True
     
     def is_locked(self):
         """Check if door is locked"""
         return self.locked
     
+    def get_state(self):
+        """Current lock state"""
+        with self._lock:
+            relock_in = None
+            if self.relock_at is not None:
+                relock_in = max(0.0, self.relock_at - time.monotonic())
+            return {
+                'locked': self.locked,
+                'held_open': not self.locked and self.relock_at is None,
+                'relock_in': relock_in
+            }
+    
+    def release(self):
+        """Relock immediately if a timed unlock is pending"""
+        with self._lock:
+            if self.relock_at is not None:
+                self.lock()
+    
     def test(self):
         """Test door lock"""
         logger.info("Testing door lock...")
         self.unlock(duration=2)
+        time.sleep(2)
         logger.info("Door lock test complete")
@@ -0,0 +1,233 @@
+"""Runtime Metrics"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond checks to slow encodes
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FACE_BUCKETS = (0, 1, 2, 3, 5, 8)
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect and a locked add"""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+    
+    def snapshot(self):
+        with self._lock:
+            return {'buckets': list(self.buckets), 'counts': list(self.counts),
+                    'sum': self.sum, 'count': self.count}
+
+def quantile(snapshot, q):
+    """Estimate a quantile from a histogram snapshot by linear interpolation"""
+    total = snapshot['count']
+    if not total:
+        return 0.0
+    rank = q * total
+    seen = 0
+    lower = 0.0
+    for upper, count in zip(snapshot['buckets'], snapshot['counts']):
+        if count and seen + count >= rank:
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+        lower = upper
+    # Beyond the last bucket
+    return snapshot['buckets'][-1]
+
+class StageTimer:
+    """Context manager that records elapsed time for one stage"""
+    
+    __slots__ = ('metrics', 'stage', 'start')
+    
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """Per-stage latency histograms, counters and gauges"""
+    
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.export_path = None
+        self.export_interval = 10
+        self.stages = {}
+        self.faces_per_frame = Histogram(FACE_BUCKETS)
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._last_export = time.monotonic()
+    
+    def configure(self, config):
+        """Apply the ``metrics`` config section"""
+        self.enabled = config.get('enabled', True)
+        self.export_path = config.get('export_path')
+        self.export_interval = config.get('export_interval', 10)
+    
+    def observe(self, stage, seconds):
+        """Record one timing for a stage"""
+        if not self.enabled:
+            return
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+    
+    def time(self, stage):
+        """``with metrics.time('detect'):`` times the block"""
+        return StageTimer(self, stage)
+    
+    def inc(self, name, value=1):
+        """Increase a counter"""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+    
+    def observe_faces(self, count):
+        """Record the number of faces found in a frame"""
+        if self.enabled:
+            self.faces_per_frame.observe(count)
+    
+    def gauge(self, name, fn):
+        """Register a callable read at snapshot time"""
+        self.gauges[name] = fn
+    
+    def reset(self):
+        """Drop all recorded values (gauges stay registered)"""
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+        self.faces_per_frame = Histogram(FACE_BUCKETS)
+        self.started = time.time()
+    
+    def snapshot(self):
+        """All current values as a JSON-serializable dict"""
+        gauges = {}
+        for name, fn in list(self.gauges.items()):
+            try:
+                gauges[name] = float(fn())
+            except Exception as e:
+                logger.debug(f"Gauge {name} unavailable: {e}")
+        return {
+            'timestamp': time.time(),
+            'started': self.started,
+            'stages': {name: h.snapshot() for name, h in list(self.stages.items())},
+            'faces_per_frame': self.faces_per_frame.snapshot(),
+            'counters': dict(self.counters),
+            'gauges': gauges
+        }
+    
+    def maybe_export(self, force=False):
+        """Write a snapshot to ``export_path`` every ``export_interval`` seconds"""
+        if not self.export_path:
+            return
+        if not force and time.monotonic() - self._last_export < self.export_interval:
+            return
+        self._last_export = time.monotonic()
+        try:
+            export_snapshot(self.snapshot(), self.export_path)
+        except OSError as e:
+            logger.error(f"Failed to export metrics: {e}")
+
+def export_snapshot(snapshot, path):
+    """Atomically write a snapshot as JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+def load_snapshot(path):
+    """Read an exported snapshot, or None if there is none"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _format_le(bound):
+    return f"{bound:g}"
+
+def _histogram_lines(name, labels, snapshot):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(snapshot['buckets'], snapshot['counts']):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}le="{_format_le(bound)}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {snapshot["count"]}')
+    suffix = f'{{{labels.rstrip(",")}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {snapshot["sum"]:.6f}')
+    lines.append(f'{name}_count{suffix} {snapshot["count"]}')
+    return lines
+
+def render_prometheus(snapshot, prefix='neurodoor'):
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines = [
+        f'# HELP {prefix}_stage_seconds Time spent in each processing stage',
+        f'# TYPE {prefix}_stage_seconds histogram'
+    ]
+    for stage, histogram in sorted(snapshot['stages'].items()):
+        lines.extend(_histogram_lines(f'{prefix}_stage_seconds', f'stage="{stage}",', histogram))
+    
+    lines.append(f'# HELP {prefix}_faces_per_frame Faces detected per processed frame')
+    lines.append(f'# TYPE {prefix}_faces_per_frame histogram')
+    lines.extend(_histogram_lines(f'{prefix}_faces_per_frame', '', snapshot['faces_per_frame']))
+    
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f'# TYPE {prefix}_{name}_total counter')
+        lines.append(f'{prefix}_{name}_total {value}')
+    
+    for name, value in sorted(snapshot['gauges'].items()):
+        lines.append(f'# TYPE {prefix}_{name} gauge')
+        lines.append(f'{prefix}_{name} {value:g}')
+    
+    lines.append(f'# TYPE {prefix}_start_time_seconds gauge')
+    lines.append(f'{prefix}_start_time_seconds {snapshot["started"]:.3f}')
+    return '\n'.join(lines) + '\n'
+
+def format_stats(snapshot):
+    """Human-readable table of a snapshot for the CLI"""
+    lines = [f"{'stage':<14} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for stage, h in sorted(snapshot['stages'].items()):
+        mean = 1000 * h['sum'] / h['count'] if h['count'] else 0.0
+        lines.append(f"{stage:<14} {h['count']:>8} {mean:9.2f} {1000 * quantile(h, 0.5):9.2f} "
+                     f"{1000 * quantile(h, 0.95):9.2f} {1000 * quantile(h, 0.99):9.2f}")
+    
+    faces = snapshot['faces_per_frame']
+    if faces['count']:
+        lines.append(f"\nFaces per frame: {faces['sum'] / faces['count']:.2f} avg over {faces['count']} frames")
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f"{name}: {value}")
+    for name, value in sorted(snapshot['gauges'].items()):
+        lines.append(f"{name}: {value:g}")
+    return '\n'.join(lines)
+
+# Process-wide registry, like the module loggers
+metrics = Metrics()
@@ -0,0 +1,71 @@
+"""Motion Detection Module"""
+import cv2
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class MotionDetector:
+    """Cheap background-difference motion gate run before face detection"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.downscale_width = config.get('downscale_width', 160)
+        self.pixel_threshold = config.get('pixel_threshold', 25)
+        self.sensitivity = config.get('sensitivity', 0.01)
+        self.learning_rate = config.get('learning_rate', 0.05)
+        self.hold_time = config.get('hold_time', 2.0)
+        self._background = None
+        self._last_motion = None
+        self.active = False
+        self.frames_checked = 0
+        self.frames_with_motion = 0
+    
+    def _prepare(self, frame):
+        """Downscale, grayscale and blur a frame"""
+        h, w = frame.shape[:2]
+        scale = self.downscale_width / float(w)
+        small = cv2.resize(frame, (self.downscale_width, max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+    
+    def detect(self, frame, now=None):
+        """Return True if the scene is moving or moved recently"""
+        self.active = self._detect(frame, now)
+        return self.active
+    
+    def _detect(self, frame, now):
+        if not self.enabled:
+            return True
+        if frame is None:
+            return False
+        
+        now = time.monotonic() if now is None else now
+        gray = self._prepare(frame)
+        self.frames_checked += 1
+        
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype('float32')
+            self._last_motion = now
+            self.frames_with_motion += 1
+            return True
+        
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255,
+                                                 cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        
+        if changed >= self.sensitivity * gray.size:
+            self._last_motion = now
+            self.frames_with_motion += 1
+            return True
+        
+        return self._last_motion is not None and now - self._last_motion < self.hold_time
+    
+    def reset(self):
+        """Forget the background model"""
+        self._background = None
+        self._last_motion = None
@@ -0,0 +1,332 @@
+"""Pipelined Recognition Mode"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as EncodeTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from src.frame_ring import SharedFrameRing, attach_view
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    """Load the dlib models once per worker process"""
+    import face_recognition  # noqa: F401
+
+def encode_faces(frame, boxes):
+    """Encode face boxes (top, right, bottom, left) in a worker process"""
+    import face_recognition
+    return face_recognition.face_encodings(frame, boxes)
+
+def encode_faces_shared(ring_spec, slot, boxes):
+    """Encode faces from a shared-memory frame slot without copying it"""
+    return encode_faces(attach_view(ring_spec, slot), boxes)
+
+class FrameRef:
+    """A frame moving through the pipeline, optionally backed by a ring slot"""
+    
+    __slots__ = ('frame', 'slot')
+    
+    def __init__(self, frame, slot=None):
+        self.frame = frame
+        self.slot = slot
+
+class StageStats:
+    """Latency and throughput counters for one pipeline stage"""
+    
+    def __init__(self):
+        self.count = 0
+        self.dropped = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.started = time.monotonic()
+    
+    def record(self, seconds):
+        self.count += 1
+        self.total_time += seconds
+        self.max_time = max(self.max_time, seconds)
+    
+    def get_stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'count': self.count,
+            'dropped': self.dropped,
+            'avg_ms': 1000 * self.total_time / self.count if self.count else 0.0,
+            'max_ms': 1000 * self.max_time,
+            'per_second': self.count / elapsed
+        }
+
+class RecognitionPipeline:
+    """Runs capture, detection, encoding and decisions as bounded, concurrent stages"""
+    
+    def __init__(self, neurodoor, config):
+        self.neurodoor = neurodoor
+        self.config = config
+        self.workers = config.get('workers', max(1, (os.cpu_count() or 2) - 1))
+        self.drop_policy = config.get('drop_policy', 'drop_oldest')
+        self.max_in_flight = config.get('max_in_flight', self.workers * 2)
+        self.start_method = config.get('start_method', 'forkserver')
+        self.result_timeout = config.get('result_timeout', 10.0)
+        self.frames = queue.Queue(maxsize=config.get('queue_size', 2))
+        self.jobs = queue.Queue(maxsize=self.max_in_flight)
+        self.stats = {name: StageStats() for name in ['capture', 'detect', 'encode', 'decide']}
+        self._threads = []
+        self.executor = None
+        self.pool_broken = False
+        self.ring = None
+        if config.get('shared_memory', True):
+            camera = neurodoor.camera
+            # Enough slots for every queued frame and job plus one per stage
+            slots = self.frames.maxsize + self.max_in_flight + 2
+            self.ring = SharedFrameRing(slots, (camera.height, camera.width, 3))
+    
+    def run(self):
+        """Run until the NeuroDoor instance stops"""
+        nd = self.neurodoor
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker)
+        logger.info(f"Pipelined recognition started with {self.workers} encoder processes")
+        
+        for name, target in [('capture', self._capture_stage), ('detect', self._detect_stage)]:
+            thread = threading.Thread(target=target, name=f'pipeline-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        
+        try:
+            self._decide_stage()
+        finally:
+            nd.running = False
+            for thread in self._threads:
+                thread.join(timeout=2)
+            # Jobs queued by detection while the decide stage was exiting
+            self._drain()
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            if self.ring:
+                self.ring.close()
+    
+    def _release(self, ref):
+        """Give a frame's ring slot back"""
+        if ref.slot is not None:
+            self.ring.release(ref.slot)
+    
+    def _put(self, q, item, stats):
+        """Enqueue applying the drop policy; returns False if dropped"""
+        if self.drop_policy == 'block':
+            while self.neurodoor.running:
+                try:
+                    q.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            self._release(item)
+            return False
+        
+        try:
+            q.put_nowait(item)
+            return True
+        except queue.Full:
+            try:
+                self._release(q.get_nowait())
+                stats.dropped += 1
+                metrics.inc('frames_dropped')
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(item)
+                return True
+            except queue.Full:
+                self._release(item)
+                stats.dropped += 1
+                metrics.inc('frames_dropped')
+                return False
+    
+    def _capture_stage(self):
+        nd = self.neurodoor
+        stats = self.stats['capture']
+        failures = 0
+        while nd.running:
+            # Capture is paced by the adaptive scheduler; the detect stage
+            # reports activity
+            nd.scheduler.begin()
+            try:
+                start = time.perf_counter()
+                with metrics.time('capture'):
+                    ref = self._capture()
+                if ref is None:
+                    if nd.dry_run and not nd.camera.is_active():
+                        nd.stop()
+                        break
+                    failures = nd.handle_capture_failure(failures + 1)
+                    nd.scheduler.wait_after_error()
+                    continue
+                failures = 0
+                stats.record(time.perf_counter() - start)
+                self._put(self.frames, ref, stats)
+                nd.scheduler.wait()
+            except Exception as e:
+                logger.error(f"Capture stage error: {e}", exc_info=True)
+                nd.scheduler.wait_after_error()
+    
+    def _capture(self):
+        """Capture into a free ring slot when possible"""
+        camera = self.neurodoor.camera
+        slot = self.ring.acquire() if self.ring else None
+        if slot is None:
+            if self.ring:
+                self.stats['capture'].dropped += 1
+            frame = camera.capture_frame()
+            return FrameRef(frame) if frame is not None else None
+        
+        view = self.ring.view(slot)
+        frame = camera.capture_frame(out=view)
+        if frame is view:
+            return FrameRef(view, slot)
+        
+        # Capture failed or the frame did not fit the slot
+        self.ring.release(slot)
+        return FrameRef(frame) if frame is not None else None
+    
+    def _detect_stage(self):
+        nd = self.neurodoor
+        stats = self.stats['detect']
+        while nd.running:
+            try:
+                ref = self.frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            try:
+                start = time.perf_counter()
+                now = nd.clock.monotonic()
+                faces = nd.detect(ref.frame, now)
+                metrics.inc('frames_processed')
+                metrics.observe_faces(len(faces))
+                tracked = nd.tracker.update(faces, now)
+                due = nd.select_for_recognition(ref.frame, tracked, now)
+                if nd.preview.viewers:
+                    nd.preview.offer(ref.frame, tracked)
+                nd.scheduler.report(nd.is_scene_active(faces))
+                stats.record(time.perf_counter() - start)
+                
+                if not due:
+                    continue
+                
+                # Hold back rather than queue unbounded encoding work
+                if self.jobs.full() and self.drop_policy != 'block':
+                    self.stats['encode'].dropped += 1
+                    metrics.inc('encode_jobs_dropped')
+                    continue
+                
+                boxes = [(f['y'], f['x'] + f['w'], f['y'] + f['h'], f['x']) for _, f in due]
+                if ref.slot is not None:
+                    # The encode job holds its own reference to the slot
+                    self.ring.retain(ref.slot)
+                future = self._submit(ref, boxes)
+                for track, _ in due:
+                    track.pending = True
+                job = ([t for t, _ in due], future, time.perf_counter(), ref, boxes)
+                while nd.running:
+                    try:
+                        self.jobs.put(job, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+            except Exception as e:
+                logger.error(f"Detect stage error: {e}", exc_info=True)
+            finally:
+                self._release(ref)
+    
+    def _submit(self, ref, boxes):
+        """Hand an encode job to the pool; None once the pool has died"""
+        if self.pool_broken:
+            return None
+        try:
+            if ref.slot is not None:
+                return self.executor.submit(encode_faces_shared, self.ring.spec, ref.slot, boxes)
+            return self.executor.submit(encode_faces, ref.frame, boxes)
+        except BrokenProcessPool as e:
+            self._pool_failed(e)
+            return None
+    
+    def _pool_failed(self, error):
+        if not self.pool_broken:
+            logger.error(f"Encoder pool failed, encoding in-process from now on: {error}")
+            self.pool_broken = True
+    
+    def _encodings(self, future, ref, boxes):
+        """Wait for a job's encodings, encoding in-process without a pool"""
+        if future is not None:
+            try:
+                return future.result(timeout=self.result_timeout)
+            except BrokenProcessPool as e:
+                self._pool_failed(e)
+        return encode_faces(ref.frame, boxes)
+    
+    def _decide_stage(self):
+        nd = self.neurodoor
+        while nd.running:
+            nd.housekeeping()
+            
+            try:
+                job = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._decide(job)
+        self._drain()
+    
+    def _drain(self):
+        """Decide every job still queued so none are lost on stop"""
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            self._decide(job)
+    
+    def _decide(self, job):
+        nd = self.neurodoor
+        tracks, future, submitted, ref, boxes = job
+        release = True
+        try:
+            encodings = self._encodings(future, ref, boxes)
+            # Includes time queued for a worker
+            encode_time = time.perf_counter() - submitted
+            self.stats['encode'].record(encode_time)
+            metrics.observe('encode', encode_time)
+            
+            start = time.perf_counter()
+            now = nd.clock.monotonic()
+            results = nd.face_engine.match_encodings(encodings) if encodings else []
+            for track, result in zip(tracks, results):
+                nd.handle_recognition(track, result, now)
+            self.stats['decide'].record(time.perf_counter() - start)
+        except EncodeTimeout:
+            # A worker may still be reading the slot; free it once the job
+            # settles (at once if it never started)
+            future.cancel()
+            future.add_done_callback(lambda _: self._release(ref))
+            release = False
+            self.stats['encode'].dropped += 1
+            metrics.inc('encode_jobs_dropped')
+            logger.warning(f"Encoding took over {self.result_timeout}s, skipping {len(tracks)} faces")
+        except Exception as e:
+            logger.error(f"Decide stage error: {e}", exc_info=True)
+        finally:
+            if release:
+                self._release(ref)
+            for track in tracks:
+                track.pending = False
+    
+    def get_stats(self):
+        """Per-stage counters and queue depths"""
+        stats = {name: s.get_stats() for name, s in self.stats.items()}
+        stats['queues'] = {'frames': self.frames.qsize(), 'jobs': self.jobs.qsize()}
+        if self.ring:
+            stats['frame_slots'] = {'in_use': self.ring.in_use(), 'exhausted': self.ring.exhausted}
+        return stats
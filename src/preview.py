@@ -0,0 +1,161 @@
+"""Live Annotated Preview Stream"""
+import logging
+import threading
+import time
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+GRANTED_COLOR = (0, 200, 0)
+DENIED_COLOR = (0, 0, 220)
+PENDING_COLOR = (0, 200, 220)
+
+class PreviewStream:
+    """MJPEG preview of captured frames, encoded once per frame only while someone watches"""
+    
+    def __init__(self, config):
+        self.max_fps = config.get('max_fps', 5.0)
+        self.width = config.get('width', 480)
+        self.quality = config.get('jpeg_quality', 70)
+        self.max_viewers = config.get('max_viewers', 4)
+        self.annotate = config.get('annotate', True)
+        self.viewers = 0
+        self.frames_encoded = 0
+        self._pending = None
+        self._chunk = None
+        self._seq = 0
+        self._next_due = 0.0
+        self._thread = None
+        self._cond = threading.Condition()
+    
+    def offer(self, frame, tracked=()):
+        """Hand a frame and its (track, face) pairs to the encoder if one is due"""
+        now = time.monotonic()
+        if not self.viewers or frame is None or now < self._next_due:
+            return
+        self._next_due = now + 1.0 / self.max_fps
+        
+        # Resizing also copies, so the loop may reuse its buffer at once
+        scale = min(1.0, self.width / frame.shape[1])
+        if scale < 1.0:
+            image = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            image = frame.copy()
+        
+        annotations = []
+        if self.annotate:
+            for track, face in tracked:
+                box = tuple(int(face[k] * scale) for k in ('x', 'y', 'w', 'h'))
+                annotations.append((box, self._label(track), self._color(track)))
+        
+        with self._cond:
+            self._pending = (image, annotations)
+            self._cond.notify_all()
+    
+    def _label(self, track):
+        label = f"#{track.track_id}"
+        if track.name:
+            label += f" {track.name}"
+        if track.decision:
+            label += ' granted' if track.decision.get('granted') else ' denied'
+        return label
+    
+    def _color(self, track):
+        if track.decision:
+            return GRANTED_COLOR if track.decision.get('granted') else DENIED_COLOR
+        return DENIED_COLOR if track.reported else PENDING_COLOR
+    
+    def connect(self):
+        """Register a viewer; returns its chunk iterator, or None if full"""
+        with self._cond:
+            if self.viewers >= self.max_viewers:
+                return None
+            self.viewers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='preview-encoder', daemon=True)
+                self._thread.start()
+        logger.info(f"Preview viewer connected ({self.viewers} watching)")
+        return PreviewViewer(self)
+    
+    def _next_chunk(self, viewer):
+        """Block until there is a chunk newer than the viewer's last one"""
+        while True:
+            with self._cond:
+                if self._seq == viewer.seen:
+                    self._cond.wait(5.0)
+                # On a timeout the last frame is resent, which also
+                # notices clients that disconnected
+                viewer.seen = self._seq
+                chunk = self._chunk
+            if chunk is not None:
+                return chunk
+    
+    def _disconnect(self):
+        with self._cond:
+            self.viewers -= 1
+            self._cond.notify_all()
+        logger.info(f"Preview viewer disconnected ({self.viewers} watching)")
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and self.viewers:
+                    self._cond.wait(1.0)
+                if not self.viewers:
+                    self._pending = None
+                    self._thread = None
+                    return
+                image, annotations = self._pending
+                self._pending = None
+            
+            try:
+                chunk = self._encode(image, annotations)
+            except cv2.error as e:
+                logger.error(f"Preview encoding failed: {e}")
+                continue
+            with self._cond:
+                self._chunk = chunk
+                self._seq += 1
+                self.frames_encoded += 1
+                self._cond.notify_all()
+    
+    def _encode(self, image, annotations):
+        """Draw annotations and build one multipart chunk"""
+        for (x, y, w, h), label, color in annotations:
+            cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
+            cv2.putText(image, label, (x, max(12, y - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise cv2.error("JPEG encoding failed")
+        data = jpeg.tobytes()
+        return (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+                + str(len(data)).encode() + b'\r\n\r\n' + data + b'\r\n')
+    
+    def get_stats(self):
+        return {'viewers': self.viewers, 'frames_encoded': self.frames_encoded}
+
+class PreviewViewer:
+    """One viewer's multipart chunk iterator"""
+    
+    def __init__(self, preview):
+        self.preview = preview
+        self.seen = 0
+        self.closed = False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        return self.preview._next_chunk(self)
+    
+    def close(self):
+        """Release the viewer slot; servers close bodies they never iterate too"""
+        if not self.closed:
+            self.closed = True
+            self.preview._disconnect()
+    
+    def __del__(self):
+        self.close()
@@ -0,0 +1,68 @@
+"""Face Quality Gate"""
+import cv2
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FaceQualityGate:
+    """Cheap size, exposure, contrast and sharpness checks run before encoding"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.min_face_size = config.get('min_face_size', 60)
+        self.min_sharpness = config.get('min_sharpness', 40.0)
+        self.min_brightness = config.get('min_brightness', 40)
+        self.max_brightness = config.get('max_brightness', 220)
+        self.min_contrast = config.get('min_contrast', 20.0)
+        self.sample_size = config.get('sample_size', 96)
+        self.checked = 0
+        self.passed = 0
+        self.rejected = {'too_small': 0, 'too_dark': 0, 'too_bright': 0,
+                         'low_contrast': 0, 'blurry': 0}
+    
+    def assess(self, frame, face):
+        """Return (ok, reason, metrics) for one face box"""
+        if face['w'] < self.min_face_size or face['h'] < self.min_face_size:
+            return False, 'too_small', {'size': min(face['w'], face['h'])}
+        
+        crop = frame[face['y']:face['y'] + face['h'], face['x']:face['x'] + face['w']]
+        if crop.size == 0:
+            return False, 'too_small', {'size': 0}
+        
+        small = cv2.resize(crop, (self.sample_size, self.sample_size), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        mean, std = cv2.meanStdDev(gray)
+        brightness, contrast = float(mean[0][0]), float(std[0][0])
+        metrics = {'brightness': brightness, 'contrast': contrast}
+        
+        if brightness < self.min_brightness:
+            return False, 'too_dark', metrics
+        if brightness > self.max_brightness:
+            return False, 'too_bright', metrics
+        if contrast < self.min_contrast:
+            return False, 'low_contrast', metrics
+        
+        metrics['sharpness'] = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if metrics['sharpness'] < self.min_sharpness:
+            return False, 'blurry', metrics
+        
+        return True, None, metrics
+    
+    def check(self, frame, face):
+        """Whether a face is worth encoding; updates the counters"""
+        if not self.enabled:
+            return True
+        
+        self.checked += 1
+        ok, reason, metrics = self.assess(frame, face)
+        if ok:
+            self.passed += 1
+        else:
+            self.rejected[reason] += 1
+            logger.debug(f"Face rejected before encoding: {reason} {metrics}")
+        return ok
+    
+    def get_stats(self):
+        """Checked, passed and per-reason rejection counters"""
+        return {'checked': self.checked, 'passed': self.passed, 'rejected': dict(self.rejected)}
@@ -0,0 +1,165 @@
+"""Offline Replay Source and Decision Trace"""
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.camera import Camera
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+def recording_start(source, image_fps=10.0):
+    """Estimate when a recording began from its mtime, which marks its end"""
+    source = Path(source)
+    if not source.exists():
+        return None
+    end = datetime.fromtimestamp(source.stat().st_mtime)
+    
+    if source.is_dir():
+        frames = sum(1 for p in source.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        fps = image_fps
+    else:
+        cap = cv2.VideoCapture(str(source))
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) if cap.isOpened() else 0
+        fps = cap.get(cv2.CAP_PROP_FPS) or image_fps
+        cap.release()
+    
+    if frames <= 0:
+        logger.warning(f"Unknown length for {source}; pass --start-time to set its start")
+        return end
+    return end - timedelta(seconds=frames / fps)
+
+class ReplayCamera(Camera):
+    """Camera stand-in that plays back a video file or a folder of frames"""
+    
+    def __init__(self, config, source, realtime=True, clock=None, fps=10.0):
+        self.source = Path(source)
+        self.realtime = realtime
+        self.clock = clock
+        self.fps = fps
+        self.images = None
+        self.finished = False
+        self.frames_skipped = 0
+        self._index = 0
+        self._position = 0
+        self._started = None
+        super().__init__(dict(config, threaded=False))
+    
+    def _initialize(self):
+        """Open the recording instead of a device"""
+        if self.source.is_dir():
+            self.images = sorted(p for p in self.source.iterdir()
+                                 if p.suffix.lower() in IMAGE_EXTENSIONS)
+            first = cv2.imread(str(self.images[0])) if self.images else None
+            if first is None:
+                logger.error(f"No readable images in {self.source}")
+                self.finished = True
+                return
+            self.height, self.width = first.shape[:2]
+            logger.info(f"Replaying {len(self.images)} images from {self.source} at {self.fps} fps")
+            return
+        
+        self.cap = cv2.VideoCapture(str(self.source))
+        if not self.cap.isOpened():
+            logger.error(f"Cannot open recording {self.source}")
+            self.finished = True
+            return
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or self.fps
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or self.width
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or self.height
+        logger.info(f"Replaying {self.source} at {self.fps:.1f} fps")
+    
+    def capture_frame(self, out=None):
+        """Return the next recorded frame, or None at the end"""
+        if self.finished:
+            return None
+        
+        index = self._index
+        if self.realtime:
+            if self._started is None:
+                self._started = time.monotonic()
+            elapsed = time.monotonic() - self._started
+            index = max(index, int(elapsed * self.fps))
+            wait = index / self.fps - elapsed
+            if wait > 0:
+                time.sleep(wait)
+        
+        frame, index = self._read(index)
+        if frame is None:
+            self.finished = True
+            logger.info(f"Replay finished after {self.frame_seq} frames "
+                        f"({self.frames_skipped} skipped)")
+            return None
+        
+        self.frames_skipped += index - self._index
+        self._index = index + 1
+        self.frame_seq = index + 1
+        self.frame_time = time.monotonic()
+        if self.clock is not None:
+            self.clock.set(index / self.fps)
+        
+        if out is not None and out.shape == frame.shape:
+            np.copyto(out, frame)
+            return out
+        return frame
+    
+    def _read(self, index):
+        """Decode frame ``index`` or the next readable one; returns ``(frame, index)``"""
+        if self.images is not None:
+            while index < len(self.images):
+                frame = cv2.imread(str(self.images[index]))
+                if frame is not None:
+                    return frame, index
+                logger.warning(f"Skipping unreadable image {self.images[index]}")
+                index += 1
+            return None, index
+        
+        while self._position < index:
+            if not self.cap.grab():
+                return None, index
+            self._position += 1
+        ret, frame = self.cap.read()
+        self._position += 1
+        return (frame if ret else None), index
+    
+    def is_active(self):
+        return not self.finished
+    
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['frames_captured'] = self.frame_seq - self.frames_skipped
+        stats['frames_dropped'] = self.frames_skipped
+        return stats
+
+class DecisionTrace:
+    """Writes one JSON line per access decision made during a replay"""
+    
+    def __init__(self, path=None):
+        self.path = path
+        self.counts = Counter()
+        self._file = open(path, 'w') if path else None
+    
+    def record(self, entry):
+        """Add one decision"""
+        outcome = 'granted' if entry.get('success') else (
+            'unknown' if entry.get('user_id') is None else 'denied')
+        self.counts[outcome] += 1
+        if self._file:
+            self._file.write(json.dumps(dict(entry, outcome=outcome), default=str) + '\n')
+    
+    def summary(self):
+        """Decision counts by outcome"""
+        return {'decisions': sum(self.counts.values()), **self.counts}
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            logger.info(f"Decision trace written to {self.path}")
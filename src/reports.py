@@ -0,0 +1,116 @@
+"""Access Log Reports"""
+import csv
+import json
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+REPORT_COLUMNS = ['id', 'timestamp', 'user_id', 'user_name', 'success', 'method',
+                  'confidence', 'risk_score', 'anomaly_detected', 'reason']
+
+# Sections read from the rollups, so they include archived rows
+ROLLUP_SECTIONS = [('by_day', 'day'), ('by_user', 'user'), ('by_method', 'method')]
+
+def parse_date_range(start_date=None, end_date=None):
+    """Turn CLI dates into a half-open datetime range; a date-only end covers that day"""
+    start = datetime.fromisoformat(start_date) if start_date else None
+    end = None
+    if end_date:
+        end = datetime.fromisoformat(end_date)
+        if len(end_date) <= 10:
+            end += timedelta(days=1)
+    if start and end and end <= start:
+        raise ValueError(f"End date {end_date} is before start date {start_date}")
+    return start, end
+
+class ReportGenerator:
+    """Builds access reports from the rollups and a streamed log without loading it into memory"""
+    
+    def __init__(self, database, batch_size=1000):
+        self.database = database
+        self.batch_size = batch_size
+    
+    def summary(self, start=None, end=None):
+        """Totals plus per-day, per-user, per-method and per-outcome groups"""
+        report = {
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            'generated': datetime.now().isoformat(),
+            'totals': self.database.aggregate_access_rollups(None, start, end)[0]
+        }
+        for section, group_by in ROLLUP_SECTIONS:
+            report[section] = self.database.aggregate_access_rollups(group_by, start, end)
+        report['by_outcome'] = self.database.aggregate_access_log('outcome', start, end)
+        return report
+    
+    def rows(self, start=None, end=None):
+        """Raw access log rows in time order, as a generator"""
+        return self.database.iter_access_log(start, end, batch_size=self.batch_size)
+    
+    def write_csv(self, out, start=None, end=None):
+        """Stream raw rows to ``out`` as CSV; returns the row count"""
+        writer = csv.DictWriter(out, fieldnames=REPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        count = 0
+        for row in self.rows(start, end):
+            writer.writerow(row)
+            count += 1
+        return count
+    
+    def write_json(self, out, start=None, end=None, include_rows=True):
+        """Write the summary and, streamed after it, the raw rows as JSON"""
+        report = self.summary(start, end)
+        if not include_rows:
+            json.dump(report, out, indent=2, default=str)
+            out.write('\n')
+            return 0
+        
+        # Emit the document by hand so rows never have to sit in one list
+        out.write(json.dumps(report, indent=2, default=str)[:-2])
+        out.write(',\n  "rows": [')
+        count = 0
+        for row in self.rows(start, end):
+            out.write(',\n    ' if count else '\n    ')
+            out.write(json.dumps(row, default=str))
+            count += 1
+        out.write('\n  ]\n}\n' if count else ']\n}\n')
+        return count
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+def format_report(report):
+    """Plain-text rendering of a summary for the CLI"""
+    start = report['start'] or 'beginning'
+    end = report['end'] or 'now'
+    totals = report['totals']
+    lines = [
+        f"Period: {start} to {end} (exclusive)",
+        f"Attempts: {totals['attempts']}  Granted: {totals['granted']}  "
+        f"Denied: {totals['denied']}  Anomalies: {totals['anomalies']}",
+        f"Avg confidence: {_fmt(totals['avg_confidence'], '.2f')}  "
+        f"Avg risk: {_fmt(totals['avg_risk'], '.2f')}"
+    ]
+    
+    header = f"{'attempts':>9} {'granted':>8} {'denied':>7} {'anomalies':>9}"
+    def counts(row):
+        return f"{row['attempts']:>9} {row['granted']:>8} {row['denied']:>7} {row['anomalies']:>9}"
+    
+    lines.append(f"\n-- By day --\n{'day':<12} {header}")
+    lines.extend(f"{row['day'] or '-':<12} {counts(row)}" for row in report['by_day'])
+    
+    lines.append(f"\n-- By user --\n{'user':<20} {header}")
+    for row in report['by_user']:
+        name = row['user_name'] or ('Unknown' if row['user_id'] is None else f"#{row['user_id']}")
+        lines.append(f"{name[:20]:<20} {counts(row)}")
+    
+    lines.append(f"\n-- By method --\n{'method':<20} {header}")
+    lines.extend(f"{(row['method'] or '-')[:20]:<20} {counts(row)}" for row in report['by_method'])
+    
+    lines.append(f"\n-- By outcome (log rows not yet archived) --\n{'outcome':<8} {'reason':<32} {'attempts':>9} {'anomalies':>9}")
+    for row in report['by_outcome']:
+        outcome = 'granted' if row['success'] else 'denied'
+        lines.append(f"{outcome:<8} {(row['reason'] or '-')[:32]:<32} "
+                     f"{row['attempts']:>9} {row['anomalies']:>9}")
+    return '\n'.join(lines)
@@ -0,0 +1,103 @@
+"""Access Log Retention"""
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.database import configure_connection
+
+logger = logging.getLogger(__name__)
+
+class AccessLogRetention:
+    """Archives and deletes access log rows older than ``max_age_days``, in small batches"""
+    
+    def __init__(self, db_path, config, db_config=None):
+        self.db_path = db_path
+        self.db_config = db_config or {}
+        self.enabled = config.get('enabled', False) and db_path != ':memory:'
+        self.max_age_days = config.get('max_age_days', 90)
+        self.archive = config.get('archive', True)
+        self.archive_dir = config.get('archive_dir', 'data/archive')
+        self.batch_size = config.get('batch_size', 500)
+        self.batch_pause = config.get('batch_pause', 0.05)
+        self.interval = config.get('interval', 3600)
+        self.last_result = None
+        self._last_run = None
+        self._thread = None
+        self._stop = threading.Event()
+    
+    def run(self, now=None):
+        """Compact everything older than the cutoff; returns counts"""
+        cutoff = (now or datetime.now()) - timedelta(days=self.max_age_days)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn, self.db_config)
+        result = {'cutoff': cutoff.isoformat(), 'rows': 0, 'batches': 0}
+        try:
+            while not self._stop.is_set():
+                rows = conn.execute("""
+                    SELECT * FROM access_log
+                    WHERE timestamp < ?
+                    ORDER BY timestamp, id LIMIT ?
+                """, (cutoff, self.batch_size)).fetchall()
+                if not rows:
+                    break
+                if self.archive:
+                    self._archive([dict(row) for row in rows])
+                ids = [row['id'] for row in rows]
+                with conn:
+                    conn.execute(f"DELETE FROM access_log WHERE id IN ({','.join('?' * len(ids))})", ids)
+                result['rows'] += len(rows)
+                result['batches'] += 1
+                if len(rows) < self.batch_size:
+                    break
+                self._stop.wait(self.batch_pause)
+        finally:
+            conn.close()
+        if result['rows']:
+            logger.info(f"Compacted {result['rows']} access log rows older than {cutoff:%Y-%m-%d}")
+        self.last_result = result
+        return result
+    
+    def _archive(self, rows):
+        """Append rows to their month's archive file and sync it"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        months = {}
+        for row in rows:
+            months.setdefault(str(row['timestamp'])[:7], []).append(row)
+        for month, month_rows in months.items():
+            path = os.path.join(self.archive_dir, f"access_log-{month}.jsonl.gz")
+            data = ''.join(json.dumps(row, default=str) + '\n' for row in month_rows)
+            # Each batch is appended as its own gzip member
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab') as gz:
+                    gz.write(data.encode())
+                raw.flush()
+                os.fsync(raw.fileno())
+    
+    def maybe_run(self):
+        """Start a background compaction once ``interval`` has passed"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        if self._last_run is not None and time.monotonic() - self._last_run < self.interval:
+            return
+        self._last_run = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='access-log-retention', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        try:
+            self.run()
+        except Exception as e:
+            logger.error(f"Access log retention failed: {e}")
+    
+    def stop(self):
+        """Stop a running compaction after its current batch"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
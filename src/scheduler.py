@@ -0,0 +1,84 @@
+"""Adaptive Frame-Rate Scheduler"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class FrameScheduler:
+    """Paces the main loop between an idle and an active frame rate"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.active_fps = config.get('active_fps', 15.0)
+        self.idle_fps = config.get('idle_fps', 2.0)
+        self.idle_after = config.get('idle_after', 3.0)
+        self.error_backoff = config.get('error_backoff', 0.5)
+        self.max_error_backoff = config.get('max_error_backoff', 5.0)
+        self.fps = self.active_fps
+        self.rate_changes = 0
+        self.overruns = 0
+        self.iterations = 0
+        self.busy_time = 0.0
+        self._iteration_start = time.monotonic()
+        self._last_activity = self._iteration_start
+        self._last_step = self._iteration_start
+        self._error_streak = 0
+        self._wake = threading.Event()
+    
+    def begin(self):
+        """Mark the start of an iteration"""
+        self._iteration_start = time.monotonic()
+    
+    def report(self, active):
+        """Feed whether this iteration saw motion, faces or tracks"""
+        now = time.monotonic()
+        if active:
+            self._last_activity = now
+            self._set_fps(self.active_fps)
+        elif self.fps > self.idle_fps and now - self._last_activity >= self.idle_after \
+                and now - self._last_step >= self.idle_after:
+            self._set_fps(max(self.idle_fps, self.fps / 2))
+            self._last_step = now
+    
+    def _set_fps(self, fps):
+        if fps != self.fps:
+            logger.debug(f"Frame rate {self.fps:.1f} -> {fps:.1f} fps")
+            self.fps = fps
+            self.rate_changes += 1
+    
+    def wait(self):
+        """Sleep for the remainder of this iteration's period"""
+        self._error_streak = 0
+        elapsed = time.monotonic() - self._iteration_start
+        self.iterations += 1
+        self.busy_time += elapsed
+        remaining = 1.0 / self.fps - elapsed
+        if not self.enabled:
+            return
+        if remaining > 0:
+            self._wake.wait(remaining)
+        else:
+            self.overruns += 1
+    
+    def wait_after_error(self):
+        """Back off exponentially while errors repeat"""
+        self._error_streak += 1
+        delay = min(self.max_error_backoff, self.error_backoff * 2 ** (self._error_streak - 1))
+        self._wake.wait(delay)
+    
+    def wake(self):
+        """Interrupt any sleep, e.g. on shutdown"""
+        self._wake.set()
+    
+    def get_stats(self):
+        """Current rate and pacing counters"""
+        return {
+            'fps': self.fps,
+            'rate_changes': self.rate_changes,
+            'overruns': self.overruns,
+            'iterations': self.iterations,
+            'avg_busy_ms': 1000 * self.busy_time / self.iterations if self.iterations else 0.0,
+            'idle_for': time.monotonic() - self._last_activity
+        }
@@ -0,0 +1,127 @@
+"""Dashboard Status Snapshot"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class StatusSnapshot:
+    """Dashboard status fields kept current from access events instead of queries"""
+    
+    def __init__(self, database, bus, config):
+        self.database = database
+        self.bus = bus
+        self.recent_size = config.get('recent_size', 5)
+        self.resync_interval = config.get('resync_interval', 30)
+        self.poll_interval = config.get('poll_interval', 1.0)
+        self.version = 0
+        self.total_users = 0
+        self.recent = deque(maxlen=self.recent_size)
+        self.today = {'granted': 0, 'denied': 0}
+        self._day = None
+        self._last_access_id = 0
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        bus.listen(self._apply)
+        self.resync()
+    
+    def resync(self):
+        """Reload every field from the database"""
+        # Make queued access log writes visible first
+        self.database.flush()
+        total = self.database.get_user_count()
+        recent = self.database.get_recent_access(limit=self.recent_size)
+        last_id = self.database.get_last_access_id()
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        counts = self.database.aggregate_access_rollups(None, midnight)[0]
+        with self._lock:
+            self.total_users = total
+            self.recent = deque(recent, maxlen=self.recent_size)
+            self.today = {'granted': counts['granted'], 'denied': counts['denied']}
+            self._day = midnight.date().isoformat()
+            self._last_access_id = max(self._last_access_id, last_id)
+            self._last_sync = time.monotonic()
+            self.version += 1
+    
+    def _apply(self, event):
+        if event['type'] != 'access':
+            return
+        data = event['data']
+        with self._lock:
+            self._roll_day()
+            self.recent.appendleft(data)
+            if str(data.get('timestamp', ''))[:10] == self._day:
+                self.today['granted' if data.get('success') else 'denied'] += 1
+            self.version += 1
+    
+    def _roll_day(self):
+        """Start today's counts from zero after midnight (lock held)"""
+        day = datetime.now().date().isoformat()
+        if day != self._day:
+            self._day = day
+            self.today = {'granted': 0, 'denied': 0}
+            self.version += 1
+    
+    def maybe_refresh(self):
+        """Re-read the user count once ``resync_interval`` has passed"""
+        if time.monotonic() - self._last_sync < self.resync_interval:
+            return
+        self._last_sync = time.monotonic()
+        try:
+            total = self.database.get_user_count()
+        except Exception as e:
+            logger.error(f"Status resync failed: {e}")
+            return
+        with self._lock:
+            if total != self.total_users:
+                self.total_users = total
+                self.version += 1
+    
+    def get(self):
+        """Return ``(version, fields)``; the version changes with the fields"""
+        self.maybe_refresh()
+        with self._lock:
+            self._roll_day()
+            return self.version, {
+                'total_users': self.total_users,
+                'recent_access': list(self.recent),
+                'today': dict(self.today)
+            }
+    
+    def poll(self):
+        """Publish access_log rows written since the last poll"""
+        rows = self.database.get_access_since(self._last_access_id)
+        for row in rows:
+            self._last_access_id = row['id']
+            self.bus.publish('access', row)
+        return len(rows)
+    
+    @property
+    def following(self):
+        """Whether new access_log rows reach the bus through ``poll``"""
+        return self._thread is not None
+    
+    def follow(self):
+        """Tail the access log in the background (for a web-only process)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='status-follow', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Access log poll failed: {e}")
+    
+    def stop(self):
+        """Stop following the access log"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
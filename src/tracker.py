@@ -0,0 +1,108 @@
+"""Face Tracking Module"""
+import logging
+import itertools
+
+logger = logging.getLogger(__name__)
+
+def iou(a, b):
+    """Intersection over union of two face boxes"""
+    x1 = max(a['x'], b['x'])
+    y1 = max(a['y'], b['y'])
+    x2 = min(a['x'] + a['w'], b['x'] + b['w'])
+    y2 = min(a['y'] + a['h'], b['y'] + b['h'])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    if inter == 0:
+        return 0.0
+    union = a['w'] * a['h'] + b['w'] * b['h'] - inter
+    return inter / float(union)
+
+class Track:
+    """A face followed across frames with its cached identity"""
+    
+    def __init__(self, track_id, box, now):
+        self.track_id = track_id
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+        self.user_id = None
+        self.name = None
+        self.confidence = 0.0
+        self.decision = None
+        self.last_attempt = None
+        self.last_verified = None
+        self.attempts = 0
+        self.reported = False
+        self.pending = False
+    
+    def needs_recognition(self, now, reverify_interval, retry_interval):
+        """Whether this track should be (re-)encoded on this frame"""
+        if self.user_id is None:
+            return self.last_attempt is None or now - self.last_attempt >= retry_interval
+        return now - self.last_verified >= reverify_interval
+    
+    def needs_decision(self, confidence, threshold):
+        """Whether a re-verification can overturn the cached decision"""
+        if not self.reported or self.decision is None:
+            return True
+        if self.decision.get('granted'):
+            return False
+        reason = self.decision.get('reason')
+        if reason == 'Low recognition confidence':
+            return confidence >= threshold
+        return reason == 'Locked out after failed attempts'
+
+class FaceTracker:
+    """IoU tracker assigning stable ids to face boxes"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.iou_threshold = config.get('iou_threshold', 0.3)
+        self.track_timeout = config.get('track_timeout', 1.0)
+        self.reverify_interval = config.get('reverify_interval', 5.0)
+        self.retry_interval = config.get('retry_interval', 0.5)
+        self.unknown_attempts = config.get('unknown_attempts', 3)
+        self.tracks = {}
+        self._ids = itertools.count(1)
+    
+    def update(self, faces, now):
+        """Match detections to tracks; returns a list of (track, face)"""
+        pairs = sorted(
+            ((iou(track.box, face), track_id, i)
+             for track_id, track in self.tracks.items()
+             for i, face in enumerate(faces)),
+            key=lambda p: p[0], reverse=True)
+        
+        assigned = {}
+        used_tracks = set()
+        for score, track_id, i in pairs:
+            if score < self.iou_threshold:
+                break
+            if track_id in used_tracks or i in assigned:
+                continue
+            used_tracks.add(track_id)
+            assigned[i] = self.tracks[track_id]
+        
+        matched = []
+        for i, face in enumerate(faces):
+            track = assigned.get(i)
+            if track is None:
+                track = Track(next(self._ids), face, now)
+                self.tracks[track.track_id] = track
+                logger.debug(f"New face track {track.track_id}")
+            track.box = face
+            track.last_seen = now
+            matched.append((track, face))
+        
+        for track_id in [t for t, track in self.tracks.items()
+                         if now - track.last_seen > self.track_timeout]:
+            del self.tracks[track_id]
+        
+        return matched
+    
+    def needs_recognition(self, track, now):
+        """Whether a track is due for encoding"""
+        return track.needs_recognition(now, self.reverify_interval, self.retry_interval)
+    
+    def has_tracks(self):
+        """Whether any face is currently being tracked"""
+        return bool(self.tracks)
@@ -1,6 +1,11 @@
 """Web Dashboard Module"""
-from flask import Flask, render_template_string, jsonify, request
+from flask import Flask, Response, render_template_string, jsonify, request
+import hashlib
+import json
 import logging
+import queue
+
+from src.metrics import render_prometheus
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +74,7 @@ HTML_TEMPLATE = """
                 <p><span class="status-indicator status-active"></span>Camera: <span id="camera-status">Active</span></p>
                 <p><span class="status-indicator status-active"></span>Lock: <span id="lock-status">Locked</span></p>
                 <p>Total Users: <span id="user-count">0</span></p>
+                <p>Today: <span id="today-granted">0</span> granted, <span id="today-denied">0</span> denied</p>
                 <div style="margin-top: 20px;">
                     <button class="btn btn-primary" onclick="unlockDoor()">Unlock Door</button>
                     <button class="btn btn-danger" onclick="lockDoor()">Lock Door</button>
@@ -79,31 +85,57 @@ HTML_TEMPLATE = """
                 <h2>Recent Access</h2>
                 <div id="access-log">Loading...</div>
             </div>
+            
+            <div class="card" id="preview-card">
+                <h2>Live View</h2>
+                <img src="/video_feed" alt="Live camera preview" style="width: 100%; border-radius: 5px;"
+                     onerror="document.getElementById('preview-card').style.display = 'none'">
+            </div>
         </div>
     </div>
     
     <script>
+        let recentAccess = [];
+        
+        function renderLog() {
+            const logHtml = recentAccess.map(entry => {
+                const cls = entry.success ? 'log-success' : 'log-failure';
+                const user = entry.user_name || 'Unknown';
+                return `<div class="log-entry ${cls}">${entry.timestamp} - ${user} (${entry.method})</div>`;
+            }).join('');
+            document.getElementById('access-log').innerHTML = logHtml || '<p>No recent activity</p>';
+        }
+        
         async function updateStatus() {
             try {
+                // The browser revalidates with If-None-Match; unchanged status is a 304
                 const response = await fetch('/api/status');
                 const data = await response.json();
                 
                 document.getElementById('camera-status').textContent = data.camera || 'Unknown';
                 document.getElementById('lock-status').textContent = data.door_lock || 'Unknown';
                 document.getElementById('user-count').textContent = data.total_users || 0;
+                const today = data.today || {};
+                document.getElementById('today-granted').textContent = today.granted || 0;
+                document.getElementById('today-denied').textContent = today.denied || 0;
                 
-                const log = data.recent_access || [];
-                const logHtml = log.map(entry => {
-                    const cls = entry.success ? 'log-success' : 'log-failure';
-                    const user = entry.user_name || 'Unknown';
-                    return `<div class="log-entry ${cls}">${entry.timestamp} - ${user} (${entry.method})</div>`;
-                }).join('');
-                document.getElementById('access-log').innerHTML = logHtml || '<p>No recent activity</p>';
+                recentAccess = data.recent_access || [];
+                renderLog();
             } catch (error) {
                 console.error('Error updating status:', error);
             }
         }
         
+        // Access events are pushed as they happen
+        const events = new EventSource('/api/events');
+        events.addEventListener('access', (event) => {
+            const entry = JSON.parse(event.data);
+            recentAccess = [entry, ...recentAccess].slice(0, 5);
+            renderLog();
+            const counter = document.getElementById(entry.success ? 'today-granted' : 'today-denied');
+            counter.textContent = Number(counter.textContent) + 1;
+        });
+        
         async function unlockDoor() {
             await fetch('/api/unlock', { method: 'POST' });
             alert('Door unlocked');
@@ -115,15 +147,19 @@ HTML_TEMPLATE = """
         }
         
         updateStatus();
-        setInterval(updateStatus, 5000);
+        setInterval(updateStatus, 30000);
     </script>
 </body>
 </html>
 """
 
-def create_app(neurodoor):
+def create_app(neurodoor, follow_database=False):
+    """Build the dashboard app, optionally tailing the access log of another process"""
     app = Flask(__name__)
     app.config['neurodoor'] = neurodoor
+    keepalive = neurodoor.config.get('dashboard', {}).get('sse_keepalive', 15)
+    if follow_database:
+        neurodoor.status_snapshot.follow()
     
     @app.route('/')
     def index():
@@ -132,11 +168,61 @@ def create_app(neurodoor):
     @app.route('/api/status')
     def get_status():
         try:
-            status = neurodoor.get_status()
-            return jsonify(status)
+            if request.args.get('full'):
+                return jsonify(neurodoor.get_status())
+            
+            # Served from the in-memory snapshot; unchanged polls get a 304
+            body = json.dumps(neurodoor.get_dashboard_status(), default=str)
+            response = Response(body, mimetype='application/json')
+            response.set_etag(hashlib.md5(body.encode()).hexdigest())
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/events')
+    def events():
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        subscription = neurodoor.events.subscribe(last_id)
+        
+        def stream():
+            try:
+                yield f"retry: {keepalive * 1000}\n\n"
+                while True:
+                    try:
+                        yield subscription.get(timeout=keepalive)['message']
+                    except queue.Empty:
+                        # Comment line keeps proxies from closing the stream
+                        yield ": keepalive\n\n"
+            finally:
+                neurodoor.events.unsubscribe(subscription)
+        
+        return Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    @app.route('/video_feed')
+    def video_feed():
+        # Frames only exist in the process running the camera loop
+        if not neurodoor.running:
+            return jsonify({'error': 'Preview is only served by the process running the camera '
+                                     '(set dashboard.embedded)'}), 503
+        stream = neurodoor.preview.connect()
+        if stream is None:
+            return jsonify({'error': 'Too many preview viewers'}), 503
+        return Response(stream, mimetype='multipart/x-mixed-replace; boundary=frame',
+                        headers={'Cache-Control': 'no-cache'})
+    
+    @app.route('/metrics')
+    def prometheus_metrics():
+        try:
+            snapshot = neurodoor.get_metrics()
+            if snapshot is None:
+                return Response("# no exported metrics snapshot found\n", status=503,
+                                mimetype='text/plain')
+            return Response(render_prometheus(snapshot), mimetype='text/plain; version=0.0.4')
+        except Exception as e:
+            return Response(f"# error: {e}\n", status=500, mimetype='text/plain')
+    
     @app.route('/api/unlock', methods=['POST'])
     def unlock():
         try:
@@ -1,8 +1,11 @@
 """Tests for access control"""
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+import numpy as np
 sys.path.insert(0, '..')
-from src.access_control import AccessController
+from src.access_control import AccessController, LockoutTracker
+from src.gallery import distance_to_confidence
 
 def test_admin_access():
     """Test admin always has access"""
@@ -17,3 +20,112 @@ def test_low_confidence():
     user = {'id': 1, 'name': 'User', 'role': 'employee', 'active': True}
     result = controller.check_access(user, 0.3, datetime.now())
     assert result['granted'] == False
+
+def test_access_threshold_separates_good_and_weak_matches():
+    """Test solid matches pass the default access threshold and weak ones are denied"""
+    controller = AccessController({})
+    user = {'id': 1, 'name': 'Admin', 'role': 'admin', 'active': True}
+    for distance in (0.0, 0.4, 0.5):
+        confidence = distance_to_confidence(distance, 0.6)
+        assert controller.check_access(user, confidence, datetime.now())['granted']
+    
+    # A weak match just inside the match threshold is identified but denied
+    weak = controller.check_access(user, distance_to_confidence(0.58, 0.6), datetime.now())
+    assert not weak['granted'] and weak['reason'] == 'Low recognition confidence'
+    assert distance_to_confidence(0.0, 0.6) == 1.0
+    assert distance_to_confidence(0.7, 0.6) < 0.5
+
+def test_confidence_threshold_key():
+    """Test face_confidence_threshold is used as given"""
+    controller = AccessController({'face_confidence_threshold': 0.7})
+    user = {'id': 1, 'name': 'Admin', 'role': 'admin', 'active': True}
+    assert controller.threshold == 0.7
+    assert controller.check_access(user, 0.71, datetime.now())['granted']
+    assert not controller.check_access(user, 0.69, datetime.now())['granted']
+
+def test_legacy_threshold_is_converted():
+    """Test face_recognition_threshold maps to 1 - 0.5 * (1 - legacy) / match_threshold"""
+    for legacy, match_threshold in ((0.6, 0.6), (0.7, 0.4), (0.5, 0.6)):
+        controller = AccessController({'face_recognition_threshold': legacy},
+                                      match_threshold=match_threshold)
+        expected = 1.0 - 0.5 * (1.0 - legacy) / match_threshold
+        assert abs(controller.threshold - expected) < 1e-9
+    
+    # The new key wins when both are set
+    both = AccessController({'face_recognition_threshold': 0.6, 'face_confidence_threshold': 0.55})
+    assert both.threshold == 0.55
+
+def test_legacy_threshold_keeps_its_distance_limit():
+    """Test the old 1 - distance threshold still accepts the same distances"""
+    controller = AccessController({'face_recognition_threshold': 0.6}, match_threshold=0.6)
+    user = {'id': 1, 'name': 'Admin', 'role': 'admin', 'active': True}
+    for distance, granted in ((0.39, True), (0.41, False)):
+        confidence = distance_to_confidence(distance, 0.6)
+        assert controller.check_access(user, confidence, datetime.now())['granted'] == granted
+
+def test_lockout_after_repeated_low_confidence():
+    """Test repeated failures lock the user out until the lockout expires"""
+    controller = AccessController({'face_recognition_threshold': 0.6,
+                                   'max_failed_attempts': 3, 'lockout_duration': 300})
+    user = {'id': 1, 'name': 'Admin', 'role': 'admin', 'active': True}
+    start = datetime(2024, 3, 4, 12, 0)
+    for i in range(3):
+        controller.check_access(user, 0.3, start + timedelta(seconds=i))
+    
+    result = controller.check_access(user, 0.9, start + timedelta(seconds=10))
+    assert result['granted'] == False
+    assert 'user:1' in controller.get_lockout_state(start.timestamp() + 10)['lockouts']
+    
+    result = controller.check_access(user, 0.9, start + timedelta(seconds=400))
+    assert result['granted'] == True
+
+def test_failures_outside_window_do_not_lock():
+    """Test failures spread beyond the sliding window are forgotten"""
+    controller = AccessController({'max_failed_attempts': 3, 'failed_attempt_window': 60})
+    start = datetime(2024, 3, 4, 12, 0).timestamp()
+    for i in range(5):
+        assert not controller.record_unknown_face(4, now=start + i * 61)
+    assert not controller.record_unknown_face(4, now=start + 4 * 61 + 1)
+    assert controller.record_unknown_face(4, now=start + 4 * 61 + 2)
+    assert controller.is_locked_out(start + 4 * 61 + 3, unknown_id=4)
+    assert not controller.is_locked_out(start + 4 * 61 + 3, unknown_id=9)
+
+def test_returning_stranger_is_locked_out_but_enrolled_user_gets_in():
+    """Test an unknown face locked out after repeated visits leaves enrolled users alone"""
+    controller = AccessController({'max_failed_attempts': 3})
+    stranger = np.full(128, 0.1)
+    now = datetime(2024, 3, 4, 12, 0)
+    for visit in range(3):
+        # Each visit is a new track, but the same face keeps its unknown id
+        unknown_id = controller.identify_unknown(stranger + visit * 0.001, now.timestamp() + visit)
+        controller.record_unknown_face(unknown_id, now.timestamp() + visit)
+    assert controller.is_locked_out(now.timestamp() + 3, unknown_id=unknown_id)
+    
+    other = controller.identify_unknown(np.full(128, -0.1), now.timestamp() + 3)
+    assert other != unknown_id and not controller.is_locked_out(now.timestamp() + 3, unknown_id=other)
+    
+    user = {'id': 1, 'name': 'Admin', 'role': 'admin', 'active': True}
+    assert not controller.is_locked_out(now.timestamp() + 3, user_id=1)
+    assert controller.check_access(user, 0.9, now + timedelta(seconds=3))['granted']
+
+def test_lockout_tracker_is_thread_safe():
+    """Test concurrent failures, checks and snapshots do not corrupt the tracker"""
+    tracker = LockoutTracker(max_failures=3, window=1.0, lockout_duration=0.5)
+    errors = []
+    
+    def hammer(worker):
+        try:
+            for i in range(2000):
+                now = i * 0.01
+                tracker.record_failure(('track', (worker * 7 + i) % 50), now)
+                tracker.is_locked(('track', i % 50), now)
+                tracker.snapshot(now)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=hammer, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,37 @@
+"""Tests for the adaptive risk engine"""
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, '..')
+from src.ai_engine import AIEngine
+from src.database import Database
+
+def test_unusual_hour_and_rapid_attempts():
+    """Test risk rises off-hours and on rapid repeated attempts"""
+    engine = AIEngine({})
+    user = {'id': 1}
+    base = datetime(2024, 3, 4, 9, 0)
+    for day in range(5):
+        engine.record_access(1, base + timedelta(days=day), True)
+    
+    assert engine.assess_risk(user, current_context={'timestamp': base + timedelta(days=6)}) == 0.0
+    night = base.replace(hour=3) + timedelta(days=6)
+    assert engine.assess_risk(user, current_context={'timestamp': night}) == 0.3
+    
+    for i in range(4):
+        engine.record_access(1, night + timedelta(seconds=i), False)
+    assert engine.assess_risk(user, current_context={'timestamp': night + timedelta(seconds=5)}) == 0.7
+
+def test_profiles_persist_and_bootstrap_from_log(tmp_path):
+    """Test profiles are built from the log once and survive restarts"""
+    db = Database(str(tmp_path / 'test.db'))
+    db.log_access({'user_id': 7, 'timestamp': datetime(2024, 3, 4, 14, 5), 'success': True})
+    
+    engine = AIEngine({}, db)
+    assert engine.profiles[7].hour_counts[14] == 1
+    assert engine.profiles[7].dow_counts[0] == 1
+    engine.record_access(7, datetime(2024, 3, 5, 15, 0), True)
+    engine.save_profiles()
+    
+    restored = AIEngine({}, db).profiles[7]
+    assert restored.hour_counts[15] == 1 and restored.attempts == 2
+    db.close()
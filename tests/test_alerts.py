@@ -0,0 +1,103 @@
+"""Tests for alert dispatching"""
+import sys
+import socketserver
+import threading
+import time
+sys.path.insert(0, '..')
+from src.alerts import AlertManager
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages"""
+    
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 localhost ready\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.wfile.write(b'354 go ahead\r\n')
+                body = []
+                for data in iter(self.rfile.readline, b''):
+                    if data == b'.\r\n':
+                        break
+                    body.append(data)
+                self.server.messages.append(b''.join(body).decode())
+                self.wfile.write(b'250 queued\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 ok\r\n')
+
+def _smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _manager(port, **config):
+    config.setdefault('email', {'enabled': True, 'smtp_server': '127.0.0.1', 'smtp_port': port,
+                                'use_tls': False, 'from': 'door@example.com',
+                                'recipients': ['admin@example.com']})
+    return AlertManager(config)
+
+def test_alerts_deduplicated_and_sent_on_one_connection():
+    """Test repeats are coalesced and emails reuse one SMTP session"""
+    server = _smtp_server()
+    manager = _manager(server.server_address[1], digest_interval=0)
+    for _ in range(20):
+        manager.send_alert({'type': 'unknown_face', 'severity': 'warning', 'message': 'Unknown face'})
+    manager.send_alert({'type': 'access_denied', 'severity': 'warning', 'user': 'Bob', 'message': 'Denied'})
+    manager.send_alert({'type': 'system_error', 'severity': 'critical', 'message': 'Camera failure'})
+    manager.close()
+    
+    # The suppressed repeats are reported once on shutdown
+    assert len(server.messages) == 4
+    assert '19 similar alerts suppressed' in server.messages[-1]
+    assert server.connections == 1
+    assert manager.get_stats()['suppressed'] == 19
+    server.shutdown()
+
+def test_trailing_repeats_reported_after_window():
+    """Test the last burst of repeats is sent once its dedup window ends"""
+    server = _smtp_server()
+    manager = _manager(server.server_address[1], dedup_window=0.2, digest_interval=0)
+    for _ in range(5):
+        manager.send_alert({'type': 'unknown_face', 'severity': 'warning', 'message': 'Unknown face'})
+    deadline = time.monotonic() + 3
+    while len(server.messages) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    
+    assert len(server.messages) == 2
+    assert '4 similar alerts suppressed' in server.messages[1]
+    manager.close()
+    assert len(server.messages) == 2
+    server.shutdown()
+
+def test_info_alerts_batched_into_digest():
+    """Test low-severity alerts become a single digest email"""
+    server = _smtp_server()
+    manager = _manager(server.server_address[1], dedup_window=0, digest_interval=3600)
+    for name in ['Alice', 'Bob', 'Carol']:
+        manager.send_alert({'type': 'access_granted', 'severity': 'info', 'user': name,
+                            'message': f'Access granted to {name}'})
+    manager.close()
+    
+    assert len(server.messages) == 1
+    assert 'Digest: 3 events' in server.messages[0]
+    server.shutdown()
+
+def test_unreachable_server_never_blocks_caller():
+    """Test send_alert returns immediately when SMTP is down"""
+    manager = _manager(1, dedup_window=0, digest_interval=0)
+    start = time.monotonic()
+    for i in range(50):
+        manager.send_alert({'type': f'event_{i}', 'severity': 'critical', 'message': 'x'})
+    assert time.monotonic() - start < 0.5
+    manager.close()
+    assert manager.get_stats()['pending_retry'] > 0
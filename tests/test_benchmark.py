@@ -0,0 +1,29 @@
+"""Tests for the benchmark harness"""
+import sys
+sys.path.insert(0, '..')
+import cv2
+import numpy as np
+from benchmark import bench_detection, summarize, compare
+
+def test_summarize_percentiles():
+    """Test latency summary is reported in milliseconds"""
+    stats = summarize(np.full(100, 0.002))
+    assert abs(stats['p50_ms'] - 2.0) < 1e-9
+    assert abs(stats['per_second'] - 500.0) < 1e-6
+
+def test_compare_flags_regressions():
+    """Test only stages slower than the tolerance are reported"""
+    fast = summarize(np.full(10, 0.001))
+    slow = summarize(np.full(10, 0.002))
+    baseline = {'results': {'check_access': fast, 'gallery_match': {'1000': fast}}}
+    current = {'results': {'check_access': fast, 'gallery_match': {'1000': slow}}}
+    regressions = compare(baseline, current, tolerance=0.2)
+    assert [name for name, _ in regressions] == ['gallery_match.1000']
+
+def test_detection_bench_opens_no_capture(monkeypatch):
+    """Test the detection benchmark builds its detector without a video source"""
+    def no_capture(*args):
+        raise AssertionError('VideoCapture opened')
+    monkeypatch.setattr(cv2, 'VideoCapture', no_capture)
+    frames = [np.zeros((120, 160, 3), np.uint8)]
+    assert bench_detection({}, frames, 3)['p50_ms'] >= 0
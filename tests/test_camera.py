@@ -0,0 +1,97 @@
+"""Tests for the camera interface"""
+import os
+import queue
+import sys
+import time
+import numpy as np
+import yaml
+sys.path.insert(0, '..')
+from src.camera import Camera, FrameGrabber, face_size_limits
+from src.quality import FaceQualityGate
+
+class _FakeDetector:
+    """Records what it was given and returns fixed boxes"""
+    
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.calls = []
+    
+    def detect(self, image, min_size, max_size):
+        self.calls.append((image.shape, min_size, max_size))
+        return self.boxes
+
+class _FakeCapture:
+    """cv2.VideoCapture stand-in fed from a queue; empty reads fail"""
+    
+    def __init__(self):
+        self.frames = queue.Queue()
+    
+    def read(self):
+        try:
+            return True, self.frames.get(timeout=0.05)
+        except queue.Empty:
+            return False, None
+
+def _camera(**detection):
+    return Camera({'detection': detection}, open_source=False)
+
+def test_face_size_limits_from_distances():
+    """Test pixel limits follow the pinhole model and explicit sizes win"""
+    config = {'focal_length_px': 500, 'face_width_m': 0.2, 'min_distance': 0.5, 'max_distance': 2.0}
+    assert face_size_limits(config) == (50, 200)
+    assert face_size_limits(dict(config, min_face_size=30)) == (30, 200)
+    assert face_size_limits({}) == (None, None)
+
+def test_default_detection_limit_meets_quality_gate():
+    """Test the shipped config never detects faces the quality gate rejects as small"""
+    with open(os.path.join(os.path.dirname(__file__), '..', 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    min_size, _ = face_size_limits(config['camera']['detection'])
+    assert min_size >= FaceQualityGate(config['quality']).min_face_size
+
+def test_detect_faces_maps_roi_and_scale_back():
+    """Test detection runs on the downscaled ROI and boxes return in frame coordinates"""
+    camera = _camera(scale=0.5, roi=[100, 40, 400, 300], min_face_size=60, max_face_size=200)
+    camera.detector = _FakeDetector([(10, 20, 30, 40)])
+    faces = camera.detect_faces(np.zeros((480, 640, 3), np.uint8))
+    
+    assert camera.detector.calls == [((150, 200, 3), 30, 100)]
+    assert faces == [{'x': 120, 'y': 80, 'w': 60, 'h': 80}]
+    camera.release()
+
+def test_detect_faces_empty_roi():
+    """Test an ROI outside the frame detects nothing"""
+    camera = _camera(roi=[1000, 1000, 50, 50])
+    camera.detector = _FakeDetector([(0, 0, 10, 10)])
+    assert camera.detect_faces(np.zeros((480, 640, 3), np.uint8)) == []
+    assert camera.detector.calls == []
+    camera.release()
+
+def test_frame_grabber_keeps_only_the_newest_frame():
+    """Test reads return the latest frame, count overwritten ones and time out"""
+    cap = _FakeCapture()
+    grabber = FrameGrabber(cap)
+    grabber.start()
+    try:
+        cap.frames.put('f1')
+        seq, frame, _ = grabber.read(timeout=1.0)
+        assert (seq, frame) == (1, 'f1')
+        
+        # Nothing newer than what was read: wait, then give up
+        start = time.monotonic()
+        assert grabber.read(timeout=0.2) is None
+        assert time.monotonic() - start >= 0.15
+        
+        for name in ('f2', 'f3', 'f4'):
+            cap.frames.put(name)
+        deadline = time.monotonic() + 2
+        while grabber.frames_captured < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        seq, frame, _ = grabber.read(timeout=1.0)
+        assert (seq, frame) == (4, 'f4')
+        
+        stats = grabber.get_stats()
+        assert stats['frames_dropped'] == 2 and stats['last_seq'] == 4
+        assert stats['read_failures'] > 0
+    finally:
+        grabber.stop()
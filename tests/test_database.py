@@ -0,0 +1,136 @@
+"""Tests for database operations"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+from src.database import Database, MIGRATIONS
+from src.gallery import FaceGallery, encode_blob, decode_blobs
+
+def test_encoding_blob_roundtrip():
+    """Test encodings survive blob serialization and bad blobs are skipped"""
+    encodings = np.random.default_rng(0).normal(size=(3, 128)).astype(np.float32)
+    blobs = [encode_blob(e) for e in encodings]
+    blobs.insert(1, b'garbage')
+    decoded, valid = decode_blobs(blobs)
+    assert valid.tolist() == [True, False, True, True]
+    assert np.array_equal(decoded, encodings)
+
+def test_incremental_encoding_refresh(tmp_path):
+    """Test only changed users are returned after the watermark"""
+    db = Database(str(tmp_path / 'test.db'))
+    alice = db.add_user('Alice', 'employee')
+    bob = db.add_user('Bob', 'employee')
+    db.save_face_encoding(alice, encode_blob(np.ones(128)))
+    db.save_face_encoding(bob, encode_blob(np.zeros(128)))
+    
+    user_ids, _, blobs, watermark = db.get_face_encodings()
+    assert sorted(user_ids) == [alice, bob]
+    gallery = FaceGallery()
+    gallery.load(user_ids, decode_blobs(blobs)[0])
+    
+    db.set_user_active(bob, False)
+    user_ids, active, _, new_watermark = db.get_face_encodings(since_rev=watermark)
+    assert user_ids == [bob] and not active[0]
+    assert new_watermark > watermark
+    
+    gallery.update(user_ids, [], [])
+    assert gallery.user_ids.tolist() == [alice]
+    assert db.get_face_encodings(since_rev=new_watermark)[0] == []
+    db.close()
+
+def test_encoding_revisions_survive_deleting_the_newest_user(tmp_path):
+    """Test a change after deleting the newest user still lands above the watermark"""
+    db = Database(str(tmp_path / 'test.db'))
+    alice = db.add_user('Alice', 'employee')
+    bob = db.add_user('Bob', 'employee')
+    db.save_face_encoding(bob, encode_blob(np.zeros(128)))
+    watermark = db.get_face_encodings()[3]
+    
+    db.conn.execute("DELETE FROM users WHERE id = ?", (bob,))
+    db.conn.commit()
+    db.save_face_encoding(alice, encode_blob(np.ones(128)))
+    user_ids, active, _, new_watermark = db.get_face_encodings(since_rev=watermark)
+    assert dict(zip(user_ids, active)) == {alice: 1, bob: 0}
+    assert new_watermark > watermark
+    db.close()
+
+def test_deleted_user_leaves_gallery_on_refresh(tmp_path):
+    """Test deleting a user is picked up by an incremental reload"""
+    db = Database(str(tmp_path / 'test.db'))
+    alice = db.add_user('Alice', 'employee')
+    bob = db.add_user('Bob', 'employee')
+    db.save_face_encoding(alice, encode_blob(np.ones(128)))
+    db.save_face_encoding(bob, encode_blob(np.zeros(128)))
+    user_ids, _, blobs, watermark = db.get_face_encodings()
+    gallery = FaceGallery()
+    gallery.load(user_ids, decode_blobs(blobs)[0])
+    
+    db.conn.execute("DELETE FROM users WHERE id = ?", (alice,))
+    db.conn.commit()
+    user_ids, active, blobs, new_watermark = db.get_face_encodings(since_rev=watermark)
+    assert user_ids == [alice] and not active[0] and blobs == [None]
+    assert new_watermark > watermark
+    
+    gallery.update(user_ids, [], [])
+    assert gallery.user_ids.tolist() == [bob]
+    assert db.get_face_encodings(since_rev=new_watermark)[0] == []
+    db.close()
+
+def test_async_access_log_batches_and_flushes(tmp_path):
+    """Test queued log entries are written in batches and flushed on close"""
+    path = str(tmp_path / 'test.db')
+    db = Database(path, {'async_writes': True, 'write_batch_size': 10,
+                         'write_flush_interval': 60})
+    for i in range(25):
+        db.log_access({'user_id': 1, 'success': True, 'method': 'face'})
+    assert db.flush()
+    stats = db.get_write_stats()
+    assert stats['written'] == 25 and stats['dropped'] == 0
+    assert stats['batches'] <= 3
+    
+    db.log_access({'user_id': 1, 'success': False, 'method': 'face'})
+    db.close()
+    
+    db = Database(path)
+    assert len(db.get_access_log(limit=100)) == 26
+    db.close()
+
+def test_migrates_legacy_database_in_place(tmp_path):
+    """Test an unversioned 1.0 database is upgraded with data intact"""
+    import sqlite3
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                    role TEXT NOT NULL, face_encoding BLOB, pin_hash TEXT, active BOOLEAN DEFAULT 1,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP, last_access DATETIME)""")
+    conn.execute("INSERT INTO users (name, role) VALUES ('Admin', 'admin')")
+    conn.commit()
+    conn.close()
+    
+    db = Database(path)
+    assert db.conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1][0]
+    indexes = {row['name'] for row in db.conn.execute("PRAGMA index_list(access_log)")}
+    assert {'idx_access_log_user_time', 'idx_access_log_timestamp'} <= indexes
+    assert db.get_user(1)['name'] == 'Admin'
+    db.close()
+
+def test_rollups_follow_sync_and_batched_writes(tmp_path):
+    """Test both write paths update the hourly and daily rollups"""
+    from datetime import datetime
+    for async_writes in (False, True):
+        db = Database(str(tmp_path / f'rollup{async_writes}.db'), {'async_writes': async_writes})
+        user_id = db.add_user('Alice', 'employee')
+        for minute in (5, 50):
+            db.log_access({'user_id': user_id, 'timestamp': datetime(2024, 1, 1, 9, minute),
+                           'success': True, 'method': 'face', 'confidence': 0.8})
+        db.log_access({'user_id': None, 'timestamp': datetime(2024, 1, 1, 10), 'success': False,
+                       'method': 'face', 'anomaly_detected': True})
+        db.flush()
+        
+        hourly = db.conn.execute("SELECT period, user_id, success, attempts FROM access_rollup_hourly "
+                                 "ORDER BY period").fetchall()
+        assert [tuple(r) for r in hourly] == [('2024-01-01 09:00:00', user_id, 1, 2),
+                                              ('2024-01-01 10:00:00', 0, 0, 1)]
+        totals = db.aggregate_access_rollups(None, datetime(2024, 1, 1), datetime(2024, 1, 2))[0]
+        assert (totals['attempts'], totals['granted'], totals['anomalies']) == (3, 2, 1)
+        assert abs(totals['avg_confidence'] - 0.8) < 1e-9
+        db.close()
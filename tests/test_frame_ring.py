@@ -0,0 +1,34 @@
+"""Tests for the shared-memory frame ring"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+from src.frame_ring import SharedFrameRing, attach_view
+
+def test_slots_reference_counted():
+    """Test a slot is reused only after every holder releases it"""
+    ring = SharedFrameRing(2, (4, 4, 3))
+    try:
+        a = ring.acquire()
+        b = ring.acquire()
+        assert ring.acquire() is None
+        ring.retain(a)
+        ring.release(a)
+        assert ring.acquire() is None
+        ring.release(a)
+        assert ring.acquire() == a
+        ring.release(b)
+        assert ring.in_use() == 1
+    finally:
+        ring.close()
+
+def test_attached_view_shares_memory():
+    """Test a view attached by name sees frames written by the owner"""
+    ring = SharedFrameRing(2, (4, 4, 3))
+    try:
+        slot = ring.acquire()
+        ring.view(slot)[:] = 7
+        view = attach_view(ring.spec, slot)
+        assert view.shape == (4, 4, 3)
+        assert np.all(view == 7)
+    finally:
+        ring.close()
@@ -0,0 +1,50 @@
+"""Tests for the face gallery matcher"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+from src.gallery import FaceGallery
+
+def _random_gallery(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(size=(n, 128)).astype(np.float32)
+    gallery = FaceGallery()
+    gallery.load(np.arange(1, n + 1), encodings)
+    return gallery, encodings
+
+def test_match_finds_closest_user():
+    """Test probe near an enrolled encoding matches that user"""
+    gallery, encodings = _random_gallery()
+    probe = encodings[9] + 0.01
+    matches = gallery.match(probe, top_k=3)
+    assert matches[0][0] == 10
+    assert len(matches) == 3
+    assert matches[0][1] <= matches[1][1] <= matches[2][1]
+
+def test_distances_match_naive():
+    """Test vectorized distances equal per-row Euclidean distances"""
+    gallery, encodings = _random_gallery()
+    probe = encodings[0] * 0.5
+    expected = np.linalg.norm(encodings - probe, axis=1)
+    assert np.allclose(gallery.distances(probe), expected, atol=1e-3)
+
+def test_threshold_and_remove():
+    """Test threshold filtering and user removal"""
+    gallery, encodings = _random_gallery()
+    assert gallery.match(encodings[4], threshold=0.1)[0][0] == 5
+    gallery.remove(5)
+    assert len(gallery) == 49
+    assert gallery.match(encodings[4], threshold=0.1) == []
+
+def test_empty_gallery():
+    """Test empty gallery returns no matches"""
+    assert FaceGallery().match(np.zeros(128)) == []
+
+def test_match_batch_equals_single_matches():
+    """Test batched matching returns the same results as one-by-one"""
+    gallery, encodings = _random_gallery(n=200)
+    probes = encodings[[3, 50, 199]] + 0.01
+    batch = gallery.match_batch(probes, top_k=5, threshold=20.0)
+    for probe, result in zip(probes, batch):
+        single = gallery.match(probe, top_k=5, threshold=20.0)
+        assert [u for u, _ in result] == [u for u, _ in single]
+    assert [r[0][0] for r in batch] == [4, 51, 200]
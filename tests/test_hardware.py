@@ -0,0 +1,36 @@
+"""Tests for door lock control"""
+import sys
+import time
+sys.path.insert(0, '..')
+from src.hardware import DoorLock
+
+def test_unlock_returns_immediately_and_relocks():
+    """Test unlock does not block and the timer relocks the door"""
+    lock = DoorLock()
+    start = time.monotonic()
+    lock.unlock(duration=0.2)
+    assert time.monotonic() - start < 0.1
+    assert not lock.is_locked()
+    time.sleep(0.4)
+    assert lock.is_locked()
+
+def test_overlapping_unlock_extends_deadline():
+    """Test a second unlock extends rather than stacks the relock"""
+    lock = DoorLock()
+    lock.unlock(duration=0.2)
+    time.sleep(0.1)
+    lock.unlock(duration=0.3)
+    time.sleep(0.2)
+    assert not lock.is_locked()
+    time.sleep(0.3)
+    assert lock.is_locked()
+
+def test_held_open_until_manual_lock():
+    """Test a zero-duration unlock is not cut short by timed unlocks"""
+    lock = DoorLock()
+    lock.unlock(duration=0)
+    lock.unlock(duration=0.1)
+    time.sleep(0.2)
+    assert lock.get_state()['held_open']
+    lock.lock()
+    assert lock.is_locked()
@@ -0,0 +1,174 @@
+"""Tests for the NeuroDoor controller"""
+import json
+import os
+import signal
+import sys
+import cv2
+import numpy as np
+import yaml
+sys.path.insert(0, '..')
+import main as main_module
+from main import NeuroDoor
+from src.database import Database
+from src.metrics import metrics
+
+def make_neurodoor(tmp_path, replay=None):
+    with open(os.path.join(os.path.dirname(__file__), '..', 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config['database'].update(path=str(tmp_path / 'test.db'), async_writes=False)
+    config['metrics']['export_path'] = None
+    config['retention']['enabled'] = False
+    config['dashboard']['poll_interval'] = 60
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    return NeuroDoor(str(path), replay=replay)
+
+class _StubEngine:
+    """Recognition engine that "encodes" every face to the same match"""
+    
+    def __init__(self, result):
+        self.result = result
+    
+    def maybe_refresh(self):
+        pass
+    
+    def recognize_faces(self, frame, face_locations):
+        return [dict(self.result) for _ in face_locations]
+
+def replay_neurodoor(tmp_path, monkeypatch, frames=20):
+    """NeuroDoor dry run over a folder of noisy frames with one face in view"""
+    # Keep pytest's own Ctrl-C handling
+    monkeypatch.setattr(signal, 'signal', lambda signum, handler: None)
+    source = tmp_path / 'frames'
+    source.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(frames):
+        cv2.imwrite(str(source / f'{i:03d}.png'), rng.integers(0, 256, (120, 160, 3), np.uint8))
+    neurodoor = make_neurodoor(tmp_path, replay={
+        'source': str(source), 'realtime': False, 'trace': str(tmp_path / 'trace.jsonl'),
+        'start_time': '2024-01-01T09:00:00'})
+    neurodoor.camera.detect_faces = lambda frame: [{'x': 10, 'y': 10, 'w': 100, 'h': 100}]
+    return neurodoor
+
+def read_trace(tmp_path):
+    with open(tmp_path / 'trace.jsonl') as f:
+        return [json.loads(line) for line in f]
+
+def test_low_confidence_denial_is_redecided(tmp_path):
+    """Test a confident re-check overturns a cached low-confidence denial"""
+    neurodoor = make_neurodoor(tmp_path)
+    user_id = neurodoor.database.add_user('Alice', 'admin')
+    (track, _), = neurodoor.tracker.update([{'x': 0, 'y': 0, 'w': 100, 'h': 100}], now=0.0)
+    threshold = neurodoor.access_controller.threshold
+    
+    neurodoor.handle_recognition(track, {'user_id': user_id, 'confidence': threshold - 0.1}, 0.0)
+    assert not track.decision['granted'] and neurodoor.door_lock.locked
+    
+    neurodoor.handle_recognition(track, {'user_id': user_id, 'confidence': threshold + 0.1}, 6.0)
+    assert track.decision['granted'] and not neurodoor.door_lock.locked
+    
+    # A granted identity is not decided again on re-verification
+    neurodoor.handle_recognition(track, {'user_id': user_id, 'confidence': threshold + 0.1}, 12.0)
+    assert neurodoor.database.get_last_access_id() == 2
+    neurodoor.cleanup()
+
+def test_unlock_reaches_followed_snapshot_once(tmp_path):
+    """Test a dashboard unlock is published once when the snapshot tails the log"""
+    neurodoor = make_neurodoor(tmp_path)
+    neurodoor.status_snapshot.follow()
+    neurodoor.unlock_door(user='dashboard')
+    neurodoor.status_snapshot.poll()
+    
+    fields = neurodoor.status_snapshot.get()[1]
+    assert [entry['method'] for entry in fields['recent_access']] == ['manual']
+    assert fields['today']['granted'] == 1
+    assert neurodoor.events.get_stats()['published'] == 1
+    neurodoor.cleanup()
+
+def test_late_match_after_unmatched_frames_is_granted(tmp_path):
+    """Test an enrolled user matched only after several failed encodes still gets in"""
+    neurodoor = make_neurodoor(tmp_path)
+    user_id = neurodoor.database.add_user('Alice', 'admin')
+    face = {'x': 0, 'y': 0, 'w': 100, 'h': 100}
+    
+    for i in range(4):
+        now = i * 0.5
+        (track, _), = neurodoor.tracker.update([face], now=now)
+        neurodoor.handle_recognition(track, {'user_id': None, 'confidence': 0.0}, now)
+    assert track.reported and track.name == 'Unknown'
+    assert neurodoor.access_controller.get_lockout_state()['lockouts'] == {}
+    
+    # The track is still eligible for encoding and the late match decides
+    (track, _), = neurodoor.tracker.update([face], now=2.0)
+    assert not neurodoor.access_controller.is_locked_out(neurodoor.clock.now().timestamp(),
+                                                         user_id=user_id)
+    neurodoor.handle_recognition(track, {'user_id': user_id, 'confidence': 0.95}, 2.0)
+    assert track.decision['granted'] and not neurodoor.door_lock.locked
+    neurodoor.cleanup()
+
+def test_returning_stranger_locks_out_without_blocking_enrolled_users(tmp_path):
+    """Test one face seen on separate tracks is locked out while enrolled users still get in"""
+    neurodoor = make_neurodoor(tmp_path)
+    controller = neurodoor.access_controller
+    attempts = neurodoor.tracker.unknown_attempts
+    stranger = {'user_id': None, 'confidence': 0.0, 'face_encoding': np.full(128, 0.1)}
+    
+    # Each visit stands somewhere else, so each visit gets its own track
+    for visit in range(controller.lockouts.max_failures + 1):
+        face = {'x': visit * 200, 'y': 0, 'w': 100, 'h': 100}
+        for i in range(attempts):
+            now = visit * 10.0 + i * 0.5
+            (track, _), = neurodoor.tracker.update([face], now=now)
+            neurodoor.handle_recognition(track, dict(stranger), now)
+        assert track.reported and track.track_id == visit + 1
+    
+    assert list(controller.get_lockout_state()['lockouts']) == ['unknown:1']
+    # The visit after the lockout is not logged again
+    assert neurodoor.database.get_last_access_id() == controller.lockouts.max_failures
+    
+    # A new face is still encoded, matched and let in
+    user_id = neurodoor.database.add_user('Alice', 'admin')
+    face = {'x': 0, 'y': 300, 'w': 100, 'h': 100}
+    (track, _), = neurodoor.tracker.update([face], now=100.0)
+    neurodoor.quality_gate.check = lambda frame, face: True
+    assert neurodoor.select_for_recognition(None, [(track, face)], 100.0) == [(track, face)]
+    neurodoor.handle_recognition(track, {'user_id': user_id, 'confidence': 0.95}, 100.0)
+    assert track.decision['granted'] and not neurodoor.door_lock.locked
+    neurodoor.cleanup()
+
+def test_stats_without_exported_snapshot(tmp_path, monkeypatch, capsys):
+    """Test --stats reports a missing export instead of this process's empty registry"""
+    neurodoor = make_neurodoor(tmp_path)
+    monkeypatch.setattr(metrics, 'export_path', str(tmp_path / 'missing.json'))
+    assert neurodoor.get_metrics() is None
+    neurodoor.cleanup()
+    
+    # main() logs to logs/ under the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, 'argv', ['main.py', '--config', str(tmp_path / 'config.yaml'), '--stats'])
+    main_module.main()
+    assert 'No exported metrics snapshot found' in capsys.readouterr().out
+
+def test_replay_grants_enrolled_user(tmp_path, monkeypatch):
+    """Test a dry run over a recording traces one granted decision"""
+    neurodoor = replay_neurodoor(tmp_path, monkeypatch)
+    user_id = neurodoor.database.add_user('Alice', 'admin')
+    neurodoor.__dict__['face_engine'] = _StubEngine({'user_id': user_id, 'confidence': 0.9})
+    neurodoor.start()
+    
+    assert neurodoor.trace.summary() == {'decisions': 1, 'granted': 1}
+    entry, = read_trace(tmp_path)
+    assert entry['outcome'] == 'granted' and entry['user_name'] == 'Alice'
+    assert entry['timestamp'].startswith('2024-01-01 09:00')
+    # A dry run leaves the access log alone
+    assert Database(str(tmp_path / 'test.db')).get_last_access_id() == 0
+
+def test_replay_reports_unknown_face(tmp_path, monkeypatch):
+    """Test a dry run traces an unmatched face once, as unknown"""
+    neurodoor = replay_neurodoor(tmp_path, monkeypatch)
+    neurodoor.__dict__['face_engine'] = _StubEngine({'user_id': None, 'confidence': 0.0})
+    neurodoor.start()
+    
+    assert neurodoor.trace.summary() == {'decisions': 1, 'unknown': 1}
+    entry, = read_trace(tmp_path)
+    assert entry['outcome'] == 'unknown' and entry['reason'] == 'Unknown face'
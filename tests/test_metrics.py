@@ -0,0 +1,41 @@
+"""Tests for runtime metrics"""
+import sys
+sys.path.insert(0, '..')
+from src.metrics import Metrics, quantile, render_prometheus
+
+def test_stage_histogram_quantiles():
+    """Test observations land in buckets and quantiles are estimated"""
+    metrics = Metrics()
+    for _ in range(90):
+        metrics.observe('detect', 0.004)
+    for _ in range(10):
+        metrics.observe('detect', 0.2)
+    
+    stage = metrics.snapshot()['stages']['detect']
+    assert stage['count'] == 100
+    assert 0.0025 < quantile(stage, 0.5) <= 0.005
+    assert 0.1 < quantile(stage, 0.95) <= 0.25
+
+def test_prometheus_rendering():
+    """Test histograms, counters and gauges render in exposition format"""
+    metrics = Metrics()
+    with metrics.time('match'):
+        pass
+    metrics.inc('frames_processed', 3)
+    metrics.observe_faces(2)
+    metrics.gauge('alert_queue_depth', lambda: 4)
+    
+    text = render_prometheus(metrics.snapshot())
+    assert 'neurodoor_stage_seconds_bucket{stage="match",le="+Inf"} 1' in text
+    assert 'neurodoor_stage_seconds_count{stage="match"} 1' in text
+    assert 'neurodoor_frames_processed_total 3' in text
+    assert 'neurodoor_faces_per_frame_bucket{le="2"} 1' in text
+    assert 'neurodoor_alert_queue_depth 4' in text
+
+def test_disabled_metrics_record_nothing():
+    """Test a disabled registry ignores observations"""
+    metrics = Metrics(enabled=False)
+    metrics.observe('detect', 0.01)
+    metrics.inc('frames_processed')
+    snapshot = metrics.snapshot()
+    assert snapshot['stages'] == {} and snapshot['counters'] == {}
@@ -0,0 +1,45 @@
+"""Tests for the motion gate"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+from src.motion import MotionDetector
+
+def _scene(square_at=None):
+    frame = np.full((240, 320, 3), 100, np.uint8)
+    if square_at is not None:
+        x, y = square_at
+        frame[y:y + 80, x:x + 80] = 250
+    return frame
+
+def test_static_scene_settles_after_hold_time():
+    """Test a static scene stops reporting motion once the hold time passes"""
+    detector = MotionDetector({'hold_time': 2.0})
+    # The first frame only seeds the background
+    assert detector.detect(_scene(), now=0.0)
+    assert detector.detect(_scene(), now=1.0)
+    assert not detector.detect(_scene(), now=2.5)
+    assert not detector.active
+
+def test_motion_threshold_and_hold():
+    """Test a moving object triggers detection and is held while it pauses"""
+    detector = MotionDetector({'hold_time': 2.0, 'sensitivity': 0.01})
+    detector.detect(_scene(), now=0.0)
+    detector.detect(_scene(), now=3.0)
+    assert detector.detect(_scene((100, 80)), now=3.1)
+    
+    # Too small a change stays below the sensitivity
+    strict = MotionDetector({'sensitivity': 0.5, 'hold_time': 0.0})
+    strict.detect(_scene(), now=0.0)
+    assert not strict.detect(_scene((100, 80)), now=1.0)
+    
+    # Within the hold time a still frame keeps the gate open; after it, not
+    assert detector.detect(_scene(), now=4.0)
+    assert not detector.detect(_scene(), now=5.5)
+    assert detector.frames_with_motion == 2
+
+def test_disabled_detector_always_passes():
+    """Test enabled: false lets every frame through without processing"""
+    detector = MotionDetector({'enabled': False})
+    assert detector.detect(_scene(), now=0.0)
+    assert detector.detect(_scene(), now=10.0)
+    assert detector.frames_checked == 0
@@ -0,0 +1,246 @@
+"""Tests for the pipelined recognition stages (threads only, no process pool)"""
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+sys.path.insert(0, '..')
+from src.clock import SystemClock
+from src import pipeline as pipeline_module
+from src.pipeline import FrameRef, RecognitionPipeline
+from src.tracker import Track
+
+FACE = {'x': 0, 'y': 0, 'w': 2, 'h': 2}
+
+class _StubNeuroDoor:
+    """Just the NeuroDoor surface the pipeline stages touch"""
+    
+    def __init__(self, fail_detect=False):
+        self.running = True
+        self.fail_detect = fail_detect
+        self.camera = types.SimpleNamespace(height=4, width=4)
+        self.clock = SystemClock()
+        self.preview = types.SimpleNamespace(viewers=0)
+        self.scheduler = types.SimpleNamespace(report=lambda active: None)
+        self.tracker = types.SimpleNamespace(update=self._track)
+        self.face_engine = types.SimpleNamespace(match_encodings=lambda e: [{'user_id': 1}] * len(e))
+        self.recognized = []
+        self._ids = iter(range(1, 1000))
+    
+    def _track(self, faces, now):
+        return [(Track(next(self._ids), face, now), face) for face in faces]
+    
+    def detect(self, frame, now):
+        if self.fail_detect:
+            raise RuntimeError('detector failed')
+        return [FACE]
+    
+    def select_for_recognition(self, frame, tracked, now):
+        return tracked
+    
+    def is_scene_active(self, faces):
+        return bool(faces)
+    
+    def housekeeping(self):
+        pass
+    
+    def handle_recognition(self, track, result, now):
+        self.recognized.append(track.track_id)
+
+class _StubExecutor:
+    """Runs nothing; hands back already-settled (or never-settled) futures"""
+    
+    def __init__(self, error=None, settle=True, running=False):
+        self.error = error
+        self.settle = settle
+        self.running = running
+        self.futures = []
+    
+    @property
+    def submitted(self):
+        return len(self.futures)
+    
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        if self.running:
+            # As if a worker had picked the job up
+            future.set_running_or_notify_cancel()
+        elif self.error:
+            future.set_exception(self.error)
+        elif self.settle:
+            future.set_result([np.zeros(128)] * len(args[-1]))
+        return future
+
+def _pipeline(nd, **config):
+    config.setdefault('workers', 1)
+    return RecognitionPipeline(nd, config)
+
+def _frame(pipeline):
+    slot = pipeline.ring.acquire()
+    return FrameRef(pipeline.ring.view(slot), slot)
+
+def _run_stage(nd, target, until, timeout=3.0):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    nd.running = False
+    thread.join(timeout)
+    nd.running = True
+    assert until()
+
+def test_drop_oldest_releases_dropped_slot():
+    """Test a full frame queue drops its oldest frame and frees that slot"""
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=2)
+    try:
+        stats = pipeline.stats['capture']
+        refs = [_frame(pipeline) for _ in range(3)]
+        assert all(pipeline._put(pipeline.frames, ref, stats) for ref in refs)
+        assert stats.dropped == 1
+        assert pipeline.ring.in_use() == 2
+        assert pipeline.frames.get_nowait() is refs[1]
+    finally:
+        pipeline.ring.close()
+
+def test_block_policy_waits_for_room():
+    """Test the block policy waits for the consumer and gives up when stopped"""
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=1, drop_policy='block')
+    try:
+        stats = pipeline.stats['capture']
+        pipeline._put(pipeline.frames, _frame(pipeline), stats)
+        result = []
+        producer = threading.Thread(target=lambda: result.append(
+            pipeline._put(pipeline.frames, _frame(pipeline), stats)))
+        producer.start()
+        time.sleep(0.1)
+        assert producer.is_alive()
+        pipeline._release(pipeline.frames.get_nowait())
+        producer.join(2)
+        assert result == [True] and stats.dropped == 0
+        
+        # Once stopped, a blocked put is abandoned and its slot freed
+        nd.running = False
+        assert not pipeline._put(pipeline.frames, _frame(pipeline), stats)
+        assert pipeline.ring.in_use() == 1
+    finally:
+        pipeline.ring.close()
+
+def test_encode_jobs_capped_and_slots_returned():
+    """Test detection holds back past max_in_flight and every slot comes back"""
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=4, max_in_flight=1)
+    pipeline.executor = _StubExecutor()
+    try:
+        for _ in range(3):
+            pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.stats['detect'].count == 3)
+        
+        assert pipeline.executor.submitted == 1
+        assert pipeline.stats['encode'].dropped == 2
+        # Only the queued job still holds its frame
+        assert pipeline.ring.in_use() == 1
+        
+        _run_stage(nd, pipeline._decide_stage, lambda: pipeline.jobs.empty() and nd.recognized)
+        assert nd.recognized == [1]
+        assert pipeline.ring.in_use() == 0
+    finally:
+        pipeline.ring.close()
+
+def test_slots_released_on_stage_errors():
+    """Test failing detection or encoding never leaks a ring slot"""
+    nd = _StubNeuroDoor(fail_detect=True)
+    pipeline = _pipeline(nd, queue_size=2)
+    pipeline.executor = _StubExecutor(error=RuntimeError('encoder crashed'))
+    try:
+        pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.frames.empty())
+        assert pipeline.ring.in_use() == 0
+        
+        nd.fail_detect = False
+        pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.jobs.qsize() == 1)
+        tracks = pipeline.jobs.queue[0][0]
+        _run_stage(nd, pipeline._decide_stage, lambda: pipeline.jobs.empty())
+        assert pipeline.ring.in_use() == 0
+        assert nd.recognized == [] and not tracks[0].pending
+    finally:
+        pipeline.ring.close()
+
+def test_queued_jobs_decided_on_stop():
+    """Test stopping the decide stage still decides every queued job"""
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=2, max_in_flight=2)
+    pipeline.executor = _StubExecutor()
+    try:
+        for _ in range(2):
+            pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.jobs.qsize() == 2)
+        
+        nd.running = False
+        pipeline._decide_stage()
+        assert nd.recognized == [1, 2]
+        assert pipeline.ring.in_use() == 0
+    finally:
+        pipeline.ring.close()
+
+def test_slow_encoding_times_out():
+    """Test a job whose encodings never arrive is skipped after result_timeout"""
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=2, result_timeout=0.05)
+    pipeline.executor = _StubExecutor(settle=False)
+    try:
+        pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.jobs.qsize() == 1)
+        tracks = pipeline.jobs.queue[0][0]
+        _run_stage(nd, pipeline._decide_stage, lambda: pipeline.jobs.empty())
+        assert nd.recognized == [] and not tracks[0].pending
+        assert pipeline.stats['encode'].dropped == 1
+        assert pipeline.ring.in_use() == 0
+    finally:
+        pipeline.ring.close()
+
+def test_timed_out_job_holds_slot_while_worker_runs():
+    """Test a timed-out job a worker is still running keeps its slot until it settles"""
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=2, result_timeout=0.05)
+    pipeline.executor = _StubExecutor(running=True)
+    try:
+        pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.jobs.qsize() == 1)
+        _run_stage(nd, pipeline._decide_stage, lambda: pipeline.jobs.empty())
+        assert pipeline.stats['encode'].dropped == 1
+        assert pipeline.ring.in_use() == 1
+        
+        future, = pipeline.executor.futures
+        future.set_result([np.zeros(128)])
+        assert pipeline.ring.in_use() == 0
+    finally:
+        pipeline.ring.close()
+
+def test_broken_pool_falls_back_to_in_process_encoding(monkeypatch):
+    """Test a crashed encoder pool is replaced by in-process encoding"""
+    monkeypatch.setattr(pipeline_module, 'encode_faces',
+                        lambda frame, boxes: [np.zeros(128)] * len(boxes))
+    nd = _StubNeuroDoor()
+    pipeline = _pipeline(nd, queue_size=2)
+    pipeline.executor = _StubExecutor(error=BrokenProcessPool('worker died'))
+    try:
+        pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.jobs.qsize() == 1)
+        _run_stage(nd, pipeline._decide_stage, lambda: pipeline.jobs.empty())
+        assert nd.recognized == [1] and pipeline.pool_broken
+        
+        # Later jobs skip the dead pool entirely
+        pipeline._put(pipeline.frames, _frame(pipeline), pipeline.stats['capture'])
+        _run_stage(nd, pipeline._detect_stage, lambda: pipeline.jobs.qsize() == 1)
+        _run_stage(nd, pipeline._decide_stage, lambda: pipeline.jobs.empty())
+        assert nd.recognized == [1, 2] and pipeline.executor.submitted == 1
+        assert pipeline.ring.in_use() == 0
+    finally:
+        pipeline.ring.close()
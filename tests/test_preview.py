@@ -0,0 +1,45 @@
+"""Tests for the live preview stream"""
+import sys
+import time
+sys.path.insert(0, '..')
+import numpy as np
+from src.preview import PreviewStream
+from src.tracker import Track
+
+def test_preview_idle_without_viewers():
+    """Test frames offered with nobody watching are ignored"""
+    preview = PreviewStream({})
+    preview.offer(np.zeros((480, 640, 3), np.uint8))
+    assert preview._pending is None and preview._thread is None
+
+def test_viewers_share_encoded_frames():
+    """Test one encoded JPEG is fanned out and the encoder stops with the last viewer"""
+    preview = PreviewStream({'max_fps': 100, 'width': 320, 'max_viewers': 2})
+    first, second = preview.connect(), preview.connect()
+    assert preview.connect() is None
+    
+    track = Track(1, {'x': 100, 'y': 100, 'w': 80, 'h': 80}, 0.0)
+    track.name = 'Alice'
+    preview.offer(np.zeros((480, 640, 3), np.uint8), [(track, track.box)])
+    chunk = next(first)
+    assert chunk is next(second)
+    assert chunk.startswith(b'--frame\r\nContent-Type: image/jpeg')
+    assert preview.frames_encoded == 1
+    
+    first.close()
+    second.close()
+    assert preview.viewers == 0
+    deadline = time.monotonic() + 3
+    while preview._thread is not None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert preview._thread is None
+
+def test_closing_unstarted_stream_releases_slot():
+    """Test a stream closed before its first chunk (e.g. a HEAD request) frees its slot"""
+    preview = PreviewStream({'max_viewers': 1})
+    stream = preview.connect()
+    assert preview.viewers == 1 and preview.connect() is None
+    stream.close()
+    stream.close()
+    assert preview.viewers == 0
+    assert preview.connect() is not None
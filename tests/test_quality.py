@@ -0,0 +1,49 @@
+"""Tests for the face quality gate"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+from src.quality import FaceQualityGate
+
+FACE = {'x': 20, 'y': 20, 'w': 100, 'h': 100}
+
+def _frame(crop):
+    frame = np.full((160, 160, 3), 128, np.uint8)
+    frame[20:120, 20:120] = crop[..., None]
+    return frame
+
+def _sharp():
+    rng = np.random.default_rng(0)
+    return rng.integers(60, 200, (100, 100)).astype(np.uint8)
+
+def test_each_rejection_reason():
+    """Test small, dark, bright, flat and blurry crops are told apart"""
+    gate = FaceQualityGate({})
+    gradient = np.tile(np.linspace(40, 215, 100), (100, 1)).astype(np.uint8)
+    cases = [
+        (_frame(_sharp()), dict(FACE, w=40, h=40), 'too_small'),
+        (_frame(_sharp() // 8), FACE, 'too_dark'),
+        (_frame(np.clip(_sharp().astype(int) + 120, 0, 255).astype(np.uint8)), FACE, 'too_bright'),
+        (_frame(np.full((100, 100), 128, np.uint8)), FACE, 'low_contrast'),
+        (_frame(gradient), FACE, 'blurry'),
+    ]
+    for frame, face, reason in cases:
+        ok, got, _ = gate.assess(frame, face)
+        assert not ok and got == reason
+    
+    ok, reason, metrics = gate.assess(_frame(_sharp()), FACE)
+    assert ok and reason is None
+    assert metrics['sharpness'] > gate.min_sharpness
+
+def test_counters_and_disabled_gate():
+    """Test check() counts passes and rejections; a disabled gate passes everything"""
+    gate = FaceQualityGate({})
+    assert gate.check(_frame(_sharp()), FACE)
+    assert not gate.check(_frame(_sharp()), dict(FACE, w=30))
+    assert not gate.check(_frame(np.full((100, 100), 128, np.uint8)), FACE)
+    stats = gate.get_stats()
+    assert stats['checked'] == 3 and stats['passed'] == 1
+    assert stats['rejected']['too_small'] == 1 and stats['rejected']['low_contrast'] == 1
+    
+    disabled = FaceQualityGate({'enabled': False})
+    assert disabled.check(_frame(np.zeros((100, 100), np.uint8)), FACE)
+    assert disabled.get_stats()['checked'] == 0
@@ -0,0 +1,53 @@
+"""Tests for offline replay"""
+import sys
+sys.path.insert(0, '..')
+import json
+import os
+import cv2
+import numpy as np
+from datetime import datetime, timedelta
+from src.clock import SimulatedClock
+from src.replay import ReplayCamera, DecisionTrace, recording_start
+
+def test_replay_images_drives_clock(tmp_path):
+    """Test an image directory replays in order and moves the clock"""
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f'{i:03d}.png'), np.full((48, 64, 3), i * 50, np.uint8))
+    clock = SimulatedClock(datetime(2024, 1, 1, 9, 0))
+    camera = ReplayCamera({}, tmp_path, realtime=False, clock=clock, fps=10.0)
+    
+    frames = [camera.capture_frame() for _ in range(3)]
+    assert [int(f[0, 0, 0]) for f in frames] == [0, 50, 100]
+    assert clock.now() == datetime(2024, 1, 1, 9, 0, 0, 200000)
+    assert camera.capture_frame() is None
+    assert not camera.is_active()
+
+def test_recording_start_subtracts_clip_length(tmp_path):
+    """Test a recording's start is its mtime minus its length"""
+    path = tmp_path / 'clip.avi'
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (64, 48))
+    for _ in range(20):
+        writer.write(np.zeros((48, 64, 3), np.uint8))
+    writer.release()
+    end = datetime(2024, 1, 1, 9, 0, 2)
+    os.utime(path, (end.timestamp(), end.timestamp()))
+    assert recording_start(path) == end - timedelta(seconds=2)
+    
+    images = tmp_path / 'frames'
+    images.mkdir()
+    for i in range(5):
+        cv2.imwrite(str(images / f'{i:03d}.png'), np.zeros((48, 64, 3), np.uint8))
+    os.utime(images, (end.timestamp(), end.timestamp()))
+    assert recording_start(images, image_fps=10.0) == end - timedelta(seconds=0.5)
+
+def test_decision_trace(tmp_path):
+    """Test decisions are counted by outcome and written as JSON lines"""
+    path = tmp_path / 'trace.jsonl'
+    trace = DecisionTrace(str(path))
+    trace.record({'user_id': 1, 'success': True, 'timestamp': datetime(2024, 1, 1)})
+    trace.record({'user_id': None, 'success': False})
+    trace.close()
+    
+    assert trace.summary() == {'decisions': 2, 'granted': 1, 'unknown': 1}
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['outcome'] for line in lines] == ['granted', 'unknown']
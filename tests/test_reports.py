@@ -0,0 +1,64 @@
+"""Tests for access log reports"""
+import io
+import json
+import sys
+from datetime import datetime
+sys.path.insert(0, '..')
+from src.database import Database
+from src.reports import ReportGenerator, parse_date_range
+
+def _populate(db):
+    alice = db.add_user('Alice', 'employee')
+    for day in range(1, 4):
+        for hour in (9, 18):
+            db.log_access({'user_id': alice, 'timestamp': datetime(2024, 1, day, hour),
+                           'success': True, 'method': 'face_recognition',
+                           'confidence': 0.9, 'risk_score': 0.1, 'reason': 'Access approved'})
+    db.log_access({'user_id': None, 'timestamp': datetime(2024, 1, 2, 23), 'success': False,
+                   'method': 'face_recognition', 'confidence': 0.2, 'risk_score': 0.8,
+                   'anomaly_detected': True, 'reason': 'Unknown face'})
+    return alice
+
+def test_parse_date_range_includes_end_day():
+    """Test a date-only end date covers the whole day"""
+    start, end = parse_date_range('2024-01-01', '2024-01-31')
+    assert start == datetime(2024, 1, 1) and end == datetime(2024, 2, 1)
+    assert parse_date_range() == (None, None)
+
+def test_summary_groups_in_sql(tmp_path):
+    """Test per-day, per-user and outcome aggregations over a range"""
+    db = Database(str(tmp_path / 'test.db'))
+    _populate(db)
+    report = ReportGenerator(db).summary(*parse_date_range('2024-01-02', '2024-01-03'))
+    
+    assert report['totals']['attempts'] == 5
+    assert report['totals']['denied'] == 1 and report['totals']['anomalies'] == 1
+    assert [(r['day'], r['attempts']) for r in report['by_day']] == [('2024-01-02', 3), ('2024-01-03', 2)]
+    assert {r['user_name']: r['granted'] for r in report['by_user']} == {None: 0, 'Alice': 4}
+    assert [(r['success'], r['reason']) for r in report['by_outcome']] == [
+        (0, 'Unknown face'), (1, 'Access approved')]
+    db.close()
+
+def test_rows_stream_in_pages(tmp_path):
+    """Test streamed exports page through every row in time order"""
+    db = Database(str(tmp_path / 'test.db'))
+    _populate(db)
+    generator = ReportGenerator(db, batch_size=2)
+    
+    rows = list(generator.rows())
+    assert len(rows) == 7
+    assert [r['timestamp'] for r in rows] == sorted(r['timestamp'] for r in rows)
+    
+    out = io.StringIO()
+    assert generator.write_csv(out) == 7
+    assert len(out.getvalue().strip().splitlines()) == 8
+    
+    out = io.StringIO()
+    assert generator.write_json(out, *parse_date_range('2024-01-03')) == 2
+    document = json.loads(out.getvalue())
+    assert document['totals']['attempts'] == 2 and len(document['rows']) == 2
+    
+    out = io.StringIO()
+    assert generator.write_json(out, *parse_date_range('2025-01-01')) == 0
+    assert json.loads(out.getvalue())['rows'] == []
+    db.close()
@@ -0,0 +1,39 @@
+"""Tests for access log retention"""
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, '..')
+from src.database import Database
+from src.retention import AccessLogRetention
+
+def test_compaction_archives_old_rows_in_batches(tmp_path):
+    """Test old rows move to the archive while rollup counts stay intact"""
+    path = str(tmp_path / 'test.db')
+    db = Database(path)
+    user_id = db.add_user('Alice', 'employee')
+    now = datetime(2024, 6, 1, 12)
+    for days in range(1, 8):
+        db.log_access({'user_id': user_id, 'timestamp': now - timedelta(days=days * 30),
+                       'success': True, 'method': 'face'})
+    before = db.aggregate_access_rollups('user')
+    
+    retention = AccessLogRetention(path, {'max_age_days': 100, 'batch_size': 2, 'batch_pause': 0,
+                                          'archive_dir': str(tmp_path / 'archive')})
+    result = retention.run(now=now)
+    assert result['rows'] == 4 and result['batches'] == 2
+    assert db.conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0] == 3
+    assert db.aggregate_access_rollups('user') == before
+    
+    archived = []
+    for archive in sorted((tmp_path / 'archive').iterdir()):
+        with gzip.open(archive, 'rt') as f:
+            archived.extend(json.loads(line) for line in f)
+    assert len(archived) == 4 and all(row['user_id'] == user_id for row in archived)
+    assert retention.run(now=now)['rows'] == 0
+    
+    # Background compaction only runs when enabled explicitly
+    assert not retention.enabled
+    retention.maybe_run()
+    assert retention._thread is None
+    db.close()
@@ -0,0 +1,30 @@
+"""Tests for the adaptive frame scheduler"""
+import sys
+import time
+sys.path.insert(0, '..')
+from src.scheduler import FrameScheduler
+
+def test_ramps_down_when_idle_and_up_on_activity():
+    """Test rate halves towards idle and jumps back on activity"""
+    scheduler = FrameScheduler({'active_fps': 16.0, 'idle_fps': 2.0, 'idle_after': 0.0})
+    for _ in range(5):
+        scheduler.report(False)
+    assert scheduler.fps == 2.0
+    
+    scheduler.report(True)
+    assert scheduler.fps == 16.0
+    assert scheduler.get_stats()['rate_changes'] == 4
+
+def test_wait_absorbs_processing_time():
+    """Test wait only sleeps for what is left of the period"""
+    scheduler = FrameScheduler({'active_fps': 10.0})
+    scheduler.begin()
+    time.sleep(0.06)
+    start = time.monotonic()
+    scheduler.wait()
+    assert time.monotonic() - start < 0.08
+    
+    scheduler.begin()
+    time.sleep(0.12)
+    scheduler.wait()
+    assert scheduler.get_stats()['overruns'] == 1
@@ -0,0 +1,29 @@
+"""Tests for fast CLI startup"""
+import sys
+sys.path.insert(0, '..')
+import json
+import subprocess
+from pathlib import Path
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ['cv2', 'numpy', 'flask', 'face_recognition', 'dlib', 'RPi']
+
+def test_admin_commands_only_touch_database(tmp_path):
+    """Test status and log queries import no camera, dlib, numpy or Flask"""
+    with open(ROOT / 'config.yaml') as f:
+        config = yaml.safe_load(f)
+    config['database']['path'] = str(tmp_path / 'neurodoor.db')
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    
+    script = (
+        "import sys, json, main\n"
+        f"nd = main.NeuroDoor({str(config_path)!r})\n"
+        "nd.get_status()\n"
+        "nd.database.get_access_log(limit=50)\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
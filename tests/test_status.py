@@ -0,0 +1,44 @@
+"""Tests for the event bus and status snapshot"""
+import sys
+sys.path.insert(0, '..')
+from src.database import Database
+from src.events import EventBus
+from src.status import StatusSnapshot
+
+def test_event_bus_replays_missed_events():
+    """Test subscribers catch up from Last-Event-ID and slow ones drop oldest"""
+    bus = EventBus(queue_size=2)
+    for i in range(3):
+        bus.publish('access', {'n': i})
+    
+    missed = bus.subscribe(last_id=1)
+    assert [missed.get_nowait()['data']['n'] for _ in range(2)] == [1, 2]
+    
+    for i in range(3, 6):
+        bus.publish('access', {'n': i})
+    assert [missed.get_nowait()['data']['n'] for _ in range(2)] == [4, 5]
+    assert bus.get_stats()['dropped'] == 1
+    assert 'event: access' in bus.subscribe(last_id=4).get_nowait()['message']
+
+def test_snapshot_tracks_events_and_tails_database(tmp_path):
+    """Test the snapshot updates from events and from new log rows"""
+    db = Database(str(tmp_path / 'test.db'))
+    user_id = db.add_user('Alice', 'employee')
+    db.log_access({'user_id': user_id, 'success': True, 'method': 'face'})
+    bus = EventBus()
+    snapshot = StatusSnapshot(db, bus, {'recent_size': 2})
+    
+    version, fields = snapshot.get()
+    assert fields['total_users'] == 1 and len(fields['recent_access']) == 1
+    
+    bus.publish('access', {'user_name': 'Bob', 'success': False})
+    new_version, fields = snapshot.get()
+    assert new_version > version
+    assert fields['recent_access'][0]['user_name'] == 'Bob'
+    
+    # Rows written by another process are picked up by polling
+    db.log_access({'user_id': user_id, 'success': True, 'method': 'manual'})
+    assert snapshot.poll() == 1
+    assert snapshot.get()[1]['recent_access'][0]['method'] == 'manual'
+    assert snapshot.poll() == 0
+    db.close()
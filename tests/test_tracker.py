@@ -0,0 +1,30 @@
+"""Tests for face tracking"""
+import sys
+sys.path.insert(0, '..')
+from src.tracker import FaceTracker
+
+def test_track_persists_across_frames():
+    """Test a slightly moved face keeps its track id"""
+    tracker = FaceTracker({'iou_threshold': 0.3})
+    (track, _), = tracker.update([{'x': 100, 'y': 100, 'w': 80, 'h': 80}], now=0.0)
+    (same, _), = tracker.update([{'x': 105, 'y': 102, 'w': 80, 'h': 80}], now=0.1)
+    assert same.track_id == track.track_id
+    (other, _), = tracker.update([{'x': 400, 'y': 100, 'w': 80, 'h': 80}], now=0.2)
+    assert other.track_id != track.track_id
+
+def test_identified_track_only_reverified_periodically():
+    """Test identified tracks skip recognition until the reverify interval"""
+    tracker = FaceTracker({'reverify_interval': 5.0})
+    (track, _), = tracker.update([{'x': 0, 'y': 0, 'w': 50, 'h': 50}], now=0.0)
+    assert tracker.needs_recognition(track, 0.0)
+    track.user_id = 1
+    track.last_verified = 0.0
+    assert not tracker.needs_recognition(track, 1.0)
+    assert tracker.needs_recognition(track, 5.0)
+
+def test_stale_tracks_expire():
+    """Test tracks end after the timeout without detections"""
+    tracker = FaceTracker({'track_timeout': 1.0})
+    tracker.update([{'x': 0, 'y': 0, 'w': 50, 'h': 50}], now=0.0)
+    tracker.update([], now=2.0)
+    assert not tracker.has_tracks()